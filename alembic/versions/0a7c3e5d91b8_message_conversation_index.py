@@ -0,0 +1,55 @@
+"""message conversation index
+
+Revision ID: 0a7c3e5d91b8
+Revises: f2b6d8a14c53
+Create Date: 2026-10-16 19:26:53.108846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7c3e5d91b8'
+down_revision: Union[str, Sequence[str], None] = 'f2b6d8a14c53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # on a fresh database init_db creates the table together with this index
+    if not sa.inspect(op.get_bind()).has_table('messages'):
+        return
+
+    # built concurrently so sending messages is not blocked on live databases
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_pair_timestamp_uid',
+            'messages',
+            [
+                sa.text('least(sender_uid, receiver_uid)'),
+                sa.text('greatest(sender_uid, receiver_uid)'),
+                'timestamp',
+                'uid',
+            ],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('messages'):
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_messages_pair_timestamp_uid',
+            table_name='messages',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,50 @@
+"""appointment dashboard index
+
+Revision ID: 3f9a1c7d2b84
+Revises:
+Create Date: 2026-10-16 09:12:41.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2b84'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # on a fresh database init_db creates the table together with this index
+    if not sa.inspect(op.get_bind()).has_table('appointments'):
+        return
+
+    # built concurrently so appointment writes are not blocked on live databases
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_appointments_hospital_status_scheduled',
+            'appointments',
+            ['hospital_uid', 'status', 'scheduled_time'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('appointments'):
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_appointments_hospital_status_scheduled',
+            table_name='appointments',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
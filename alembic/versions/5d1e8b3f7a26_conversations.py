@@ -0,0 +1,77 @@
+"""conversations
+
+Revision ID: 5d1e8b3f7a26
+Revises: 0a7c3e5d91b8
+Create Date: 2026-10-16 20:08:15.734921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1e8b3f7a26'
+down_revision: Union[str, Sequence[str], None] = '0a7c3e5d91b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('messages') or inspector.has_table('conversations'):
+        return
+
+    op.create_table(
+        'conversations',
+        sa.Column('uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('peer_uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('last_message_uid', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('read_up_to', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_uid'], ['users.uid'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['peer_uid'], ['users.uid'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['last_message_uid'], ['messages.uid'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('uid'),
+        sa.UniqueConstraint('user_uid', 'peer_uid', name='uq_conversation_user_peer'),
+    )
+    op.create_index('ix_conversations_peer_uid', 'conversations', ['peer_uid'], unique=False)
+    op.create_index('ix_conversations_user_last_message', 'conversations', ['user_uid', 'last_message_at', 'uid'], unique=False)
+
+    # one row per side of every pair that has exchanged messages, with its last message and unread count
+    op.execute("""
+        WITH sides AS (
+            SELECT sender_uid AS user_uid, receiver_uid AS peer_uid, uid, timestamp FROM messages
+            UNION ALL
+            SELECT receiver_uid, sender_uid, uid, timestamp FROM messages
+        ),
+        last_message AS (
+            SELECT DISTINCT ON (user_uid, peer_uid) user_uid, peer_uid, uid, timestamp
+            FROM sides
+            ORDER BY user_uid, peer_uid, timestamp DESC NULLS LAST, uid DESC
+        ),
+        unread AS (
+            SELECT receiver_uid AS user_uid, sender_uid AS peer_uid, count(*) AS unread_count
+            FROM messages
+            WHERE NOT is_read AND sender_uid <> receiver_uid
+            GROUP BY receiver_uid, sender_uid
+        )
+        INSERT INTO conversations (uid, user_uid, peer_uid, last_message_uid, last_message_at, unread_count)
+        SELECT gen_random_uuid(), last_message.user_uid, last_message.peer_uid, last_message.uid,
+               coalesce(last_message.timestamp, now()), coalesce(unread.unread_count, 0)
+        FROM last_message LEFT JOIN unread USING (user_uid, peer_uid)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_conversations_user_last_message', table_name='conversations', if_exists=True)
+    op.drop_index('ix_conversations_peer_uid', table_name='conversations', if_exists=True)
+    op.drop_table('conversations', if_exists=True)
@@ -0,0 +1,50 @@
+"""email outbox templates
+
+Revision ID: 7e2d4b9c1f65
+Revises: c3e7a9150b42
+Create Date: 2026-10-17 00:21:44.908213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2d4b9c1f65'
+down_revision: Union[str, Sequence[str], None] = 'c3e7a9150b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('email_outbox'):
+        return
+
+    columns = {column['name'] for column in inspector.get_columns('email_outbox')}
+
+    if 'template' not in columns:
+        op.add_column('email_outbox', sa.Column('template', sa.String(), nullable=True))
+    if 'context' not in columns:
+        op.add_column('email_outbox', sa.Column('context', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    # rows staged from now on carry a template instead of the rendered HTML
+    op.alter_column('email_outbox', 'body', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('email_outbox'):
+        return
+
+    # templated rows have no body to fall back on
+    op.execute("DELETE FROM email_outbox WHERE body IS NULL")
+    op.alter_column('email_outbox', 'body', existing_type=sa.Text(), nullable=False)
+    op.drop_column('email_outbox', 'context')
+    op.drop_column('email_outbox', 'template')
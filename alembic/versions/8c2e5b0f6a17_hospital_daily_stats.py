@@ -0,0 +1,65 @@
+"""hospital daily stats
+
+Revision ID: 8c2e5b0f6a17
+Revises: 3f9a1c7d2b84
+Create Date: 2026-10-16 11:47:05.218640
+
+Populate it afterwards with: python -m src.app.services.daily_stats
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2e5b0f6a17'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c7d2b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('appointments') or inspector.has_table('hospital_daily_stats'):
+        return
+
+    counter = lambda name: sa.Column(name, sa.Integer(), server_default='0', nullable=False)
+
+    op.create_table(
+        'hospital_daily_stats',
+        sa.Column('uid', postgresql.UUID(as_uuid=True), server_default=sa.text('gen_random_uuid()'), nullable=False),
+        sa.Column('hospital_uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('department_uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('practitioner_uid', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        counter('total'),
+        counter('pending'),
+        counter('completed'),
+        counter('canceled'),
+        counter('in_progress'),
+        counter('rescheduled'),
+        counter('missed'),
+        sa.Column('wait_seconds', sa.Double(), server_default='0', nullable=False),
+        counter('wait_samples'),
+        sa.ForeignKeyConstraint(['hospital_uid'], ['hospitals.uid'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['department_uid'], ['departments.uid'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['practitioner_uid'], ['practitioners.uid'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('uid'),
+        sa.UniqueConstraint(
+            'hospital_uid', 'department_uid', 'practitioner_uid', 'day',
+            name='uq_hospital_daily_stats',
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    op.create_index('ix_hospital_daily_stats_hospital_day', 'hospital_daily_stats', ['hospital_uid', 'day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_hospital_daily_stats_hospital_day', table_name='hospital_daily_stats', if_exists=True)
+    op.drop_table('hospital_daily_stats', if_exists=True)
@@ -0,0 +1,92 @@
+"""notification inbox
+
+Revision ID: 9b4f2c6e0d13
+Revises: 5d1e8b3f7a26
+Create Date: 2026-10-16 21:02:37.442190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4f2c6e0d13'
+down_revision: Union[str, Sequence[str], None] = '5d1e8b3f7a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('notifications'):
+        return
+
+    if not inspector.has_table('notification_counters'):
+        op.create_table(
+            'notification_counters',
+            sa.Column('uid', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('user_uid', postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False),
+            sa.ForeignKeyConstraint(['user_uid'], ['users.uid'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('uid'),
+            sa.UniqueConstraint('user_uid'),
+        )
+
+        op.execute("""
+            INSERT INTO notification_counters (uid, user_uid, unread_count)
+            SELECT gen_random_uuid(), user_uid, count(*)
+            FROM notifications
+            WHERE NOT is_read
+            GROUP BY user_uid
+        """)
+
+    # built concurrently so notification writes are not blocked on live databases
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notifications_user_timestamp',
+            'notifications',
+            ['user_uid', sa.text('timestamp DESC'), sa.text('uid DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_notifications_user_read_timestamp',
+            'notifications',
+            ['user_uid', 'is_read', sa.text('timestamp DESC'), sa.text('uid DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_notifications_read_timestamp',
+            'notifications',
+            ['timestamp'],
+            unique=False,
+            postgresql_where=sa.text('is_read'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('notifications'):
+        return
+
+    with op.get_context().autocommit_block():
+        for name in ('ix_notifications_read_timestamp', 'ix_notifications_user_read_timestamp', 'ix_notifications_user_timestamp'):
+            op.drop_index(
+                name,
+                table_name='notifications',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+    op.drop_table('notification_counters', if_exists=True)
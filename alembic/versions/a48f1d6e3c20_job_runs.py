@@ -0,0 +1,55 @@
+"""job runs
+
+Revision ID: a48f1d6e3c20
+Revises: 7e2d4b9c1f65
+Create Date: 2026-10-17 01:05:12.377581
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a48f1d6e3c20'
+down_revision: Union[str, Sequence[str], None] = '7e2d4b9c1f65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('users') or inspector.has_table('job_runs'):
+        return
+
+    job_run_status = postgresql.ENUM('succeeded', 'failed', name='job_run_status')
+    job_run_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'job_runs',
+        sa.Column('uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('job_name', sa.String(), nullable=False),
+        sa.Column('runner', sa.String(), nullable=False),
+        sa.Column('status', postgresql.ENUM(name='job_run_status', create_type=False), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('duration_ms', sa.Integer(), nullable=False),
+        sa.Column('rows_affected', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('uid'),
+    )
+    op.create_index('ix_job_runs_job_started', 'job_runs', ['job_name', 'started_at', 'uid'], unique=False)
+    op.create_index('ix_job_runs_started', 'job_runs', ['started_at', 'uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_runs_started', table_name='job_runs', if_exists=True)
+    op.drop_index('ix_job_runs_job_started', table_name='job_runs', if_exists=True)
+    op.drop_table('job_runs', if_exists=True)
+    postgresql.ENUM(name='job_run_status').drop(op.get_bind(), checkfirst=True)
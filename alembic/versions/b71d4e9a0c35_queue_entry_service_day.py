@@ -0,0 +1,67 @@
+"""queue entry service day
+
+Revision ID: b71d4e9a0c35
+Revises: 8c2e5b0f6a17
+Create Date: 2026-10-16 14:22:41.603117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71d4e9a0c35'
+down_revision: Union[str, Sequence[str], None] = '8c2e5b0f6a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('queue_entries'):
+        return
+    if 'service_day' in {column['name'] for column in inspector.get_columns('queue_entries')}:
+        return
+
+    op.add_column('queue_entries', sa.Column('service_day', sa.Date(), nullable=True))
+    op.execute("UPDATE queue_entries SET service_day = (joined_at AT TIME ZONE 'UTC')::date")
+    op.alter_column('queue_entries', 'service_day', nullable=False)
+
+    # entries that raced for the same number move to the end of their day
+    op.execute("""
+        WITH ranked AS (
+            SELECT uid, queue_uid, service_day,
+                   row_number() OVER (PARTITION BY queue_uid, service_day, queue_number ORDER BY joined_at, uid) AS copy
+            FROM queue_entries
+        ),
+        moved AS (
+            SELECT uid, queue_uid, service_day,
+                   row_number() OVER (PARTITION BY queue_uid, service_day ORDER BY uid) AS offset_by
+            FROM ranked
+            WHERE copy > 1
+        ),
+        last_number AS (
+            SELECT queue_uid, service_day, max(queue_number) AS queue_number
+            FROM queue_entries
+            GROUP BY queue_uid, service_day
+        )
+        UPDATE queue_entries
+        SET queue_number = last_number.queue_number + moved.offset_by
+        FROM moved JOIN last_number USING (queue_uid, service_day)
+        WHERE queue_entries.uid = moved.uid
+    """)
+
+    op.create_unique_constraint(
+        'uq_queue_entries_queue_day_number', 'queue_entries', ['queue_uid', 'service_day', 'queue_number']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_queue_entries_queue_day_number', 'queue_entries', type_='unique')
+    op.drop_column('queue_entries', 'service_day')
@@ -0,0 +1,82 @@
+"""hospital search
+
+Revision ID: b7d3e5a92c16
+Revises: e9c3f7a12d58
+Create Date: 2026-10-17 04:42:11.318760
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e5a92c16'
+down_revision: Union[str, Sequence[str], None] = 'e9c3f7a12d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(hospital_name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(state, '') || ' ' || coalesce(full_address, '')), 'B') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(about, '')), 'D')"
+)
+
+# (index, column, operator class) of the hospital search
+INDEXES = [
+    ('ix_hospitals_search_vector', 'search_vector', None),
+    ('ix_hospitals_name_trgm', 'hospital_name', 'gin_trgm_ops'),
+    ('ix_hospitals_state_trgm', 'state', 'gin_trgm_ops'),
+    ('ix_hospitals_address_trgm', 'full_address', 'gin_trgm_ops'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('hospitals'):
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    if 'search_vector' not in {column['name'] for column in inspector.get_columns('hospitals')}:
+        op.add_column('hospitals', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+
+    # built concurrently so hospital lists and profile updates are not blocked on live databases
+    with op.get_context().autocommit_block():
+        for name, column, ops in INDEXES:
+            op.create_index(
+                name,
+                'hospitals',
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: ops} if ops else {},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('hospitals'):
+        return
+
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='hospitals',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+    # pg_trgm is left installed, dropping an extension is for whoever owns the database
+    if 'search_vector' in {column['name'] for column in inspector.get_columns('hospitals')}:
+        op.drop_column('hospitals', 'search_vector')
@@ -0,0 +1,57 @@
+"""email outbox
+
+Revision ID: c3e7a9150b42
+Revises: 9b4f2c6e0d13
+Create Date: 2026-10-16 21:48:09.215637
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e7a9150b42'
+down_revision: Union[str, Sequence[str], None] = '9b4f2c6e0d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('users') or inspector.has_table('email_outbox'):
+        return
+
+    email_status = postgresql.ENUM('pending', 'published', 'failed', name='email_status')
+    email_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'email_outbox',
+        sa.Column('uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('idempotency_key', sa.String(), nullable=False),
+        sa.Column('recipients', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', postgresql.ENUM(name='email_status', create_type=False), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('uid'),
+        sa.UniqueConstraint('idempotency_key'),
+    )
+    op.create_index('ix_email_outbox_pending', 'email_outbox', ['created_at'], unique=False, postgresql_where=sa.text("status = 'pending'"))
+    op.create_index('ix_email_outbox_published_at', 'email_outbox', ['published_at'], unique=False, postgresql_where=sa.text("status = 'published'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_outbox_published_at', table_name='email_outbox', if_exists=True)
+    op.drop_index('ix_email_outbox_pending', table_name='email_outbox', if_exists=True)
+    op.drop_table('email_outbox', if_exists=True)
+    postgresql.ENUM(name='email_status').drop(op.get_bind(), checkfirst=True)
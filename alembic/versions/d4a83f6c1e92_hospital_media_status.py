@@ -0,0 +1,41 @@
+"""hospital media status
+
+Revision ID: d4a83f6c1e92
+Revises: b71d4e9a0c35
+Create Date: 2026-10-16 16:05:12.381904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a83f6c1e92'
+down_revision: Union[str, Sequence[str], None] = 'b71d4e9a0c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+media_status = postgresql.ENUM('pending', 'ready', 'failed', name='media_status')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('hospital_media'):
+        return
+    if 'status' in {column['name'] for column in inspector.get_columns('hospital_media')}:
+        return
+
+    media_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('hospital_media', sa.Column('status', media_status, server_default='ready', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('hospital_media', 'status', if_exists=True)
+    media_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,51 @@
+"""appointments open index
+
+Revision ID: d5b8e2f04a71
+Revises: a48f1d6e3c20
+Create Date: 2026-10-17 01:42:30.118450
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b8e2f04a71'
+down_revision: Union[str, Sequence[str], None] = 'a48f1d6e3c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # on a fresh database init_db creates every table from the models
+    if not sa.inspect(op.get_bind()).has_table('appointments'):
+        return
+
+    # built concurrently so bookings are not blocked on live databases
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_appointments_open_scheduled',
+            'appointments',
+            ['scheduled_time'],
+            unique=False,
+            postgresql_where=sa.text("status IN ('pending', 'in_progress', 'rescheduled')"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table('appointments'):
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_appointments_open_scheduled',
+            table_name='appointments',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
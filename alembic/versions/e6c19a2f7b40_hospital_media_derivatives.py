@@ -0,0 +1,50 @@
+"""hospital media derivatives
+
+Revision ID: e6c19a2f7b40
+Revises: d4a83f6c1e92
+Create Date: 2026-10-16 17:31:48.270553
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c19a2f7b40'
+down_revision: Union[str, Sequence[str], None] = 'd4a83f6c1e92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # on a fresh database init_db creates every table from the models
+    if not inspector.has_table('hospital_media') or inspector.has_table('hospital_media_derivatives'):
+        return
+
+    op.create_table(
+        'hospital_media_derivatives',
+        sa.Column('uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('media_uid', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('variant', sa.String(), nullable=False),
+        sa.Column('file_url', sa.String(), nullable=False),
+        sa.Column('public_id', sa.String(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('height', sa.Integer(), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['media_uid'], ['hospital_media.uid'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('uid'),
+        sa.UniqueConstraint('media_uid', 'variant', name='uq_hospital_media_derivative_variant'),
+    )
+    op.create_index('ix_hospital_media_derivatives_media_uid', 'hospital_media_derivatives', ['media_uid'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_hospital_media_derivatives_media_uid', table_name='hospital_media_derivatives', if_exists=True)
+    op.drop_table('hospital_media_derivatives', if_exists=True)
@@ -0,0 +1,69 @@
+"""token expiry indexes
+
+Revision ID: e9c3f7a12d58
+Revises: d5b8e2f04a71
+Create Date: 2026-10-17 02:16:57.604213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9c3f7a12d58'
+down_revision: Union[str, Sequence[str], None] = 'd5b8e2f04a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index, table, column) the expired token purge deletes by
+INDEXES = [
+    ('ix_signup_links_created_at', 'signup_links', 'created_at'),
+    ('ix_password_reset_tokens_expires_at', 'password_reset_tokens', 'expires_at'),
+    ('ix_refreshtokens_expires_at', 'refreshtokens', 'expires_at'),
+    ('ix_blacklistedtokens_expires_at', 'blacklistedtokens', 'expires_at'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if inspector.has_table('job_runs') and 'details' not in {column['name'] for column in inspector.get_columns('job_runs')}:
+        op.add_column('job_runs', sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+    # built concurrently so logins and token checks are not blocked on live databases
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            if not inspector.has_table(table):
+                continue
+            op.create_index(
+                name,
+                table,
+                [column],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            if not inspector.has_table(table):
+                continue
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+    if inspector.has_table('job_runs'):
+        op.drop_column('job_runs', 'details')
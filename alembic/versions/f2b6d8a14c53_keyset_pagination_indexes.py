@@ -0,0 +1,71 @@
+"""keyset pagination indexes
+
+Revision ID: f2b6d8a14c53
+Revises: e6c19a2f7b40
+Create Date: 2026-10-16 18:44:09.615302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8a14c53'
+down_revision: Union[str, Sequence[str], None] = 'e6c19a2f7b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index, table, columns): every list is ordered by (filters..., sort key, uid)
+INDEXES = [
+    ('ix_users_created_uid', 'users', ['created_at', 'uid']),
+    ('ix_practitioners_last_name_uid', 'practitioners', ['last_name', 'uid']),
+    ('ix_practitioners_type_last_name_uid', 'practitioners', ['practitioner_type', 'last_name', 'uid']),
+    ('ix_appointments_scheduled_uid', 'appointments', ['scheduled_time', 'uid']),
+    ('ix_appointments_patient_scheduled_uid', 'appointments', ['patient_uid', 'scheduled_time', 'uid']),
+    ('ix_appointments_hospital_scheduled_uid', 'appointments', ['hospital_uid', 'scheduled_time', 'uid']),
+    ('ix_medical_records_patient_created_uid', 'medical_records', ['patient_uid', 'created_at', 'uid']),
+    ('ix_reviews_hospital_created_uid', 'reviews', ['hospital_uid', 'created_at', 'uid']),
+    ('ix_reviews_practitioner_created_uid', 'reviews', ['practitioner_uid', 'created_at', 'uid']),
+    ('ix_reviews_patient_created_uid', 'reviews', ['patient_uid', 'created_at', 'uid']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    # built concurrently so writes are not blocked on live databases,
+    # on a fresh database init_db creates the tables together with these indexes
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if not inspector.has_table(table):
+                continue
+
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            if not inspector.has_table(table):
+                continue
+
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
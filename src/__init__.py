@@ -1,10 +1,18 @@
+from pathlib import Path
 from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from src.app.database.main import init_db, async_session_factory
-from src.app.services.invitation import delete_expired_tokens
-from src.app.services import appointment as appt_service
+from src.app.database.main import init_db, async_engine, async_session_factory
+from src.app.services import live_queue
+from src.app.services.jobs import JOBS
+from src.app.core.scheduler import Scheduler
 from src.app.core.errors import register_all_errors
+from src.app.core.revocation import revoked_tokens
+from src.app.core.principal import local_principals
+from src.app.core.passwords import password_hasher
+from src.app.core.settings import Config
+from src.app.core.storage import get_storage
+from src.app.websocket.connection_manager import manager
 from src.app.middlewares import register_all_middlewares
 from src.app.router import (
     auth, 
@@ -17,30 +25,39 @@ from src.app.router import (
     practitioners, 
     users,
     message,
-    statistics, queue, hospital_media, review)
+    statistics, queue, hospital_media, review, notification)
 from src.app.websocket import notification_ws, appointment_ws, support_chat
 
 version = "v1"
 
-async def mark_missed_appointments_job():
-    print("Running missed appointments job...")
-
+async def rebuild_live_queues_job():
     async with async_session_factory() as session:
-        updated = await appt_service.mark_missed_appointments(
-            session=session
-        )
-
-        print(f"{updated} appointments marked as missed")
+        try:
+            entries = await live_queue.rebuild_live_queues(session)
+            print(f"{entries} live queue entries rebuilt")
+        except Exception as e:
+            print(f"Error rebuilding live queues: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Server is starting..................")
-    scheduler = start_scheduler()
+    # periodic jobs, see core/scheduler.py for how they run once cluster-wide
+    scheduler = Scheduler(JOBS, async_engine, async_session_factory)
+    scheduler.start()
     await init_db()
+    await rebuild_live_queues_job()
+    revoked_tokens.start()
+    local_principals.start()
+    await manager.start()
     yield
     print("Server is stopping................")
+    await revoked_tokens.stop()
+    await local_principals.stop()
+    await manager.stop()
+    password_hasher.shutdown()
+    get_storage().shutdown()
     print("Scheduler stopping...........")
-    scheduler.shutdown()
+    await scheduler.stop()
     print("Scheduler has been stopped")
     print("Server has been stopped.")
 
@@ -64,28 +81,6 @@ register_all_errors(app)
 register_all_middlewares(app)
 
 
-# Async cleanup job
-async def cleanup_job():
-    async with async_session_factory() as session:
-        try:
-            await delete_expired_tokens(session)
-        except Exception as e:
-            print(f"Error deleting tokens from database: {e}")
-
-
-# Start the async scheduler
-def start_scheduler():
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(cleanup_job, trigger="interval", hours=24)
-    scheduler.add_job(
-        mark_missed_appointments_job,
-        trigger="interval",
-        minutes=30,
-    )
-    scheduler.start()
-    return scheduler
-
-
 #app routers
 app.include_router(auth.auth_router, prefix=f"/api/{version}")
 app.include_router(users.user_router, prefix=f"/api/{version}")
@@ -104,10 +99,16 @@ app.include_router(queue.queue_router, prefix=f"/api/{version}")
 app.include_router(medical_records.med_router, prefix=f"/api/{version}")
 app.include_router(message.router, prefix=f"/api/{version}")
 app.include_router(message.ws_router, prefix=f"/api/{version}")
+app.include_router(notification.notification_router, prefix=f"/api/{version}")
 app.include_router(notification_ws.router, prefix=f"/api/{version}")
 app.include_router(appointment_ws.router, prefix=f"/api/{version}")
 app.include_router(support_chat.router, prefix=f"/api/{version}")
 
+# uploads saved by the local storage backend
+if Config.STORAGE_BACKEND == "local":
+    Path(Config.MEDIA_ROOT).mkdir(parents=True, exist_ok=True)
+    app.mount(Config.MEDIA_URL, StaticFiles(directory=Config.MEDIA_ROOT), name="media")
+
 
 @app.get('/')
 async def root():
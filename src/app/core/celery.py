@@ -1,12 +1,29 @@
+import asyncio
+import json
+import os
+import smtplib
+import time
+from datetime import datetime, timezone
+import redis
 from celery import Celery, Task
-from src.app.core.email_utils import mail, create_message
-from fastapi_mail.errors import ConnectionErrors
-from asgiref.sync import async_to_sync
+from celery.signals import worker_init, worker_process_shutdown
+from jinja2 import TemplateError
+from src.app.core import email_templates
+from src.app.core.email_utils import create_mime_message
+from src.app.core.smtp_pool import get_smtp_pool, close_smtp_pool
+from src.app.core.redis import EMAIL_METRICS_KEY
+from src.app.core.settings import Config
 
 app = Celery()
 
 app.config_from_object("src.app.core.settings")
 
+# idempotency keys of the outbox emails, claimed before sending so a task delivered twice sends once
+sent_emails = redis.Redis.from_url(Config.REDIS_URL)
+
+EMAIL_SENDING_TTL = 600 # a claim left by a worker that died mid-send frees up after this
+EMAIL_SENT_TTL = Config.EMAIL_OUTBOX_RETENTION_DAYS * 86400 # a sent key is remembered as long as its outbox row
+
 
 # @app.task()
 # def send_email_task(recipients:list[str], subject: str, body: str):
@@ -27,28 +44,155 @@ app.config_from_object("src.app.core.settings")
 
 
 class EmailTask(Task):
-    autoretry_for = (ConnectionErrors,)
+    autoretry_for = (smtplib.SMTPServerDisconnected, ConnectionError)
     # retry up to 3 times, wait 5s
     retry_kwargs = {'max_retries': 3, 'countdown': 5}
     retry_backoff = True  # exponential backoff
     retry_jitter = True   # add random jitter to avoid thundering herd
 
 
-@app.task(base=EmailTask, bind=True)
-def send_email_task(self, recipients: list[str], subject: str, body: str):
+@worker_init.connect
+def _precompile_email_templates(**kwargs):
+    # in the main process, so forked pool processes inherit the compiled templates
+    print(f"📄 {email_templates.precompile()} email templates compiled")
+
+
+@worker_process_shutdown.connect
+def _close_smtp_connections(**kwargs):
+    close_smtp_pool()
+
+
+def _claim(key: str | None) -> bool:
+    return not key or bool(sent_emails.set(f"email_sent:{key}", "sending", nx=True, ex=EMAIL_SENDING_TTL))
+
+
+def _release(key: str | None):
+    # so a retry can send it
+    if key:
+        sent_emails.delete(f"email_sent:{key}")
+
+
+def _mark_sent(key: str | None):
+    if key:
+        sent_emails.set(f"email_sent:{key}", "sent", ex=EMAIL_SENT_TTL)
+
+
+def _record_metrics(metrics: dict):
     try:
-        message = create_message(
-            recipients=recipients,
-            subject=subject,
-            body=body
-                )
-
-        # async_to_sync because FastMail is async
-        async_to_sync(mail.send_message)(message)
+        pipe = sent_emails.pipeline()
+        pipe.lpush(EMAIL_METRICS_KEY, json.dumps(metrics))
+        pipe.ltrim(EMAIL_METRICS_KEY, 0, Config.EMAIL_METRICS_KEEP - 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"⚠️ Could not record email metrics: {e}")
+
+
+def _send_batch(emails: list[dict]) -> tuple[dict, list[dict], Exception | None]:
+    """
+    Send emails (recipients, subject, template and context or a prerendered body, idempotency_key) over one pooled SMTP session.
+    Returns the batch metrics, the emails left unsent and the error that stopped the batch, if any.
+    """
+    started = time.perf_counter()
+    pool = get_smtp_pool()
+    opened = pool.opened
+    sent = refused = 0
+    error = None
+
+    # rendered before anything is claimed, an email that can't render is dropped rather than retried
+    bodies = {}
+    for email in emails:
+        try:
+            bodies[id(email)] = email.get("body") or email_templates.render(email["template"], email["context"])
+        except (TemplateError, KeyError, ValueError) as e:
+            print(f"❌ Could not render email {email.get('idempotency_key')}: {e!r}")
+            refused += 1
+
+    unsent = [email for email in emails if id(email) in bodies and _claim(email.get("idempotency_key"))]
+    skipped = len(bodies) - len(unsent)
+
+    if unsent:
+        try:
+            with pool.connection() as smtp:
+                while unsent:
+                    email = unsent[0]
+                    key = email.get("idempotency_key")
+                    try:
+                        smtp.send_message(create_mime_message(email["recipients"], email["subject"], bodies[id(email)]))
+                    except smtplib.SMTPRecipientsRefused as e:
+                        # refused for this email alone, a retry would get the same answer
+                        print(f"❌ Recipients refused for email {key}: {e.recipients}")
+                        _release(key)
+                        refused += 1
+                    else:
+                        _mark_sent(key)
+                        sent += 1
+                    unsent.pop(0)
+        except (smtplib.SMTPException, OSError) as e:
+            error = e
+            for email in unsent:
+                _release(email.get("idempotency_key"))
+
+    elapsed = time.perf_counter() - started
+    metrics = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "pid": os.getpid(),
+        "batch_size": len(emails),
+        "sent": sent,
+        "skipped": skipped, # already sent or being sent under the same key
+        "refused": refused, # refused by the server or not renderable
+        "unsent": len(unsent),
+        "seconds": round(elapsed, 4),
+        "emails_per_second": round(sent / elapsed, 2) if elapsed else float(sent),
+        "connections_opened": pool.opened - opened,
+    }
+    _record_metrics(metrics)
+
+    return metrics, unsent, error
+
+
+@app.task(base=EmailTask, bind=True)
+def send_email_batch_task(self, emails: list[dict]):
+    metrics, unsent, error = _send_batch(emails)
+
+    print(f"📨 Batch of {metrics['batch_size']}: {metrics['sent']} sent, {metrics['skipped']} skipped, {metrics['refused']} refused in {metrics['seconds']}s ({metrics['emails_per_second']}/s)")
+
+    if error is not None:
+        print(f"⚠️ SMTP error, retrying {len(unsent)} unsent emails... {error}")
+        # only what did not go out is retried
+        raise self.retry(exc=error, args=(unsent,))
+
+    return metrics
+
+
+@app.task(base=EmailTask, bind=True)
+def send_email_task(self, recipients: list[str], subject: str, body: str, idempotency_key: str | None = None):
+    metrics, _, error = _send_batch([{"recipients": recipients, "subject": subject, "body": body, "idempotency_key": idempotency_key}])
+
+    if error is not None:
+        print(f"⚠️ SMTP error, retrying... {error}")
+        raise self.retry(exc=error)
+
+    if metrics["sent"]:
         print(f"✅ Message sent successfully to: {recipients}")
-    except ConnectionErrors as e:
-        print(f"⚠️ Connection error, retrying... {e}")
-        raise self.retry(exc=e)
-    except Exception as e:
-        print(f"❌ Failed to send email: {e}")
-        raise self.retry(exc=e)
+
+    return metrics
+
+
+@app.on_after_configure.connect
+def _schedule_periodic_jobs(sender, **kwargs):
+    # with SCHEDULER_BACKEND=celery the API schedules nothing and beat sends the jobs here
+    if Config.SCHEDULER_BACKEND != "celery":
+        return
+
+    from src.app.services.jobs import JOBS
+
+    for job in JOBS:
+        sender.add_periodic_task(job.every.total_seconds(), run_scheduled_job.s(job.name), name=job.name)
+
+
+@app.task
+def run_scheduled_job(name: str):
+    from src.app.core.scheduler import run_job_standalone
+    from src.app.services.jobs import JOBS_BY_NAME
+
+    return asyncio.run(run_job_standalone(JOBS_BY_NAME[name]))
@@ -4,10 +4,11 @@ from fastapi.security.http import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from typing import List, Any
 from src.app.database.main import get_session
-from src.app.models import Admin, AdminType, User, UserRoles
-from src.app.core.utils import verify_access_token, validate_refresh_token_jti, get_blacklisted_token_jti
+from src.app.models import Admin, AdminType, UserRoles
+from src.app.core.utils import verify_access_token, validate_refresh_token_jti, is_token_blacklisted
 from src.app.services import user as user_service
 from src.app.core import errors
+from src.app.core.principal import Principal, get_principal
 
 
 class AccessPass(HTTPBearer):
@@ -34,8 +35,7 @@ class AccessPass(HTTPBearer):
         
         #check if token has been revoked
         token_jti = token_data.get('jti')
-        blacklisted_token = await get_blacklisted_token_jti(token_jti, session)
-        if blacklisted_token:
+        if await is_token_blacklisted(token_jti):
             raise errors.TokenRevoked()
         
         await self.verify_token_data(token_data, session)
@@ -67,17 +67,26 @@ class RefreshTokenBearer(AccessPass):
         await validate_refresh_token_jti(refresh_jti, session)
 
 
-async def get_current_user(token_details: dict = Depends(AccessTokenBearer()), session: AsyncSession=Depends(get_session)):
+async def get_current_principal(token_details: dict = Depends(AccessTokenBearer()), session: AsyncSession=Depends(get_session)) -> Principal:
+    """Resolve the cached auth principal for the token. Use this when the full user graph is not needed."""
 
-    user_email = token_details['user']['email']
+    principal = await get_principal(token_details['user'], session)
+
+    if not principal:
+        raise errors.InvalidCred()
+
+    if not principal.is_active:
+        raise errors.AccountNotVerified(principal)
+
+    return principal
 
-    user = await user_service.get_user_email(user_email, session)
+
+async def get_current_user(principal: Principal = Depends(get_current_principal), session: AsyncSession=Depends(get_session)):
+
+    user = await user_service.get_user_email(principal.email, session)
 
     if not user:
         raise errors.InvalidCred()
-
-    if not user.is_active:
-        raise errors.AccountNotVerified(user)
     
     return user
 
@@ -86,7 +95,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: List[str]) -> None:
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
+    def __call__(self, current_user: Principal = Depends(get_current_principal)) -> Any:
         user_role = current_user.role
         if user_role not in self.allowed_roles:
             raise errors.RoleCheckAccess()
@@ -100,7 +109,7 @@ def role_checker(allowed_roles: List[str]):
 refresh_token = RefreshTokenBearer()
 
 
-async def require_super_admin(current_user: User = Depends(get_current_user)):
+async def require_super_admin(current_user: Principal = Depends(get_current_principal)):
     """Ensure the current user is a super admin."""
 
     # Must be an admin
@@ -108,7 +117,7 @@ async def require_super_admin(current_user: User = Depends(get_current_user)):
         raise errors.NotAuthorized()
 
     # Must be a SUPER_ADMIN
-    if not hasattr(current_user, "admin") or current_user.admin.admin_type != AdminType.SUPER_ADMIN:
+    if current_user.admin_type != AdminType.SUPER_ADMIN:
         raise errors.RoleCheckAccess()
 
     return current_user
@@ -0,0 +1,45 @@
+from datetime import datetime
+from pathlib import Path
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+"""
+email templates
+The HTML of every email lives in templates/emails as a Jinja2 template extending the shared _layout.html
+and importing its fragments from _components.html.
+The API only stages a template name and a small JSON context in the outbox, the Celery worker renders it.
+Templates are compiled once per worker (precompile runs at worker start, before the pool forks) and kept in the
+environment's cache, the layout and fragments included, so rendering never reads or compiles a file.
+"""
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates" / "emails"
+
+
+def long_date(value: datetime | str) -> str:
+    """Monday, January 05, 2026 at 09:30 AM. Contexts carry dates as ISO strings so they stay JSON."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime("%A, %B %d, %Y at %I:%M %p")
+
+
+env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=True,
+    undefined=StrictUndefined, # a context missing a value fails the render instead of sending a blank
+    auto_reload=False, # templates only change with a deploy, skip the mtime check on every render
+    cache_size=-1, # never evict a compiled template
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+env.filters["long_date"] = long_date
+
+
+def precompile() -> int:
+    """Compile every email template into the cache. Returns how many were compiled."""
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def render(template: str, context: dict) -> str:
+    return env.get_template(template).render(context)
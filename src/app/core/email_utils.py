@@ -1,3 +1,5 @@
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
 from pathlib import Path
 from typing import Iterable, Union
 
@@ -65,3 +67,17 @@ def create_message(recipients: Union[str, list[str]], subject: str, body: str):
     )
 
     return message
+
+
+def create_mime_message(recipients: Union[str, list[str]], subject: str, body: str) -> EmailMessage:
+    """The same HTML email as create_message, built for smtplib so the worker can send it over a pooled connection."""
+
+    message = EmailMessage()
+    message["From"] = formataddr((Config.MAIL_FROM_NAME, Config.EMAIL_FROM))
+    message["To"] = ", ".join(_normalize_recipients(recipients))
+    message["Subject"] = subject
+    message["Date"] = formatdate(localtime=True)
+    message["Message-ID"] = make_msgid()
+    message.set_content(body, subtype="html")
+
+    return message
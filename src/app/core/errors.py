@@ -131,6 +131,14 @@ class FileUpload(ExceptionSystemManager):
     """Invalid image type"""
     pass
 
+class PasswordHashingBusy(ExceptionSystemManager):
+    """Too many password checks waiting, try again shortly"""
+    pass
+
+class InvalidCursor(ExceptionSystemManager):
+    """Pagination cursor is malformed or belongs to another list"""
+    pass
+
 def create_exception_handler(status_code: int, initial_detail: Any) -> Callable[[Request, Exception], Awaitable[JSONResponse]]:
 
     async def exception_handler(request: Request, exception: ExceptionSystemManager):
@@ -481,6 +489,30 @@ def register_all_errors(app: FastAPI):
     #     )
     # )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "invalid_cursor",
+                "resolution": "Use the next_cursor returned by the previous page, or leave cursor out to start over."
+            }
+        )
+    )
+
+    app.add_exception_handler(
+        PasswordHashingBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Too many sign in attempts are being processed",
+                "error_code": "password_hashing_busy",
+                "resolution": "Please try again in a few seconds."
+            }
+        )
+    )
+
     app.add_exception_handler(
         InvalidCred,
         create_exception_handler(
@@ -525,7 +557,12 @@ def register_all_errors(app: FastAPI):
 
             # emails = [user_email]
 
-            mails.send_verification_email(user_email, new_token)
+            # the handler has no request session, the email gets its own transaction
+            from src.app.database.main import async_session_factory
+
+            async with async_session_factory() as session:
+                mails.send_verification_email(session, user_email, new_token)
+                await session.commit()
 
             # Save the new token
             await redis.save_email_verification_token(user_email, new_token)
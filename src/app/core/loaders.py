@@ -0,0 +1,136 @@
+"""
+Named loader profiles.
+Relationships never load on attribute access (see LAZY in models.py), so every query states the graph it needs with `.options(*PROFILE)`.
+Each profile matches what the response schema (or caller) actually reads, nothing more.
+"""
+from typing import TypeVar
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from src.app.models import (
+    Admin,
+    Appointment,
+    Hospital,
+    HospitalMedia,
+    HospitalPatient,
+    MedicalRecord,
+    Message,
+    Patient,
+    Practitioner,
+    QueueEntry,
+    Queue,
+    Review,
+    User,
+)
+
+T = TypeVar("T")
+
+
+# what UserReadMe, the auth principal and the patient mails read off a user
+USER_ME = (
+    selectinload(User.admin).selectinload(Admin.hospital),
+    selectinload(User.admin).selectinload(Admin.department),
+    selectinload(User.patient),
+    selectinload(User.practitioner).selectinload(Practitioner.department),
+    selectinload(User.hospital),
+)
+
+# HospitalRead / HospitalResponse
+HOSPITAL_CARD = (
+    selectinload(Hospital.user),
+)
+
+# PatientRead
+PATIENT_CARD = (
+    selectinload(Patient.user),
+)
+
+# PractitionerRead
+PRACTITIONER_CARD = (
+    selectinload(Practitioner.user),
+    selectinload(Practitioner.hospital).selectinload(Hospital.user),
+    selectinload(Practitioner.department),
+)
+
+# AdminRead
+ADMIN_CARD = (
+    selectinload(Admin.user),
+    selectinload(Admin.hospital).selectinload(Hospital.user),
+    selectinload(Admin.department),
+)
+
+# AppointmentRead / AppointmentResponse
+APPOINTMENT_LIST = (
+    selectinload(Appointment.patient).selectinload(Patient.user),
+    selectinload(Appointment.practitioner).selectinload(Practitioner.user),
+    selectinload(Appointment.practitioner).selectinload(Practitioner.department),
+    selectinload(Appointment.hospital).selectinload(Hospital.user),
+    selectinload(Appointment.department),
+)
+
+# single appointment, the appointment mails read the patient's name off appointment.patient.
+# No user -> patient hop back to the same patient: on a populate_existing reload it repopulates that patient
+# a second time and unloads the patient.user the first hop just loaded
+APPOINTMENT_DETAIL = APPOINTMENT_LIST
+
+# queue broadcasts only print the patient's name
+APPOINTMENT_QUEUE = (
+    selectinload(Appointment.patient),
+)
+
+# MedicalRecordRead
+MEDICAL_RECORD_DETAIL = (
+    selectinload(MedicalRecord.patient).selectinload(Patient.user),
+    selectinload(MedicalRecord.practitioner).selectinload(Practitioner.user),
+    selectinload(MedicalRecord.practitioner).selectinload(Practitioner.department),
+    selectinload(MedicalRecord.hospital).selectinload(Hospital.user),
+    selectinload(MedicalRecord.files),
+)
+
+# MessageRead
+MESSAGE_READ = (
+    selectinload(Message.sender),
+    selectinload(Message.receiver),
+)
+
+# ReviewRead
+REVIEW_DETAIL = (
+    selectinload(Review.patient).selectinload(Patient.user),
+    selectinload(Review.practitioner).selectinload(Practitioner.user),
+    selectinload(Review.hospital).selectinload(Hospital.user),
+)
+
+# HospitalMediaRead, its srcset is built from the derivatives
+HOSPITAL_MEDIA_DETAIL = (
+    selectinload(HospitalMedia.derivatives),
+)
+
+# HospitalPatientRead / PatientHospitalRead
+HOSPITAL_PATIENT = (
+    selectinload(HospitalPatient.hospital).selectinload(Hospital.user),
+    selectinload(HospitalPatient.patient).selectinload(Patient.user),
+)
+
+QUEUE_ENTRY_DETAIL = (
+    selectinload(QueueEntry.queues).selectinload(Queue.hospital),
+)
+
+
+async def reload(instance: T, profile: tuple, session: AsyncSession) -> T:
+    """
+    Re-select an instance with a loader profile.
+    Use after commit instead of session.refresh(), which expires relationships and leaves them unloadable.
+    """
+    model = type(instance)
+    pk = inspect(model).primary_key
+    values = inspect(instance).identity
+
+    stmt = (
+        select(model)
+        .where(*(col == value for col, value in zip(pk, values))) #type: ignore
+        .options(*profile)
+        .execution_options(populate_existing=True)
+    )
+
+    return (await session.execute(stmt)).scalar_one()
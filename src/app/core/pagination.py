@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination.
+Every list is ordered by (sort key, uid) and a page continues strictly after the last row of the previous one,
+so pages stay stable while rows are added and a deep page costs the same as the first one on a (filters..., sort key, uid) index.
+Cursors are opaque to clients: urlsafe base64 of the keyset name and the last row's (sort key, uid).
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from src.app.core import errors
+
+
+MAX_LIMIT = 100 #Rows a single page may ask for
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """
+    A stable ordering: sort column, then uid in the same direction.
+    name is written into cursors so one list's cursor is refused by another.
+    """
+    name: str
+    column: Any
+    uid: Any
+    descending: bool = False
+
+    @property
+    def _nullable(self) -> bool:
+        return bool(getattr(self.column.expression, "nullable", False))
+
+    def order_by(self) -> tuple:
+        if self.descending:
+            return (self.column.desc(), self.uid.desc())
+        return (self.column.asc(), self.uid.asc())
+
+    def after(self, value: Any, uid: Any):
+        """Rows that come after (value, uid). Postgres sorts NULLs last ascending and first descending."""
+        if self.descending:
+            if value is None:
+                return or_(self.column.isnot(None), and_(self.column.is_(None), self.uid < uid))
+            return tuple_(self.column, self.uid) < (value, uid)
+
+        if value is None:
+            return and_(self.column.is_(None), self.uid > uid)
+        if self._nullable:
+            return or_(tuple_(self.column, self.uid) > (value, uid), self.column.is_(None))
+        return tuple_(self.column, self.uid) > (value, uid)
+
+    def encode(self, row: Any) -> str:
+        value = getattr(row, self.column.key)
+        uid = getattr(row, self.uid.key)
+
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+
+        payload = json.dumps({"k": self.name, "v": [value, str(uid)]}, default=str, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> tuple[Any, Any]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if payload["k"] != self.name:
+                raise ValueError("cursor belongs to another list")
+
+            value, uid = payload["v"]
+            return self._parse(self.column, value), self._parse(self.uid, uid)
+
+        except (ValueError, TypeError, KeyError, binascii.Error) as e:
+            raise errors.InvalidCursor() from e
+
+    @staticmethod
+    def _parse(column: Any, value: Any) -> Any:
+        if value is None:
+            return None
+
+        python_type = column.type.python_type
+        if python_type in (datetime, date):
+            return python_type.fromisoformat(value)
+        return python_type(value)
+
+
+async def paginate(
+    session: AsyncSession,
+    stmt: Any,
+    keyset: Keyset,
+    limit: int,
+    cursor: str | None = None,
+    skip: int | None = None,
+) -> dict:
+    """
+    Run one page of stmt in keyset order, returns {"items": [...], "next_cursor": str | None}.
+    skip is the old offset mode, kept for clients that have not moved to cursors yet.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    stmt = stmt.order_by(*keyset.order_by())
+
+    if cursor:
+        stmt = stmt.where(keyset.after(*keyset.decode(cursor)))
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    # one extra row tells whether there is a next page without a count
+    result = await session.execute(stmt.limit(limit + 1))
+    # a select of one model pages its instances, a column projection pages its rows
+    rows = list(result.scalars().all() if len(stmt.column_descriptions) == 1 else result.all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "items": rows,
+        "next_cursor": keyset.encode(rows[-1]) if has_more else None,
+    }
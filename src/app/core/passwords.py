@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from src.app.core import errors
+from src.app.core.settings import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool so hashing never blocks the event loop.
+    At most max_pending calls wait on the pool, past that new calls fail fast with PasswordHashingBusy
+    so a login storm degrades into quick 503s instead of stalling every request on the worker.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        # hashes made with any other cost are flagged for a rehash on their next successful verify
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+        self.pending = 0 # submitted and not finished yet, running calls included
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0 # time completed calls spent waiting for a thread
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning(f"Password hashing pool is full, refusing call: {self.stats()}")
+            raise errors.PasswordHashingBusy()
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        submitted = time.perf_counter()
+        started = None
+
+        def call():
+            nonlocal started
+            started = time.perf_counter()
+            return fn(*args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        finally:
+            self.pending -= 1
+            if started is not None:
+                self.completed += 1
+                self.wait_seconds += started - submitted
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """Verify a password, plus its new hash when the stored one was made with another cost."""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "peak_pending": self.peak_pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "average_wait_ms": round(self.wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    rounds=Config.BCRYPT_ROUNDS,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(password, hashed_password)
+
+async def verify_and_update_password(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await password_hasher.verify_and_update(password, hashed_password)
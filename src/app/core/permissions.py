@@ -2,23 +2,26 @@ from typing import List
 import uuid
 from src.app.core import errors
 from src.app.models import User, Appointment, UserRoles, AdminType, Department
+from src.app.core.principal import Principal, as_principal
 
 
 def access_grant_for_patient_appointments(
-    current_user: User, 
+    current_user: User | Principal, 
     patient_uid: uuid.UUID,
     hospital_uid: uuid.UUID
 ):
     """
     Restrict appointments visibility based on current_user, role & relationship.
     """
-    is_hospital_admin = (current_user.admin is not None and current_user.admin.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.admin.hospital_uid == hospital_uid)
+    current_user = as_principal(current_user)
+
+    is_hospital_admin = (current_user.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.hospital_uid == hospital_uid)
    
-    is_hospital = (current_user.hospital is not None and current_user.hospital.uid == hospital_uid)
+    is_hospital = (current_user.role == UserRoles.HOSPITAL and current_user.hospital_uid == hospital_uid)
 
-    is_patient = (current_user.patient is not None and current_user.patient.uid == patient_uid)
+    is_patient = (current_user.patient_uid == patient_uid)
 
-    is_practitioner = (current_user.practitioner is not None and current_user.practitioner.hospital_uid == hospital_uid)
+    is_practitioner = (current_user.practitioner_uid is not None and current_user.hospital_uid == hospital_uid)
 
     if not (is_patient or is_hospital or is_practitioner or is_hospital_admin):
         raise errors.NotAuthorized()
@@ -27,30 +30,31 @@ def access_grant_for_patient_appointments(
 
 
 def access_grant_for_hospital_appointments(
-    current_user: User, 
+    current_user: User | Principal, 
     appointments: List[Appointment]
 ) -> List[Appointment]:
     """
     Restrict appointments visibility based on current_user, role & relationship.
     """
+    current_user = as_principal(current_user)
 
-    if current_user.admin is not None and current_user.role == UserRoles.ADMIN:
+    if current_user.admin_type is not None and current_user.role == UserRoles.ADMIN:
         # Super admin.... unrestricted
-        if current_user.admin.admin_type == AdminType.SUPER_ADMIN:
+        if current_user.admin_type == AdminType.SUPER_ADMIN:
             return appointments
 
         # Hospital admin.... only appointments in their hospital
-        elif current_user.admin.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
-            return [apt for apt in appointments if apt.hospital_uid == current_user.admin.hospital_uid]
+        elif current_user.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
+            return [apt for apt in appointments if apt.hospital_uid == current_user.hospital_uid]
 
         else:
             raise errors.NotAuthorized()
 
-    elif current_user.hospital is not None and current_user.role == UserRoles.HOSPITAL:
-        return [apt for apt in appointments if apt.hospital_uid == current_user.hospital.uid]
+    elif current_user.role == UserRoles.HOSPITAL:
+        return [apt for apt in appointments if apt.hospital_uid == current_user.hospital_uid]
 
-    elif current_user.practitioner is not None and current_user.role == UserRoles.PRACTITIONER:
-        return [apt for apt in appointments if apt.practitioner_uid == current_user.practitioner.uid]
+    elif current_user.practitioner_uid is not None and current_user.role == UserRoles.PRACTITIONER:
+        return [apt for apt in appointments if apt.practitioner_uid == current_user.practitioner_uid]
 
     else:
         raise errors.NotAuthorized()
@@ -58,30 +62,31 @@ def access_grant_for_hospital_appointments(
 
 #general permission without patients
 def check_appointment_access(
-    current_user: User, 
+    current_user: User | Principal, 
     appointment: Appointment
 ) -> Appointment:
     """
     Restrict access to a single appointment based on current_user role.
     Returns the appointment if authorized, otherwise raises error.
     """
+    current_user = as_principal(current_user)
 
-    if current_user.admin is not None and current_user.role == UserRoles.ADMIN:
-        if current_user.admin.admin_type == AdminType.SUPER_ADMIN:
+    if current_user.admin_type is not None and current_user.role == UserRoles.ADMIN:
+        if current_user.admin_type == AdminType.SUPER_ADMIN:
             return appointment
         
-        elif current_user.admin.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
-            if appointment.hospital_uid == current_user.admin.hospital_uid:
+        elif current_user.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
+            if appointment.hospital_uid == current_user.hospital_uid:
                 return appointment
             raise errors.NotAuthorized()
 
-    elif current_user.hospital is not None and current_user.role == UserRoles.HOSPITAL:
-        if appointment.hospital_uid == current_user.hospital.uid:
+    elif current_user.role == UserRoles.HOSPITAL:
+        if appointment.hospital_uid == current_user.hospital_uid:
             return appointment
         raise errors.NotAuthorized()
 
-    elif current_user.practitioner is not None and current_user.role == UserRoles.PRACTITIONER:
-        if appointment.practitioner_uid == current_user.practitioner.uid:
+    elif current_user.practitioner_uid is not None and current_user.role == UserRoles.PRACTITIONER:
+        if appointment.practitioner_uid == current_user.practitioner_uid:
             return appointment
         raise errors.NotAuthorized()
 
@@ -90,30 +95,32 @@ def check_appointment_access(
 
 #permission access for appointment reschedule endpoint
 def appointment_reschedule_access(
-    current_user: User, 
+    current_user: User | Principal, 
     appointment: Appointment
 ) -> Appointment:
     """
     Restrict access to a single appointment based on current_user role.
     Returns the appointment if authorized, otherwise raises error.
     """
-    if  current_user.patient is not None and current_user.uid == current_user.patient.user_uid:
+    current_user = as_principal(current_user)
+
+    if current_user.patient_uid is not None:
         return appointment
         raise errors.NotAuthorized()
 
-    elif current_user.admin is not None and current_user.role == UserRoles.ADMIN:
-        if current_user.admin.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
-            if appointment.hospital_uid == current_user.admin.hospital_uid:
+    elif current_user.admin_type is not None and current_user.role == UserRoles.ADMIN:
+        if current_user.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
+            if appointment.hospital_uid == current_user.hospital_uid:
                 return appointment
         raise errors.NotAuthorized()
 
-    elif current_user.hospital is not None and current_user.role == UserRoles.HOSPITAL:
-        if appointment.hospital_uid == current_user.hospital.uid:
+    elif current_user.role == UserRoles.HOSPITAL:
+        if appointment.hospital_uid == current_user.hospital_uid:
             return appointment
         raise errors.NotAuthorized()
 
-    elif current_user.practitioner is not None and current_user.role == UserRoles.PRACTITIONER:
-        if appointment.practitioner_uid == current_user.practitioner.uid:
+    elif current_user.practitioner_uid is not None and current_user.role == UserRoles.PRACTITIONER:
+        if appointment.practitioner_uid == current_user.practitioner_uid:
             return appointment
         raise errors.NotAuthorized()
 
@@ -124,35 +131,36 @@ def appointment_reschedule_access(
 
 #general permission with patient
 def general_access(
-    current_user: User, 
+    current_user: User | Principal, 
     appointment: Appointment
 ) -> Appointment:
     """
     Restrict access to a single appointment based on current_user role.
     Returns the appointment if authorized, otherwise raises error.
     """
+    current_user = as_principal(current_user)
 
-    if current_user.admin is not None and current_user.role == UserRoles.ADMIN:
-        if current_user.admin.admin_type == AdminType.SUPER_ADMIN:
+    if current_user.admin_type is not None and current_user.role == UserRoles.ADMIN:
+        if current_user.admin_type == AdminType.SUPER_ADMIN:
             return appointment
         
-        elif current_user.admin.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
-            if appointment.hospital_uid == current_user.admin.hospital_uid:
+        elif current_user.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
+            if appointment.hospital_uid == current_user.hospital_uid:
                 return appointment
             raise errors.NotAuthorized()
 
     elif current_user.role == UserRoles.HOSPITAL:
-        if current_user.hospital is not None and appointment.hospital_uid == current_user.hospital.uid:
+        if current_user.hospital_uid is not None and appointment.hospital_uid == current_user.hospital_uid:
             return appointment
         raise errors.NotAuthorized()
 
     elif current_user.role == UserRoles.PRACTITIONER:
-        if current_user.practitioner is not None and appointment.practitioner_uid == current_user.practitioner.uid:
+        if current_user.practitioner_uid is not None and appointment.practitioner_uid == current_user.practitioner_uid:
             return appointment
         raise errors.NotAuthorized()
     
     elif current_user.role == UserRoles.PATIENT:
-        if current_user.patient is not None and appointment.patient_uid == current_user.patient.uid:
+        if current_user.patient_uid is not None and appointment.patient_uid == current_user.patient_uid:
             return appointment
         raise errors.NotAuthorized()
 
@@ -161,41 +169,42 @@ def general_access(
 
 #general access
 def general_access_list(
-    current_user: User,
+    current_user: User | Principal,
     appointments: List[Appointment]
 ) -> List[Appointment]:
     """
     Restrict appointments visibility based on current_user, role & relationship.
     """
+    current_user = as_principal(current_user)
 
-    if current_user.admin is not None and current_user.role == UserRoles.ADMIN:
+    if current_user.admin_type is not None and current_user.role == UserRoles.ADMIN:
         # Super admin.... unrestricted
-        if current_user.admin.admin_type == AdminType.SUPER_ADMIN:
+        if current_user.admin_type == AdminType.SUPER_ADMIN:
             return appointments
 
         # Hospital admin.... only appointments in their hospital
-        elif current_user.admin.admin_type == AdminType.HOSPITAL_ADMIN:
-            if not current_user.admin.hospital:
+        elif current_user.admin_type == AdminType.HOSPITAL_ADMIN:
+            if current_user.hospital_uid is None:
                 raise errors.NotAuthorized()
-            return [apt for apt in appointments if apt.hospital_uid == current_user.admin.hospital_uid]
+            return [apt for apt in appointments if apt.hospital_uid == current_user.hospital_uid]
 
         else:
             raise errors.NotAuthorized()
 
     elif current_user.role == UserRoles.HOSPITAL:
-        if not current_user.hospital:
+        if current_user.hospital_uid is None:
             raise errors.NotAuthorized()
-        return [apt for apt in appointments if apt.hospital_uid == current_user.hospital.uid]
+        return [apt for apt in appointments if apt.hospital_uid == current_user.hospital_uid]
 
     elif current_user.role == UserRoles.PRACTITIONER:
-        if not current_user.practitioner:
+        if current_user.practitioner_uid is None:
             raise errors.NotAuthorized()
-        return [apt for apt in appointments if apt.practitioner_uid == current_user.practitioner.uid]
+        return [apt for apt in appointments if apt.practitioner_uid == current_user.practitioner_uid]
 
     elif current_user.role == UserRoles.PATIENT:
-        if not current_user.patient:
+        if current_user.patient_uid is None:
             raise errors.NotAuthorized()
-        return [apt for apt in appointments if apt.patient_uid == current_user.patient.uid]
+        return [apt for apt in appointments if apt.patient_uid == current_user.patient_uid]
 
     else:
         raise errors.NotAuthorized()
@@ -203,17 +212,18 @@ def general_access_list(
 
 
 #assign practitioner permission
-def practitioner_assign_access(current_user: User, appointment: Appointment) -> Appointment:
+def practitioner_assign_access(current_user: User | Principal, appointment: Appointment) -> Appointment:
     """
     Restrict access to a single appointment based on current_user role.
     Returns the appointment if authorized, otherwise raises error.
     """
+    current_user = as_principal(current_user)
     
-    is_hospital_admin = (current_user.admin is not None and current_user.admin.hospital_uid == appointment.hospital_uid)
+    is_hospital_admin = (current_user.admin_type is not None and current_user.hospital_uid == appointment.hospital_uid)
 
-    is_hospital = (current_user.hospital is not None and current_user.hospital.uid == appointment.hospital_uid)
+    is_hospital = (current_user.role == UserRoles.HOSPITAL and current_user.hospital_uid == appointment.hospital_uid)
 
-    is_admin = (current_user.admin is not None and current_user.admin.admin_type == AdminType.SUPER_ADMIN)
+    is_admin = (current_user.admin_type == AdminType.SUPER_ADMIN)
         
     if not (is_hospital or is_hospital_admin or is_admin):
         raise errors.NotAuthorized()
@@ -224,62 +234,65 @@ def practitioner_assign_access(current_user: User, appointment: Appointment) ->
 #   PERMISSIONS FOR DEPARTMENT ENDPOINTS
 #
 
-def check_department_permission(current_user: User, hospital_uid: uuid.UUID):
+def check_department_permission(current_user: User | Principal, hospital_uid: uuid.UUID):
+    current_user = as_principal(current_user)
 
     # Hospital owner
     if (
         current_user.role == UserRoles.HOSPITAL
-        and current_user.hospital
-        and current_user.hospital.uid == hospital_uid
+        and current_user.hospital_uid is not None
+        and current_user.hospital_uid == hospital_uid
     ):
         return
 
     # Hospital/Department admins
     if (
-        current_user.admin is not None
-        and current_user.admin.admin_type in {
+        current_user.admin_type in {
             AdminType.HOSPITAL_ADMIN,
             AdminType.DEPARTMENT_ADMIN,
         }
-        and current_user.admin.hospital_uid == hospital_uid
+        and current_user.hospital_uid == hospital_uid
     ):
         return
 
     raise errors.NotAuthorized()
 
 
-def list_department_permission(current_user: User, departments: List[Department]):
+def list_department_permission(current_user: User | Principal, departments: List[Department]):
+    current_user = as_principal(current_user)
+
     if current_user.role == UserRoles.PATIENT:
         return  # patients can see all
 
-    if current_user.admin is not None and current_user.role == UserRoles.ADMIN:
-        if current_user.admin.admin_type == AdminType.SUPER_ADMIN:
+    if current_user.admin_type is not None and current_user.role == UserRoles.ADMIN:
+        if current_user.admin_type == AdminType.SUPER_ADMIN:
             return  # super admins see all
-        elif current_user.admin.admin_type == AdminType.HOSPITAL_ADMIN:
+        elif current_user.admin_type == AdminType.HOSPITAL_ADMIN:
             # hospital admin sees only their hospital’s departments
-            if all(dpt.hospital_uid == current_user.admin.hospital_uid for dpt in departments):
+            if all(dpt.hospital_uid == current_user.hospital_uid for dpt in departments):
                 return
             raise errors.NotAuthorized()
 
     if current_user.role == UserRoles.HOSPITAL:
-        if current_user.hospital is not None and  all(dpt.hospital_uid == current_user.hospital.uid for dpt in departments):
+        if current_user.hospital_uid is not None and all(dpt.hospital_uid == current_user.hospital_uid for dpt in departments):
             return
         raise errors.NotAuthorized()
 
     raise errors.NotAuthorized()
 
 
-def get_department_permission(current_user: User, department: Department):
+def get_department_permission(current_user: User | Principal, department: Department):
+    current_user = as_principal(current_user)
   
-    if current_user.admin is not None and current_user.role == UserRoles.ADMIN:
-        if current_user.admin.admin_type == AdminType.SUPER_ADMIN:
+    if current_user.admin_type is not None and current_user.role == UserRoles.ADMIN:
+        if current_user.admin_type == AdminType.SUPER_ADMIN:
             return
-        elif current_user.admin.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
-            if current_user.admin.hospital_uid == department.hospital_uid:
+        elif current_user.admin_type in {AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN}:
+            if current_user.hospital_uid == department.hospital_uid:
                 return
             raise errors.NotAuthorized()
     elif current_user.role == UserRoles.HOSPITAL:
-        if current_user.hospital is not None and current_user.hospital.uid == department.hospital_uid:
+        if current_user.hospital_uid is not None and current_user.hospital_uid == department.hospital_uid:
             return
         raise errors.NotAuthorized()
     
@@ -289,21 +302,23 @@ def get_department_permission(current_user: User, department: Department):
     raise errors.NotAuthorized()
 
 
-def update_department_permission(current_user: User, department: Department):
+def update_department_permission(current_user: User | Principal, department: Department):
+    current_user = as_principal(current_user)
+
     # Only Admins or Hospital-level users can access
     if current_user.role not in {UserRoles.ADMIN, UserRoles.HOSPITAL}:
         raise errors.NotAuthorized()
 
     # If user has an admin account, check admin type
-    if current_user.admin:
-        if current_user.admin.admin_type in {AdminType.DEPARTMENT_ADMIN, AdminType.HOSPITAL_ADMIN}:
-            if current_user.admin.hospital_uid == department.hospital_uid:
+    if current_user.admin_type is not None:
+        if current_user.admin_type in {AdminType.DEPARTMENT_ADMIN, AdminType.HOSPITAL_ADMIN}:
+            if current_user.hospital_uid == department.hospital_uid:
                 return
         raise errors.NotAuthorized()
 
     # If user is a hospital-level user (not an admin)
     if current_user.role == UserRoles.HOSPITAL:
-        if current_user.hospital and current_user.hospital.uid == department.hospital_uid:
+        if current_user.hospital_uid is not None and current_user.hospital_uid == department.hospital_uid:
             return
 
     # Otherwise deny access
@@ -313,66 +328,69 @@ def update_department_permission(current_user: User, department: Department):
 
 # PERMISSIONS FOR MEDICAL RECORDS ENDPOINTS
 
-def can_access_medical_record_role(current_user: User, hospital_uid: uuid.UUID):
+def can_access_medical_record_role(current_user: User | Principal, hospital_uid: uuid.UUID):
     """
     this permission is to enable the hospital and it's admins and maybe the practitioner to update the records
     """
+    current_user = as_principal(current_user)
 
-    is_hospital_admin = (current_user.admin is not None and current_user.admin.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.admin.hospital_uid == hospital_uid)
+    is_hospital_admin = (current_user.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.hospital_uid == hospital_uid)
    
-    is_hospital = (current_user.hospital is not None and current_user.hospital.uid == hospital_uid)
+    is_hospital = (current_user.role == UserRoles.HOSPITAL and current_user.hospital_uid == hospital_uid)
 
 
-    is_practitioner = (current_user.practitioner is not None and current_user.practitioner.hospital_uid == hospital_uid)
+    is_practitioner = (current_user.practitioner_uid is not None and current_user.hospital_uid == hospital_uid)
 
     if not (is_hospital or is_practitioner or is_hospital_admin):
         raise errors.NotAuthorized()
     return True
 
-def can_create_medical_record_for_appointment(current_user: User, appointment: Appointment):
+def can_create_medical_record_for_appointment(current_user: User | Principal, appointment: Appointment):
     """
     Fine-grained permission check.
     Ensures the user is authorized to create a record for the given appointment.
     """
+    current_user = as_principal(current_user)
 
     # Practitioner can only create record for their own appointment
-    if current_user.practitioner is not None and current_user.role == UserRoles.PRACTITIONER:
-        if current_user.practitioner.uid != appointment.practitioner_uid:
+    if current_user.practitioner_uid is not None and current_user.role == UserRoles.PRACTITIONER:
+        if current_user.practitioner_uid != appointment.practitioner_uid:
             raise errors.NotAuthorized()
 
     # Hospital admin can only create for their hospital
     if (
-        current_user.admin is not None and current_user.role == UserRoles.ADMIN
-        and current_user.admin.admin_type == AdminType.HOSPITAL_ADMIN
+        current_user.admin_type is not None and current_user.role == UserRoles.ADMIN
+        and current_user.admin_type == AdminType.HOSPITAL_ADMIN
     ):
-        if current_user.admin.hospital_uid != appointment.hospital_uid:
+        if current_user.hospital_uid != appointment.hospital_uid:
             raise errors.NotAuthorized()
         
-    if current_user.hospital is not None and current_user.role == UserRoles.HOSPITAL:
-        if current_user.hospital.uid != appointment.hospital_uid:
+    if current_user.role == UserRoles.HOSPITAL:
+        if current_user.hospital_uid != appointment.hospital_uid:
             raise errors.NotAuthorized()
 
     # Department admin can only create for their department
     if (
-        current_user.admin is not None and current_user.role == UserRoles.ADMIN
-        and current_user.admin.admin_type == AdminType.DEPARTMENT_ADMIN
+        current_user.admin_type is not None and current_user.role == UserRoles.ADMIN
+        and current_user.admin_type == AdminType.DEPARTMENT_ADMIN
     ):
-        if current_user.admin.department_uid != appointment.department_uid:
+        if current_user.department_uid != appointment.department_uid:
             raise errors.NotAuthorized()
 
     return True
 
 
-def get_hospital_medical_record_access(current_user: User, hospital_id: uuid.UUID):
+def get_hospital_medical_record_access(current_user: User | Principal, hospital_id: uuid.UUID):
     """
     Basic role check to ensure the user is allowed to access medical records.
     This should run BEFORE fetching any medical record.
     Only Hospital Admins are allowed.
     """
+    current_user = as_principal(current_user)
 
-    is_hospital_admin = (current_user.admin is not None and current_user.admin.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.admin.hospital_uid == hospital_id)
+    is_hospital_admin = (current_user.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.hospital_uid == hospital_id)
    
-    is_hospital = (current_user.hospital is not None and current_user.hospital.uid == hospital_id)
+    is_hospital = (current_user.role == UserRoles.HOSPITAL and current_user.hospital_uid == hospital_id)
 
     if not (is_hospital_admin or is_hospital):
         raise errors.NotAuthorized()
@@ -380,14 +398,15 @@ def get_hospital_medical_record_access(current_user: User, hospital_id: uuid.UUI
     return True
 
 
-def can_access_medical_records(current_user: User, hospital_uid: uuid.UUID):
+def can_access_medical_records(current_user: User | Principal, hospital_uid: uuid.UUID):
     """
     Ensures that only Hospital Admins can access medical records.
     """
+    current_user = as_principal(current_user)
 
-    is_hospital_admin = (current_user.admin is not None and current_user.admin.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.admin.hospital_uid == hospital_uid)
+    is_hospital_admin = (current_user.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.hospital_uid == hospital_uid)
 
-    is_hospital = (current_user.hospital is not None and current_user.hospital.uid == hospital_uid)
+    is_hospital = (current_user.role == UserRoles.HOSPITAL and current_user.hospital_uid == hospital_uid)
     
     if not (is_hospital or is_hospital_admin):
         raise errors.NotAuthorized()
@@ -397,52 +416,56 @@ def can_access_medical_records(current_user: User, hospital_uid: uuid.UUID):
 
 
 def can_access_patient_medical_records(
-    current_user: User,
+    current_user: User | Principal,
     patient_id: uuid.UUID,
     hospital_id: uuid.UUID,
 ):
+    current_user = as_principal(current_user)
+
     # print("Current Hospital UID:", current_user.hospital.uid)
     # print("Hospital ID:", hospital_id)
     # print(type(current_user.hospital.uid))
     # print(type(hospital_id))
 
-    is_hospital_admin = (current_user.admin is not None and current_user.admin.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.admin.hospital_uid == hospital_id)
+    is_hospital_admin = (current_user.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.hospital_uid == hospital_id)
    
-    is_hospital = (current_user.hospital is not None and current_user.hospital.uid == hospital_id)
+    is_hospital = (current_user.role == UserRoles.HOSPITAL and current_user.hospital_uid == hospital_id)
 
-    is_patient = (current_user.patient is not None and current_user.patient.uid == patient_id)
+    is_patient = (current_user.patient_uid == patient_id)
 
-    is_practitioner = (current_user.practitioner is not None and current_user.practitioner.hospital_uid == hospital_id)
+    is_practitioner = (current_user.practitioner_uid is not None and current_user.hospital_uid == hospital_id)
 
     if not (is_patient or is_hospital or is_practitioner or is_hospital_admin):
         raise errors.NotAuthorized()
     return True
 
-def can_update_medical_record(current_user: User, hospital_uid: uuid.UUID):
+def can_update_medical_record(current_user: User | Principal, hospital_uid: uuid.UUID):
     """
     Permission check to ensure the hospitals, its admins, practitioners can update a medical record. Super Admins are not allowed.
     """
+    current_user = as_principal(current_user)
 
-    is_hospital_admin = (current_user.admin is not None and current_user.admin.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.admin.hospital_uid == hospital_uid)
+    is_hospital_admin = (current_user.admin_type in [AdminType.HOSPITAL_ADMIN, AdminType.DEPARTMENT_ADMIN] and current_user.hospital_uid == hospital_uid)
    
-    is_hospital = (current_user.hospital is not None and current_user.hospital.uid == hospital_uid)
+    is_hospital = (current_user.role == UserRoles.HOSPITAL and current_user.hospital_uid == hospital_uid)
 
-    is_practitioner = (current_user.practitioner is not None and current_user.practitioner.hospital_uid == hospital_uid)
+    is_practitioner = (current_user.practitioner_uid is not None and current_user.hospital_uid == hospital_uid)
 
     if not ( is_hospital or is_practitioner or is_hospital_admin):
         raise errors.NotAuthorized()
     
     return True
 
-def accessible_to_super_admin(current_user: User):
+def accessible_to_super_admin(current_user: User | Principal):
     """
     Ensure the current user is a super admin.
     """
+    current_user = as_principal(current_user)
 
     if current_user.role != UserRoles.ADMIN:
         raise errors.NotAuthorized()
 
-    if current_user.admin is not None and current_user.admin.admin_type != AdminType.SUPER_ADMIN:
+    if current_user.admin_type is not None and current_user.admin_type != AdminType.SUPER_ADMIN:
         raise errors.NotAuthorized()
 
     return True
\ No newline at end of file
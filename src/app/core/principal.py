@@ -0,0 +1,295 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from src.app.models import User, Admin, Hospital, Patient, Practitioner, UserRoles, AdminType
+from src.app.core import redis
+
+
+logger = logging.getLogger(__name__)
+
+PRINCIPAL_LOCAL_TTL = 30 #Time in secs a worker trusts its own copy before asking redis again
+PRINCIPAL_LOCAL_MAX = 10_000 #Principals a worker keeps in memory, the least recently used go first
+PRINCIPAL_CACHE_TTL = 300 #Time in secs a principal lives in redis
+LISTENER_RETRY_DELAY = 5 #Time in secs before the invalidation listener reconnects to redis
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Compact, immutable view of the authenticated user.
+    Holds only the identifiers the permission layer needs, so no ORM relationship is touched.
+    """
+    uid: uuid.UUID
+    username: str
+    email: str
+    role: UserRoles
+    is_active: bool
+    admin_type: Optional[AdminType] = None
+    hospital_uid: Optional[uuid.UUID] = None
+    department_uid: Optional[uuid.UUID] = None
+    patient_uid: Optional[uuid.UUID] = None
+    practitioner_uid: Optional[uuid.UUID] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        """Build a principal from an already loaded ORM user."""
+        hospital_uid = None
+        department_uid = None
+
+        if user.admin is not None:
+            hospital_uid = user.admin.hospital_uid
+            department_uid = user.admin.department_uid
+        elif user.hospital is not None:
+            hospital_uid = user.hospital.uid
+        elif user.practitioner is not None:
+            hospital_uid = user.practitioner.hospital_uid
+            department_uid = user.practitioner.department_uid
+
+        return cls(
+            uid=user.uid,
+            username=user.username,
+            email=user.email,
+            role=UserRoles(user.role),
+            is_active=user.is_active,
+            admin_type=user.admin.admin_type if user.admin is not None else None,
+            hospital_uid=hospital_uid,
+            department_uid=department_uid,
+            patient_uid=user.patient.uid if user.patient is not None else None,
+            practitioner_uid=user.practitioner.uid if user.practitioner is not None else None,
+        )
+
+    @property
+    def owned_hospital_uid(self) -> Optional[uuid.UUID]:
+        """Hospital owned by this account, only set for hospital users."""
+        if self.role != UserRoles.HOSPITAL:
+            return None
+        return self.hospital_uid
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=str)
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "Principal":
+        data = json.loads(raw)
+
+        def as_uuid(value):
+            return uuid.UUID(value) if value else None
+
+        return cls(
+            uid=uuid.UUID(data["uid"]),
+            username=data["username"],
+            email=data["email"],
+            role=UserRoles(data["role"]),
+            is_active=data["is_active"],
+            admin_type=AdminType(data["admin_type"]) if data.get("admin_type") else None,
+            hospital_uid=as_uuid(data.get("hospital_uid")),
+            department_uid=as_uuid(data.get("department_uid")),
+            patient_uid=as_uuid(data.get("patient_uid")),
+            practitioner_uid=as_uuid(data.get("practitioner_uid")),
+        )
+
+
+def as_principal(current_user: User | Principal) -> Principal:
+    """Permission helpers accept either a principal or an ORM user."""
+    if isinstance(current_user, Principal):
+        return current_user
+    return Principal.from_user(current_user)
+
+
+class PrincipalCache:
+    """
+    A worker's in-memory copy of recently used principals, bounded and least recently used first out.
+    invalidate_principal publishes the user uid and every worker drops its copy, so the copies are only
+    trusted while the pub/sub listener is connected, otherwise every lookup goes to redis.
+    """
+
+    def __init__(self, ttl: int = PRINCIPAL_LOCAL_TTL, max_size: int = PRINCIPAL_LOCAL_MAX):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.ready = False
+        # { user_uid: (expires_at, principal) }
+        self._entries: OrderedDict[str, tuple[float, Principal]] = OrderedDict()
+        self._task: asyncio.Task | None = None
+
+    def get(self, user_uid: str) -> Principal | None:
+        if not self.ready:
+            return None
+
+        cached = self._entries.get(user_uid)
+        if cached is None:
+            return None
+
+        if cached[0] <= time.monotonic():
+            del self._entries[user_uid]
+            return None
+
+        self._entries.move_to_end(user_uid)
+        return cached[1]
+
+    def put(self, principal: Principal):
+        if not self.ready:
+            return
+
+        user_uid = str(principal.uid)
+        self._entries[user_uid] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(user_uid)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, user_uid: str):
+        self._entries.pop(user_uid, None)
+
+    async def _listen(self):
+        while True:
+            pubsub = redis.verify_client.pubsub()
+            try:
+                await pubsub.subscribe(redis.PRINCIPAL_INVALIDATIONS_CHANNEL)
+                # whatever was invalidated while we were not listening is unknown, start over
+                self._entries.clear()
+                self.ready = True
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+
+                    self.discard(message["data"].decode())
+
+            except asyncio.CancelledError:
+                raise
+            except RedisError as e:
+                logger.warning(f"Principal invalidation listener lost redis: {e}")
+            finally:
+                self.ready = False
+                self._entries.clear()
+                await pubsub.aclose()
+
+            await asyncio.sleep(LISTENER_RETRY_DELAY)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+local_principals = PrincipalCache()
+
+
+async def load_principal(session: AsyncSession, user_uid: uuid.UUID | None = None, email: str | None = None) -> Principal | None:
+    """Resolve a principal with one flat query over the user and its profile tables."""
+
+    stmt = (
+        select(
+            User.uid,
+            User.username,
+            User.email,
+            User.role,
+            User.is_active,
+            Admin.admin_type,
+            Admin.hospital_uid.label("admin_hospital_uid"), #type: ignore
+            Admin.department_uid.label("admin_department_uid"), #type: ignore
+            Hospital.uid.label("hospital_uid"), #type: ignore
+            Patient.uid.label("patient_uid"), #type: ignore
+            Practitioner.uid.label("practitioner_uid"), #type: ignore
+            Practitioner.hospital_uid.label("practitioner_hospital_uid"), #type: ignore
+            Practitioner.department_uid.label("practitioner_department_uid"), #type: ignore
+        )
+        .outerjoin(Admin, Admin.user_uid == User.uid) #type: ignore
+        .outerjoin(Hospital, Hospital.user_uid == User.uid) #type: ignore
+        .outerjoin(Patient, Patient.user_uid == User.uid) #type: ignore
+        .outerjoin(Practitioner, Practitioner.user_uid == User.uid) #type: ignore
+    )
+
+    if user_uid is not None:
+        stmt = stmt.where(User.uid == user_uid)
+    elif email is not None:
+        stmt = stmt.where(User.email == email)
+    else:
+        return None
+
+    row = (await session.execute(stmt.limit(1))).first()
+
+    if row is None:
+        return None
+
+    return Principal(
+        uid=row.uid,
+        username=row.username,
+        email=row.email,
+        role=UserRoles(row.role),
+        is_active=row.is_active,
+        admin_type=row.admin_type,
+        hospital_uid=row.admin_hospital_uid or row.hospital_uid or row.practitioner_hospital_uid,
+        department_uid=row.admin_department_uid or row.practitioner_department_uid,
+        patient_uid=row.patient_uid,
+        practitioner_uid=row.practitioner_uid,
+    )
+
+
+async def get_principal(user_data: dict, session: AsyncSession) -> Principal | None:
+    """
+    Return the principal for the user embedded in a token.
+    Lookup order: worker memory -> redis -> database.
+    """
+    user_uid = user_data.get("user_uid")
+
+    if user_uid:
+        cached = local_principals.get(user_uid)
+        if cached is not None:
+            return cached
+
+        try:
+            raw = await redis.get_principal(user_uid)
+        except RedisError:
+            raw = None
+
+        if raw:
+            principal = Principal.from_json(raw)
+            local_principals.put(principal)
+            return principal
+
+        principal = await load_principal(session, user_uid=uuid.UUID(user_uid))
+    else:
+        # tokens issued before user_uid was part of the payload
+        principal = await load_principal(session, email=user_data.get("email"))
+
+    if principal is None:
+        return None
+
+    local_principals.put(principal)
+
+    try:
+        await redis.save_principal(str(principal.uid), principal.to_json(), expiry=PRINCIPAL_CACHE_TTL)
+    except RedisError:
+        pass
+
+    return principal
+
+
+async def invalidate_principal(user_uid: uuid.UUID | str | None):
+    """Drop the cached principal after a profile or role change, on this worker, in redis and on every other worker."""
+    if user_uid is None:
+        return
+
+    local_principals.discard(str(user_uid))
+
+    try:
+        await redis.delete_principal(str(user_uid))
+    except RedisError:
+        pass
@@ -1,3 +1,4 @@
+import json
 import redis.asyncio as redis
 from src.app.core.settings import Config
 
@@ -18,4 +19,168 @@ async def get_email_verification_token(email: str) -> str | None:
 async def delete_email_verification_token(email: str) -> None:
     """Deletes the verification token after successful verification."""
     redis_key = f"verify:{email}"
-    await verify_client.delete(redis_key)
\ No newline at end of file
+    await verify_client.delete(redis_key)
+
+# --- Auth principal cache methods ---
+async def save_principal(user_uid: str, principal: str, expiry: int = 300) -> None:
+    """Caches the serialized auth principal of a user (default 5mins)."""
+    redis_key = f"principal:{user_uid}"
+    await verify_client.set(redis_key, principal, ex=expiry)
+
+async def get_principal(user_uid: str) -> bytes | None:
+    """Retrieves the cached auth principal of a user, if it exists."""
+    redis_key = f"principal:{user_uid}"
+    return await verify_client.get(redis_key)
+
+PRINCIPAL_INVALIDATIONS_CHANNEL = "principal_invalidations"
+
+async def delete_principal(user_uid: str) -> None:
+    """Deletes the cached auth principal after a profile or role change, then tells every worker to drop its copy."""
+    redis_key = f"principal:{user_uid}"
+    await verify_client.delete(redis_key)
+    await verify_client.publish(PRINCIPAL_INVALIDATIONS_CHANNEL, user_uid)
+
+# --- Token revocation methods ---
+REVOKED_TOKENS_CHANNEL = "revoked_tokens"
+
+async def save_revoked_token(jti: str, expiry: int) -> None:
+    """Marks a token as revoked until it would have expired anyway, then tells every worker."""
+    redis_key = f"revoked:{jti}"
+    await verify_client.set(redis_key, 1, ex=max(expiry, 1))
+    await verify_client.publish(REVOKED_TOKENS_CHANNEL, jti)
+
+async def is_token_revoked(jti: str) -> bool:
+    """Checks whether a token jti has been revoked."""
+    redis_key = f"revoked:{jti}"
+    return bool(await verify_client.exists(redis_key))
+
+async def get_revoked_tokens():
+    """Iterates over the jti of every token that is still revoked."""
+    async for key in verify_client.scan_iter(match="revoked:*", count=1000):
+        yield key.decode().split(":", 1)[1]
+
+# --- Websocket backplane methods ---
+WS_CHANNEL_PREFIX = "ws"
+
+def ws_channel(channel: str, room_id: str) -> str:
+    """Redis channel a websocket room is broadcast on."""
+    return f"{WS_CHANNEL_PREFIX}:{channel}:{room_id}"
+
+def parse_ws_channel(redis_channel: bytes | str) -> tuple[str, str]:
+    """Splits a redis channel back into (channel, room_id)."""
+    if isinstance(redis_channel, bytes):
+        redis_channel = redis_channel.decode()
+    _, channel, room_id = redis_channel.split(":", 2)
+    return channel, room_id
+
+async def publish_ws_message(channel: str, room_id: str, payload: str) -> None:
+    """Publishes a serialized websocket message to every worker holding sockets in the room."""
+    await verify_client.publish(ws_channel(channel, room_id), payload)
+
+# --- Queue board sequence methods ---
+async def get_queue_seq(hospital_uid: str) -> int:
+    """Returns the sequence number of the last queue board event sent for a hospital."""
+    redis_key = f"queue_seq:{hospital_uid}"
+    value = await verify_client.get(redis_key)
+    return int(value) if value else 0
+
+async def next_queue_seq(hospital_uid: str, count: int = 1) -> int:
+    """Reserves the next `count` queue board sequence numbers of a hospital and returns the last one."""
+    redis_key = f"queue_seq:{hospital_uid}"
+    return await verify_client.incrby(redis_key, count)
+
+# --- Queue number methods ---
+QUEUE_NUMBER_TTL = 2 * 86400 #Counters outlive their service day by a day, then expire
+
+# max(counter, floor) + 1, so a counter that fell behind the database catches up in the same step
+_next_queue_number = verify_client.register_script("""
+local number = math.max(tonumber(redis.call('GET', KEYS[1]) or '0'), tonumber(ARGV[1])) + 1
+redis.call('SET', KEYS[1], number, 'EX', ARGV[2])
+return number
+""")
+
+async def next_queue_number(queue_uid: str, service_day: str, floor: int = 0) -> int:
+    """Hands out the next number of a queue for a service day, never at or below `floor`."""
+    redis_key = f"queue_number:{queue_uid}:{service_day}"
+    return int(await _next_queue_number(keys=[redis_key], args=[floor, QUEUE_NUMBER_TTL]))
+
+# --- Live queue methods ---
+# every (queue, service day) keeps two sorted sets of entry uids scored by queue number:
+# "waiting" for waiting entries and "called" for called or serving ones
+LIVE_QUEUE_LANES = ("waiting", "called")
+
+def _live_queue_key(queue_uid: str, service_day: str, lane: str) -> str:
+    return f"queue_live:{queue_uid}:{service_day}:{lane}"
+
+async def place_live_queue_entry(queue_uid: str, service_day: str, entry_uid: str, queue_number: int, lane: str | None) -> None:
+    """Moves an entry into one lane of its queue day, or out of the live state when lane is None."""
+    async with verify_client.pipeline(transaction=True) as pipe:
+        for name in LIVE_QUEUE_LANES:
+            redis_key = _live_queue_key(queue_uid, service_day, name)
+            if name == lane:
+                pipe.zadd(redis_key, {entry_uid: queue_number})
+            else:
+                pipe.zrem(redis_key, entry_uid)
+            pipe.expire(redis_key, QUEUE_NUMBER_TTL)
+        await pipe.execute()
+
+async def replace_live_queue(queue_uid: str, service_day: str, entries: dict[str, dict[str, int]]) -> None:
+    """Swaps the live state of a queue day for {lane: {entry_uid: queue_number}} in one transaction."""
+    async with verify_client.pipeline(transaction=True) as pipe:
+        for name in LIVE_QUEUE_LANES:
+            redis_key = _live_queue_key(queue_uid, service_day, name)
+            pipe.delete(redis_key)
+            if entries.get(name):
+                pipe.zadd(redis_key, entries[name])
+                pipe.expire(redis_key, QUEUE_NUMBER_TTL)
+        await pipe.execute()
+
+async def get_live_queue_position(queue_uid: str, service_day: str, entry_uid: str, queue_number: int, lane: str) -> tuple[bool, int, int | None]:
+    """
+    Returns (tracked, patients_ahead, now_serving) for an entry, each in O(log n).
+    tracked is False when the entry is missing from its lane, i.e. the live state needs a rebuild.
+    """
+    waiting = _live_queue_key(queue_uid, service_day, "waiting")
+    called = _live_queue_key(queue_uid, service_day, "called")
+
+    async with verify_client.pipeline(transaction=False) as pipe:
+        pipe.zscore(_live_queue_key(queue_uid, service_day, lane), entry_uid)
+        pipe.zcount(waiting, "-inf", f"({queue_number}")
+        pipe.zrange(called, 0, 0, desc=True, withscores=True)
+        score, ahead, serving = await pipe.execute()
+
+    return score is not None, ahead, int(serving[0][1]) if serving else None
+
+# --- Scheduler leader lease ---
+# a lease is only renewed or released by the token that holds it
+_renew_lease = verify_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""")
+
+_release_lease = verify_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+async def acquire_lease(key: str, token: str, ttl: int) -> bool:
+    """Takes the lease for `ttl` seconds if nobody holds it."""
+    return bool(await verify_client.set(key, token, nx=True, px=ttl * 1000))
+
+async def renew_lease(key: str, token: str, ttl: int) -> bool:
+    """Extends the lease for another `ttl` seconds, False when `token` no longer holds it."""
+    return bool(await _renew_lease(keys=[key], args=[token, ttl * 1000]))
+
+async def release_lease(key: str, token: str) -> None:
+    await _release_lease(keys=[key], args=[token])
+
+# --- Email worker metrics ---
+EMAIL_METRICS_KEY = "email_metrics:batches" # written by the Celery email worker, newest first
+
+async def get_email_batch_metrics(limit: int = 50) -> list[dict]:
+    """The most recent per-batch metrics the email worker recorded."""
+    return [json.loads(item) for item in await verify_client.lrange(EMAIL_METRICS_KEY, 0, limit - 1)]
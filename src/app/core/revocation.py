@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime, timezone
+from redis.exceptions import RedisError
+from src.app.core import redis
+from src.app.core.settings import Config
+
+
+logger = logging.getLogger(__name__)
+
+BLOOM_CAPACITY = 100_000 #Revoked tokens the filter is sized for at least, it is rebuilt larger once it fills up
+BLOOM_ERROR_RATE = 0.01
+LISTENER_RETRY_DELAY = 5 #Time in secs before the listener reconnects to redis
+
+
+class BloomFilter:
+    """
+    Small in-process bloom filter over revoked token jtis.
+    A miss means the jti was never revoked, a hit still has to be confirmed in redis.
+    """
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(self.size // 8 + 1)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: str):
+        """Only a value not in the filter yet is counted, a jti this worker revoked comes back over pub/sub."""
+        added = False
+        for pos in self._positions(value):
+            bit = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & bit:
+                self.bits[pos >> 3] |= bit
+                added = True
+
+        if added:
+            self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class RevocationCache:
+    """
+    Keeps a worker's bloom filter in sync with the revoked tokens in redis.
+    The filter is only trusted while the pub/sub listener is connected, otherwise every check goes to redis.
+    """
+
+    def __init__(self):
+        self.bloom = BloomFilter()
+        self.ready = False
+        self._task: asyncio.Task | None = None
+
+    async def _rebuild(self):
+        jtis = [jti async for jti in redis.get_revoked_tokens()]
+
+        # sized with headroom over what is live, or the next message would trigger another full scan
+        bloom = BloomFilter(capacity=max(BLOOM_CAPACITY, 2 * len(jtis)))
+        for jti in jtis:
+            bloom.add(jti)
+        self.bloom = bloom
+
+    async def _listen(self):
+        while True:
+            pubsub = redis.verify_client.pubsub()
+            try:
+                await pubsub.subscribe(redis.REVOKED_TOKENS_CHANNEL)
+                # subscribe before loading so nothing revoked in between is missed
+                await self._rebuild()
+                self.ready = True
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+
+                    self.bloom.add(message["data"].decode())
+
+                    if self.bloom.count > self.bloom.capacity:
+                        await self._rebuild()
+
+            except asyncio.CancelledError:
+                raise
+            except RedisError as e:
+                logger.warning(f"Token revocation listener lost redis: {e}")
+            finally:
+                self.ready = False
+                await pubsub.aclose()
+
+            await asyncio.sleep(LISTENER_RETRY_DELAY)
+
+    def start(self):
+        if Config.TOKEN_REVOCATION_BLOOM and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def is_revoked(self, jti: str) -> bool:
+        if self.ready and jti not in self.bloom:
+            return False
+
+        return await redis.is_token_revoked(jti)
+
+    async def revoke(self, jti: str, expires_at: datetime):
+        remaining = int((expires_at - datetime.now(timezone.utc)).total_seconds())
+
+        if remaining <= 0:
+            return
+
+        await redis.save_revoked_token(jti, remaining)
+        self.bloom.add(jti)
+
+
+revoked_tokens = RevocationCache()
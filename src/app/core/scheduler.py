@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from src.app.core import redis
+from src.app.core.settings import Config
+from src.app.models import JobRun, JobRunStatus
+
+"""
+periodic jobs
+Every periodic job runs once cluster-wide, whichever SCHEDULER_BACKEND runs it:
+"leader" (default): each API worker runs an APScheduler, only the worker holding the Redis leader lease runs the jobs,
+    the others stand by and take over when the lease lapses.
+"local": each process runs every job, for a single-process dev server.
+"celery": API workers schedule nothing, Celery beat sends a run_scheduled_job task per job.
+On top of that each run holds a Postgres advisory lock named after its job, so two runs of one job never overlap
+(a leader handover mid-run, a beat next to a stray in-process scheduler), and writes a job_runs row with its duration and rows affected.
+"""
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = "scheduler:leader"
+RUNNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass(frozen=True)
+class Job:
+    """
+    A periodic job. func gets its own session and returns the rows it affected (None when it can't tell),
+    or a {part: rows} breakdown that is recorded as is and summed into rows_affected.
+    record_idle=False keeps runs that affected nothing out of job_runs, for jobs that poll every few seconds.
+    """
+    name: str
+    func: Callable[[AsyncSession], Awaitable[int | dict[str, int] | None]]
+    every: timedelta
+    record_idle: bool = True
+
+
+class LeaderElection:
+    """
+    Redis lease, taken with SET NX and renewed every ttl/3 by its holder.
+    A worker that can't reach redis stops counting itself leader, it can't prove the lease is still its own.
+    """
+
+    def __init__(self, key: str = LEADER_KEY, ttl: int = Config.SCHEDULER_LEADER_TTL):
+        self.key = key
+        self.ttl = ttl
+        self.token = f"{RUNNER}:{uuid.uuid4().hex}"
+        self.is_leader = False
+        self._task: asyncio.Task | None = None
+
+    async def _campaign(self):
+        while True:
+            was_leader = self.is_leader
+            try:
+                if self.is_leader:
+                    self.is_leader = await redis.renew_lease(self.key, self.token, self.ttl)
+                else:
+                    self.is_leader = await redis.acquire_lease(self.key, self.token, self.ttl)
+            except asyncio.CancelledError:
+                raise
+            except RedisError as e:
+                self.is_leader = False
+                logger.warning(f"Scheduler leader election lost redis: {e}")
+
+            if self.is_leader != was_leader:
+                logger.info(f"Scheduler leadership {'taken' if self.is_leader else 'lost'} by {RUNNER}")
+
+            await asyncio.sleep(self.ttl / 3)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._campaign())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self.is_leader:
+            # hand over now instead of after the lease runs out
+            self.is_leader = False
+            try:
+                await redis.release_lease(self.key, self.token)
+            except RedisError:
+                pass
+
+
+def _lock_key(job: Job) -> int:
+    return zlib.crc32(f"job:{job.name}".encode())
+
+
+async def run_job(job: Job, engine: AsyncEngine, session_factory: async_sessionmaker) -> int | None:
+    """Run a job under its advisory lock and record the run. Skipped (None) while another run of it holds the lock."""
+
+    # session-level lock on a connection of its own, the job commits as often as it likes on its session
+    async with engine.connect() as lock_conn:
+        locked = await lock_conn.scalar(select(func.pg_try_advisory_lock(_lock_key(job))))
+        await lock_conn.commit()
+
+        if not locked:
+            logger.info(f"{job.name} is already running elsewhere, skipped")
+            return None
+
+        try:
+            started_at = datetime.now(timezone.utc)
+            started = time.perf_counter()
+            status, error, rows, details = JobRunStatus.SUCCEEDED, None, None, None
+
+            try:
+                async with session_factory() as session:
+                    rows = await job.func(session)
+                if isinstance(rows, dict):
+                    details, rows = rows, sum(rows.values())
+            except Exception as e:
+                status, error = JobRunStatus.FAILED, repr(e)
+                logger.exception(f"Error running {job.name}: {e}")
+
+            duration_ms = int((time.perf_counter() - started) * 1000)
+
+            if status == JobRunStatus.FAILED or rows or job.record_idle:
+                logger.info(f"{job.name} {status.value} in {duration_ms}ms, {rows} rows affected{f' {details}' if details else ''}")
+
+                async with session_factory() as session:
+                    session.add(JobRun(
+                        job_name=job.name,
+                        runner=RUNNER,
+                        status=status,
+                        started_at=started_at,
+                        finished_at=datetime.now(timezone.utc),
+                        duration_ms=duration_ms,
+                        rows_affected=rows,
+                        details=details,
+                        error=error,
+                    ))
+                    await session.commit()
+
+            return rows
+        finally:
+            await lock_conn.scalar(select(func.pg_advisory_unlock(_lock_key(job))))
+            await lock_conn.commit()
+
+
+async def run_job_standalone(job: Job) -> int | None:
+    """
+    run_job outside the API process (Celery), where every call gets a fresh event loop:
+    a pool-less engine so no connection outlives the loop it was opened on,
+    the notification pushes the job's commits scheduled are awaited instead of cancelled with the loop,
+    and the shared redis client drops its connections so the next run opens its own on its own loop.
+    """
+    from src.app.services.notification import wait_for_pushes
+
+    engine = create_async_engine(Config.DATABASE_URL, poolclass=NullPool)
+    try:
+        factory = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        return await run_job(job, engine, factory)
+    finally:
+        await wait_for_pushes()
+        await redis.verify_client.connection_pool.disconnect()
+        await engine.dispose()
+
+
+class Scheduler:
+    """The in-process scheduler the API lifespan starts, for the "leader" and "local" backends."""
+
+    def __init__(self, jobs: tuple[Job, ...], engine: AsyncEngine, session_factory: async_sessionmaker, backend: str = Config.SCHEDULER_BACKEND):
+        self.jobs = jobs
+        self.engine = engine
+        self.session_factory = session_factory
+        self.backend = backend
+        self.election = LeaderElection()
+        self._scheduler: AsyncIOScheduler | None = None
+
+    async def _run(self, job: Job):
+        if self.backend == "leader" and not self.election.is_leader:
+            return
+
+        await run_job(job, self.engine, self.session_factory)
+
+    def start(self):
+        if self.backend == "celery":
+            logger.info("Periodic jobs are left to Celery beat")
+            return
+
+        if self.backend == "leader":
+            self.election.start()
+
+        self._scheduler = AsyncIOScheduler()
+        for job in self.jobs:
+            # one run of a job at a time per process, a slow run is not stacked with the ones it overran
+            self._scheduler.add_job(
+                self._run,
+                trigger="interval",
+                seconds=job.every.total_seconds(),
+                args=(job,),
+                id=job.name,
+                max_instances=1,
+                coalesce=True,
+            )
+        self._scheduler.start()
+
+    async def stop(self):
+        if self._scheduler is not None:
+            self._scheduler.shutdown()
+            self._scheduler = None
+
+        await self.election.stop()
@@ -31,6 +31,33 @@ class Settings(BaseSettings):
     CLOUDINARY_CLOUD_NAME: str
     CLOUDINARY_API_KEY: int
     CLOUDINARY_API_SECRET: str
+    TOKEN_REVOCATION_BLOOM: bool = True
+    STRICT_LOADING: bool = False
+    WEBSOCKET_BACKPLANE: str = "redis" # "memory" keeps broadcasts inside one process
+    BCRYPT_ROUNDS: int = 12 # raising it rehashes each password at its owner's next login
+    PASSWORD_HASH_WORKERS: int = 2 # threads bcrypt runs on, per worker process
+    PASSWORD_HASH_MAX_PENDING: int = 64 # hash/verify calls allowed to wait for a thread before new ones are refused
+    STORAGE_BACKEND: str = "cloudinary" # "local" writes uploads under MEDIA_ROOT instead
+    STORAGE_WORKERS: int = 4 # threads upload transfers run on, per worker process
+    MEDIA_ROOT: str = "media"
+    MEDIA_URL: str = "/media"
+    NOTIFICATION_RETENTION_DAYS: int = 90 # read notifications older than this are pruned daily
+    NOTIFICATION_PRUNE_BATCH: int = 5000 # rows deleted per transaction while pruning
+    EMAIL_RELAY_INTERVAL: int = 5 # seconds between relay passes over the email outbox
+    EMAIL_RELAY_BATCH: int = 100 # outbox rows published to Celery per transaction
+    EMAIL_RELAY_MAX_ATTEMPTS: int = 5 # failed publishes before a row is marked failed and left alone
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 7 # published outbox rows older than this are pruned daily
+    EMAIL_STARTTLS: bool = True # off (with EMAIL_USE_CREDENTIALS) for a local SMTP stand-in such as mailpit
+    EMAIL_USE_CREDENTIALS: bool = True
+    EMAIL_SEND_BATCH: int = 50 # outbox emails per Celery task, sent over one SMTP session
+    SMTP_POOL_SIZE: int = 2 # SMTP connections kept open, per worker process
+    SMTP_IDLE_TIMEOUT: int = 60 # seconds an idle SMTP connection is trusted before it is replaced
+    EMAIL_METRICS_KEEP: int = 200 # per-batch send metrics kept in Redis for the throughput endpoint
+    SCHEDULER_BACKEND: str = "leader" # "local" runs jobs in every process (single-node dev), "celery" leaves them to Celery beat
+    SCHEDULER_LEADER_TTL: int = 30 # seconds the leader's Redis lease lasts without a renewal
+    JOB_RUN_RETENTION_DAYS: int = 30 # job_runs history older than this is pruned daily
+    MISSED_SWEEP_BATCH: int = 500 # appointments marked missed per transaction by the sweep
+    TOKEN_PURGE_BATCH: int = 5000 # expired token rows deleted per transaction, per table
 
     model_config=SettingsConfigDict(
         env_file=env_file,
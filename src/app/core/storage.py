@@ -0,0 +1,235 @@
+import asyncio
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache, partial
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Protocol
+import cloudinary
+import cloudinary.uploader
+from src.app.core import errors
+from src.app.core.settings import Config
+
+
+CHUNK_SIZE = 6 * 1024 * 1024 #Bytes read and sent per chunk, cloudinary wants at least 5MB per part
+
+# WebP derivatives made of uploaded images: variant -> longest edge in px, never upscaled
+IMAGE_VARIANTS = {
+    "thumbnail": 320,
+    "medium": 768,
+    "large": 1600,
+}
+WEBP_QUALITY = 80
+
+
+@dataclass(frozen=True, slots=True)
+class StoredDerivative:
+    variant: str
+    url: str
+    public_id: str
+    width: int
+    height: int
+    bytes: int
+
+
+@dataclass(frozen=True, slots=True)
+class StoredFile:
+    url: str
+    public_id: str
+    width: int
+    height: int
+    bytes: int
+    derivatives: tuple[StoredDerivative, ...] = ()
+
+
+class StorageBackend(Protocol):
+    """
+    Where uploaded media lives. Calls never block the event loop.
+    save(derivatives=True) also makes the IMAGE_VARIANTS of an image.
+    """
+
+    async def save(self, stream: BinaryIO, *, folder: str, filename: str | None = None, derivatives: bool = False) -> StoredFile: ...
+
+    async def delete(self, public_id: str) -> bool: ...
+
+    def shutdown(self): ...
+
+
+class _OffloadedStorage(ABC):
+    """Runs a backend's blocking provider and file I/O on its own thread pool."""
+
+    def __init__(self, workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage")
+
+    async def _run(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def save(self, stream: BinaryIO, *, folder: str, filename: str | None = None, derivatives: bool = False) -> StoredFile:
+        return await self._run(self._save, stream, folder, filename, derivatives)
+
+    async def delete(self, public_id: str) -> bool:
+        return await self._run(self._delete, public_id)
+
+    @abstractmethod
+    def _save(self, stream: BinaryIO, folder: str, filename: str | None, derivatives: bool) -> StoredFile: ...
+
+    @abstractmethod
+    def _delete(self, public_id: str) -> bool: ...
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class CloudinaryStorage(_OffloadedStorage):
+    """
+    Streams files to cloudinary in CHUNK_SIZE parts.
+    Derivatives are eager transformations, cloudinary renders them during the upload and keeps them under the original's public_id.
+    """
+
+    def __init__(self, workers: int):
+        super().__init__(workers)
+        cloudinary.config(
+            cloud_name=Config.CLOUDINARY_CLOUD_NAME,
+            api_key=Config.CLOUDINARY_API_KEY,
+            api_secret=Config.CLOUDINARY_API_SECRET,
+            secure=True,
+        )
+
+    def _save(self, stream: BinaryIO, folder: str, filename: str | None, derivatives: bool) -> StoredFile:
+        options: dict = {}
+        if derivatives:
+            options["eager"] = [
+                {"width": size, "height": size, "crop": "limit", "format": "webp", "quality": WEBP_QUALITY}
+                for size in IMAGE_VARIANTS.values()
+            ]
+
+        result = cloudinary.uploader.upload_large(
+            stream,
+            folder=folder,
+            filename=filename or "upload",
+            chunk_size=CHUNK_SIZE,
+            **options,
+        )
+
+        # eager results come back in the order they were asked for
+        made = tuple(
+            StoredDerivative(
+                variant=variant,
+                url=eager["secure_url"],
+                public_id=result["public_id"],
+                width=eager["width"],
+                height=eager["height"],
+                bytes=eager["bytes"],
+            )
+            for variant, eager in zip(IMAGE_VARIANTS, result.get("eager") or [])
+        )
+
+        return StoredFile(
+            url=result["secure_url"],
+            public_id=result["public_id"],
+            width=result.get("width", 0),
+            height=result.get("height", 0),
+            bytes=result["bytes"],
+            derivatives=made,
+        )
+
+    def _delete(self, public_id: str) -> bool:
+        result = cloudinary.uploader.destroy(public_id)
+        return result.get("result") in ("ok", "not found")
+
+
+class LocalStorage(_OffloadedStorage):
+    """
+    Writes files under MEDIA_ROOT and serves them from MEDIA_URL, for development and tests without the network.
+    Derivatives are rendered with Pillow on the storage pool, each next to its original as <id>_<variant>.webp.
+    Without derivatives image dimensions are not read, width and height are stored as 0.
+    """
+
+    def __init__(self, root: str, base_url: str, workers: int):
+        super().__init__(workers)
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, public_id: str) -> Path:
+        path = (self.root / public_id).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"{public_id} is outside the media root")
+        return path
+
+    def _save(self, stream: BinaryIO, folder: str, filename: str | None, derivatives: bool) -> StoredFile:
+        suffix = PurePosixPath(filename).suffix.lower() if filename else ""
+        name = uuid.uuid4().hex
+        public_id = f"{folder.strip('/')}/{name}{suffix}"
+        path = self._path(public_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(path, "wb") as out:
+            shutil.copyfileobj(stream, out, CHUNK_SIZE)
+
+        stored = StoredFile(
+            url=f"{self.base_url}/{public_id}",
+            public_id=public_id,
+            width=0,
+            height=0,
+            bytes=path.stat().st_size,
+        )
+
+        if not derivatives:
+            return stored
+
+        # only deployments on local storage need Pillow
+        from PIL import Image, ImageOps
+
+        made = []
+        try:
+            # decoded up front, so only a file Pillow can't read (UnidentifiedImageError is an OSError too)
+            # is a bad upload, a failure writing the variants stays a server error
+            try:
+                original = Image.open(path)
+                original.load()
+            except (OSError, Image.DecompressionBombError) as e:
+                raise errors.FileUpload() from e
+
+            with original:
+                image = ImageOps.exif_transpose(original)
+                width, height = image.size
+
+                if image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+                # largest first, each smaller variant is resized from the one before it
+                for variant, size in sorted(IMAGE_VARIANTS.items(), key=lambda item: item[1], reverse=True):
+                    image = image.copy()
+                    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+                    variant_id = f"{folder.strip('/')}/{name}_{variant}.webp"
+                    variant_path = self._path(variant_id)
+                    image.save(variant_path, "WEBP", quality=WEBP_QUALITY, method=4)
+
+                    made.append(StoredDerivative(
+                        variant=variant,
+                        url=f"{self.base_url}/{variant_id}",
+                        public_id=variant_id,
+                        width=image.width,
+                        height=image.height,
+                        bytes=variant_path.stat().st_size,
+                    ))
+        except Exception:
+            for public in (public_id, *(derivative.public_id for derivative in made)):
+                self._delete(public)
+            raise
+
+        return replace(stored, width=width, height=height, derivatives=tuple(made))
+
+    def _delete(self, public_id: str) -> bool:
+        self._path(public_id).unlink(missing_ok=True)
+        return True
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    if Config.STORAGE_BACKEND == "local":
+        return LocalStorage(Config.MEDIA_ROOT, Config.MEDIA_URL, Config.STORAGE_WORKERS)
+    return CloudinaryStorage(Config.STORAGE_WORKERS)
@@ -1,30 +1,19 @@
 import jwt
 import logging
 import uuid
-from sqlmodel import select, delete
+from sqlmodel import select
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from jwt import PyJWTError, ExpiredSignatureError
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from itsdangerous import URLSafeTimedSerializer,BadSignature, SignatureExpired
 from src.app.core.settings import Config
-from src.app.models import RefreshToken, BlacklistedToken
+from src.app.models import RefreshToken
+from src.app.core.revocation import revoked_tokens
 
 
 ACCESS_TOKEN_EXPIRY= 30000 #Time in mins(15). Please increase this while developing
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"]
-)
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
-
-
 def create_access_token(user_data: dict, expiry: timedelta | None = None, refresh: bool=False, session_id: str | None = None, jti: str | None = None):
 
     token_expiry = expiry if expiry is not None else timedelta(minutes=ACCESS_TOKEN_EXPIRY)
@@ -119,7 +108,7 @@ async def revoke_refresh_token(session_id: str, session: AsyncSession):
 
 
 ########.....Blacklist Token for Logout endpoint
-async def create_token_blacklist(token: str, session: AsyncSession):
+async def create_token_blacklist(token: str):
 
     try:
         payload = jwt.decode(
@@ -129,44 +118,19 @@ async def create_token_blacklist(token: str, session: AsyncSession):
         )
 
         exp_timestamp = payload.get("exp")
-        expires_at = datetime.fromtimestamp(exp_timestamp)
+        expires_at = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
     except Exception:
         raise ValueError("Invalid token")
     
     token_jti = payload.get('jti')
 
-    session_id = payload.get('session_id')   
-    blacklist_token = BlacklistedToken(token_jti=token_jti, session_id=session_id, expires_at=expires_at)
-
-    session.add(blacklist_token)
-    await session.commit()
-
-async def get_blacklisted_token_jti(jti: str, session: AsyncSession):
-
-    statement = select(BlacklistedToken).where(BlacklistedToken.token_jti == jti)
-
-    result = await session.execute(statement)
+    #revoked jti expires from redis together with the token, so nothing needs cleaning up
+    await revoked_tokens.revoke(token_jti, expires_at)
 
-    return result.scalar_one_or_none()
 
+async def is_token_blacklisted(jti: str) -> bool:
 
-async def get_blacklisted_token(token: str, session: AsyncSession):
-
-    statement = select(BlacklistedToken).where(BlacklistedToken.token_jti == token)
-
-    result = await session.execute(statement)
-
-    return result.scalar_one_or_none()
-
-
-async def delete_blacklisted_token(session: AsyncSession):
-
-    now = datetime.now(timezone.utc)
-
-    token = delete(BlacklistedToken).where(BlacklistedToken.expires_at < now) #type: ignore
-
-    await session.execute(token)
-    await session.commit()
+    return await revoked_tokens.is_revoked(jti)
 
 
 ###############........Email Token
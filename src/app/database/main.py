@@ -1,6 +1,9 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlmodel import SQLModel
 from src.app.core.settings import Config
+from src.app.services.notification import has_staged_notifications
+from src.app.services.email_outbox import has_staged_emails
 
 # Create the async engine properly
 async_engine = create_async_engine(
@@ -18,9 +21,15 @@ async_session_factory = async_sessionmaker(
 # Initialize the database (e.g. on app startup)
 async def init_db() -> None:
     async with async_engine.begin() as conn:
+        # the hospital search trigram indexes need pg_trgm
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(SQLModel.metadata.create_all)
 
 # Dependency or function to get a session
 async def get_session():
     async with async_session_factory() as session:
         yield session
+
+        # notifications and emails staged after the request's last commit are written together in one more
+        if has_staged_notifications(session) or has_staged_emails(session):
+            await session.commit()
@@ -1,10 +1,16 @@
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 from sqlmodel import SQLModel, Field, Relationship, ForeignKey, Column
-from sqlalchemy import CheckConstraint, SmallInteger, String, DateTime, Enum as pgEnum, Text, UniqueConstraint
+from sqlalchemy import CheckConstraint, Computed, Index, SmallInteger, String, DateTime, Enum as pgEnum, Text, UniqueConstraint, text
 from datetime import datetime, timezone, date
 from enum import Enum
 from typing import Optional, List
+from src.app.core.settings import Config
+
+
+# Relationships never load on attribute access, queries pick the graph they need from core/loaders.py.
+# STRICT_LOADING (tests) also refuses related objects that happen to already sit in the session.
+LAZY = "raise" if Config.STRICT_LOADING else "raise_on_sql"
 
 
 class UserRoles(str, Enum):
@@ -95,6 +101,20 @@ class MediaType(str, Enum):
     VIDEO = "video"
     DOCUMENT = "document"
 
+class MediaStatus(str, Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
+class EmailStatus(str, Enum):
+    PENDING = "pending"
+    PUBLISHED = "published"
+    FAILED = "failed"
+
+class JobRunStatus(str, Enum):
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 
 class User(SQLModel, table=True):
     __tablename__ = "users" # type: ignore
@@ -121,26 +141,31 @@ class User(SQLModel, table=True):
                          default=lambda: datetime.now(timezone.utc))
     )
 
+    __table_args__ = (
+        # keyset pagination order of the user list
+        Index("ix_users_created_uid", "created_at", "uid"),
+    )
+
     def __repr__(self):
         return f"<User uid={self.uid}, username={self.username}, email={self.email}>"
 
     # Relationships
     sent_messages: List["Message"] = Relationship(
-        back_populates="sender", sa_relationship_kwargs={"foreign_keys": "[Message.sender_uid]"})
+        back_populates="sender", sa_relationship_kwargs={"lazy": LAZY, "foreign_keys": "[Message.sender_uid]"})
     received_messages: List["Message"] = Relationship(
-        back_populates="receiver", sa_relationship_kwargs={"foreign_keys": "[Message.receiver_uid]"})
+        back_populates="receiver", sa_relationship_kwargs={"lazy": LAZY, "foreign_keys": "[Message.receiver_uid]"})
     hospital: Optional["Hospital"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="user", sa_relationship_kwargs={"lazy": LAZY})
     admin: Optional["Admin"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="user", sa_relationship_kwargs={"lazy": LAZY})
     patient: Optional["Patient"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="user", sa_relationship_kwargs={"lazy": LAZY})
     practitioner: Optional["Practitioner"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="user", sa_relationship_kwargs={"lazy": LAZY})
     notifications: List["Notification"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="user", sa_relationship_kwargs={"lazy": LAZY})
     ratings: List["HospitalRating"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="user", sa_relationship_kwargs={"lazy": LAZY})
 
 # Hospital Model
 
@@ -175,29 +200,47 @@ class Hospital(SQLModel, table=True):
     cover_image: Optional[str] = Field(default=None, sa_column=Column(
         String, nullable=True))
 
+    __table_args__ = (
+        # full-text document of the hospital search (services/hospital_search.py), kept up to date by postgres.
+        # Name weighs most, then where it is, then the about text
+        Column("search_vector", pg.TSVECTOR, Computed(
+            "setweight(to_tsvector('simple'::regconfig, coalesce(hospital_name, '')), 'A') || "
+            "setweight(to_tsvector('simple'::regconfig, coalesce(state, '') || ' ' || coalesce(full_address, '')), 'B') || "
+            "setweight(to_tsvector('simple'::regconfig, coalesce(about, '')), 'D')",
+            persisted=True,
+        )),
+        Index("ix_hospitals_search_vector", "search_vector", postgresql_using="gin"),
+        # pg_trgm indexes behind the typo-tolerant match on name and location
+        Index("ix_hospitals_name_trgm", "hospital_name", postgresql_using="gin", postgresql_ops={"hospital_name": "gin_trgm_ops"}),
+        Index("ix_hospitals_state_trgm", "state", postgresql_using="gin", postgresql_ops={"state": "gin_trgm_ops"}),
+        Index("ix_hospitals_address_trgm", "full_address", postgresql_using="gin", postgresql_ops={"full_address": "gin_trgm_ops"}),
+    )
+    # search_vector is only ever read inside queries, loading a hospital never fetches it
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
+
     def __repr__(self):
         return f"<Hospital uid={self.uid}, hospital_name={self.hospital_name}>"
 
     # Relationship
     user: "User" = Relationship(
-        back_populates="hospital", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="hospital", sa_relationship_kwargs={"lazy": LAZY})
     practitioner: List["Practitioner"] = Relationship(back_populates="hospital", sa_relationship_kwargs={
-                                          "lazy": "selectin"}, passive_deletes=True)
+                                          "lazy": LAZY}, passive_deletes=True)
     admin: List["Admin"] = Relationship(back_populates="hospital", sa_relationship_kwargs={
-                                        "lazy": "selectin"}, passive_deletes=True)
+                                        "lazy": LAZY}, passive_deletes=True)
     appointment: List["Appointment"] = Relationship(
-        back_populates="hospital", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
+        back_populates="hospital", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
     department: List["Department"] = Relationship(back_populates="hospital", sa_relationship_kwargs={
-                                                  "lazy": "selectin", "cascade": "all, delete-orphan"}, passive_deletes=True)
+                                                  "lazy": LAZY, "cascade": "all, delete-orphan"}, passive_deletes=True)
     medical_record: List["MedicalRecord"] = Relationship(back_populates="hospital", sa_relationship_kwargs={
-                                                         "lazy": "selectin", "cascade": "all, delete-orphan"}, passive_deletes=True)
+                                                         "lazy": LAZY, "cascade": "all, delete-orphan"}, passive_deletes=True)
     ratings: List["HospitalRating"] = Relationship(back_populates="hospital", sa_relationship_kwargs={
-                                                          "lazy": "selectin", "cascade": "all, delete-orphan"}, passive_deletes=True)
+                                                          "lazy": LAZY, "cascade": "all, delete-orphan"}, passive_deletes=True)
     queues: List["Queue"] = Relationship(
-        back_populates="hospital", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
-    hospital_patients: list["HospitalPatient"] = Relationship(back_populates="hospital")
-    media: list["HospitalMedia"] = Relationship(back_populates="hospital", sa_relationship_kwargs={"lazy": "selectin"})
-    reviews: List["Review"] = Relationship(back_populates="hospital")
+        back_populates="hospital", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
+    hospital_patients: list["HospitalPatient"] = Relationship(back_populates="hospital", sa_relationship_kwargs={"lazy": LAZY})
+    media: list["HospitalMedia"] = Relationship(back_populates="hospital", sa_relationship_kwargs={"lazy": LAZY})
+    reviews: List["Review"] = Relationship(back_populates="hospital", sa_relationship_kwargs={"lazy": LAZY})
 
 
 # Patient Model
@@ -228,15 +271,15 @@ class Patient(SQLModel, table=True):
 
     # Relationship
     user: "User" = Relationship(
-        back_populates="patient", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="patient", sa_relationship_kwargs={"lazy": LAZY})
     appointment: List["Appointment"] = Relationship(
-        back_populates="patient", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
+        back_populates="patient", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
     medical_record: List["MedicalRecord"] = Relationship(back_populates="patient", sa_relationship_kwargs={
-                                                         "lazy": "selectin", "cascade": "all, delete-orphan"}, passive_deletes=True)
+                                                         "lazy": LAZY, "cascade": "all, delete-orphan"}, passive_deletes=True)
     queue_entries: List["QueueEntry"] = Relationship(
-        back_populates="patient", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
-    hospital_patients: List["HospitalPatient"] = Relationship(back_populates="patient")
-    reviews: List["Review"] = Relationship(back_populates="patient")
+        back_populates="patient", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
+    hospital_patients: List["HospitalPatient"] = Relationship(back_populates="patient", sa_relationship_kwargs={"lazy": LAZY})
+    reviews: List["Review"] = Relationship(back_populates="patient", sa_relationship_kwargs={"lazy": LAZY})
 
 
 # Hospital Ratings Model
@@ -253,8 +296,8 @@ class HospitalRating(SQLModel, table=True):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True)))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True)))
 
-    hospital: "Hospital" = Relationship(back_populates="ratings", sa_relationship_kwargs={"lazy": "selectin"})
-    user: "User" = Relationship(back_populates="ratings", sa_relationship_kwargs={"lazy": "selectin"})
+    hospital: "Hospital" = Relationship(back_populates="ratings", sa_relationship_kwargs={"lazy": LAZY})
+    user: "User" = Relationship(back_populates="ratings", sa_relationship_kwargs={"lazy": LAZY})
 
 # Practitioner Model
 class Practitioner(SQLModel, table=True):
@@ -292,21 +335,27 @@ class Practitioner(SQLModel, table=True):
     user_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
         "users.uid", ondelete="CASCADE"), nullable=False, index=True))
 
+    __table_args__ = (
+        # keyset pagination order of the practitioner list, with and without the type filter
+        Index("ix_practitioners_last_name_uid", "last_name", "uid"),
+        Index("ix_practitioners_type_last_name_uid", "practitioner_type", "last_name", "uid"),
+    )
+
     def __repr__(self):
         return f"<Pracitioner uid={self.uid}, Practitioner first_name={self.first_name}, Practitioner's last_name={self.last_name}>"
 
     # Relationship
     user: "User" = Relationship(
-        back_populates="practitioner", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="practitioner", sa_relationship_kwargs={"lazy": LAZY})
     hospital: "Hospital" = Relationship(
-        back_populates="practitioner", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="practitioner", sa_relationship_kwargs={"lazy": LAZY})
     appointment: List["Appointment"] = Relationship(
-        back_populates="practitioner", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
+        back_populates="practitioner", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
     department: "Department" = Relationship(
-        back_populates="practitioners", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="practitioners", sa_relationship_kwargs={"lazy": LAZY})
     medical_record: List["MedicalRecord"] = Relationship(
-        back_populates="practitioner", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
-    reviews: List["Review"] = Relationship(back_populates="practitioner")
+        back_populates="practitioner", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
+    reviews: List["Review"] = Relationship(back_populates="practitioner", sa_relationship_kwargs={"lazy": LAZY})
 
 
 # Admin Model
@@ -334,11 +383,11 @@ class Admin(SQLModel, table=True):
 
     # Relationships
     user: "User" = Relationship(
-        back_populates="admin", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="admin", sa_relationship_kwargs={"lazy": LAZY})
     hospital: "Hospital" = Relationship(
-        back_populates="admin", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="admin", sa_relationship_kwargs={"lazy": LAZY})
     department: Optional["Department"] = Relationship(
-        back_populates="admin", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="admin", sa_relationship_kwargs={"lazy": LAZY})
 
 # Appointment model
 
@@ -372,23 +421,43 @@ class Appointment(SQLModel, table=True):
                          default=lambda: datetime.now(timezone.utc))
     )
 
+    __table_args__ = (
+        # hospital dashboards filter by hospital then aggregate over status and scheduled day
+        Index(
+            "ix_appointments_hospital_status_scheduled",
+            "hospital_uid",
+            "status",
+            "scheduled_time",
+        ),
+        # keyset pagination order of the appointment lists: all, per patient and per hospital
+        Index("ix_appointments_scheduled_uid", "scheduled_time", "uid"),
+        Index("ix_appointments_patient_scheduled_uid", "patient_uid", "scheduled_time", "uid"),
+        Index("ix_appointments_hospital_scheduled_uid", "hospital_uid", "scheduled_time", "uid"),
+        # the missed-appointment sweep only walks appointments still open
+        Index(
+            "ix_appointments_open_scheduled",
+            "scheduled_time",
+            postgresql_where=text("status IN ('pending', 'in_progress', 'rescheduled')"),
+        ),
+    )
+
     def __repr__(self):
         return f"<Appointment uid={self.uid}, Patient uid={self.patient_uid}, Practitioner uid={self.practitioner_uid}, Status={self.status}>"
 
     # Relationship
     patient: "Patient" = Relationship(
-        back_populates="appointment", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="appointment", sa_relationship_kwargs={"lazy": LAZY})
     hospital: "Hospital" = Relationship(
-        back_populates="appointment", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="appointment", sa_relationship_kwargs={"lazy": LAZY})
     practitioner: "Practitioner" = Relationship(
-        back_populates="appointment", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="appointment", sa_relationship_kwargs={"lazy": LAZY})
     department: "Department" = Relationship(
-        back_populates="appointments", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="appointments", sa_relationship_kwargs={"lazy": LAZY})
     reschedule_history: List["RescheduleHistory"] = Relationship(
-        back_populates="appointment", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
+        back_populates="appointment", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
     queue_entries: Optional["QueueEntry"] = Relationship(
-        back_populates="appointment", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
-    review: "Review" = Relationship(back_populates="appointment")
+        back_populates="appointment", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
+    review: "Review" = Relationship(back_populates="appointment", sa_relationship_kwargs={"lazy": LAZY})
 
 # Appointment Reschedule History
 class RescheduleHistory(SQLModel, table=True):
@@ -405,7 +474,43 @@ class RescheduleHistory(SQLModel, table=True):
 
     # Optional relationships
     appointment: Optional["Appointment"] = Relationship(
-        back_populates="reschedule_history", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="reschedule_history", sa_relationship_kwargs={"lazy": LAZY})
+
+
+# Per hospital/department/practitioner/day appointment counts, kept in step with appointments by services/daily_stats.py
+class HospitalDailyStats(SQLModel, table=True):
+    __tablename__ = "hospital_daily_stats" #type: ignore
+
+    __table_args__ = (
+        UniqueConstraint(
+            "hospital_uid",
+            "department_uid",
+            "practitioner_uid",
+            "day",
+            name="uq_hospital_daily_stats",
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index("ix_hospital_daily_stats_hospital_day", "hospital_uid", "day"),
+    )
+
+    uid: uuid.UUID = Field(default_factory=uuid.uuid4, sa_column=Column(
+        pg.UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")))
+    hospital_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
+        "hospitals.uid", ondelete="CASCADE"), nullable=False))
+    department_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
+        "departments.uid", ondelete="CASCADE"), nullable=False))
+    practitioner_uid: Optional[uuid.UUID] = Field(default=None, sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
+        "practitioners.uid", ondelete="CASCADE"), nullable=True))
+    day: date = Field(sa_column=Column(pg.DATE, nullable=False)) # UTC day of scheduled_time
+    total: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    pending: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    completed: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    canceled: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    in_progress: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    rescheduled: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    missed: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    wait_seconds: float = Field(default=0, sa_column=Column(pg.DOUBLE_PRECISION, nullable=False, server_default="0")) # check-in to completion, completed only
+    wait_samples: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
 
 # Hospital Departments
 
@@ -435,13 +540,13 @@ class Department(SQLModel, table=True):
 
     # Relationships
     hospital: "Hospital" = Relationship(
-        back_populates="department", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="department", sa_relationship_kwargs={"lazy": LAZY})
     admin: List["Admin"] = Relationship(
-        back_populates="department", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="department", sa_relationship_kwargs={"lazy": LAZY})
     practitioners: List["Practitioner"] = Relationship(
-        back_populates="department", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="department", sa_relationship_kwargs={"lazy": LAZY})
     appointments: List["Appointment"] = Relationship(
-        back_populates="department", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="department", sa_relationship_kwargs={"lazy": LAZY})
     
 
 # Medical Record Model
@@ -474,18 +579,23 @@ class MedicalRecord(SQLModel, table=True):
                          default=lambda: datetime.now(timezone.utc))
     )
 
+    __table_args__ = (
+        # keyset pagination order of a patient's records, newest first
+        Index("ix_medical_records_patient_created_uid", "patient_uid", "created_at", "uid"),
+    )
+
     def __repr__(self):
         return f"<Medical Record uid={self.uid}, Patient uid={self.patient_uid}, Practitioner uid={self.practitioner_uid}, Hospital uid={self.hospital_uid}, Record Type={self.record_type}>"
 
     # Relationships
     files: List["MedicalRecordFile"] = Relationship(back_populates="medical_record", sa_relationship_kwargs={
-                                                    "lazy": "selectin", "cascade": "all, delete-orphan"}, passive_deletes=True)
+                                                    "lazy": LAZY, "cascade": "all, delete-orphan"}, passive_deletes=True)
     patient: "Patient" = Relationship(
-        back_populates="medical_record", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="medical_record", sa_relationship_kwargs={"lazy": LAZY})
     practitioner: "Practitioner" = Relationship(
-        back_populates="medical_record", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="medical_record", sa_relationship_kwargs={"lazy": LAZY})
     hospital: "Hospital" = Relationship(
-        back_populates="medical_record", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="medical_record", sa_relationship_kwargs={"lazy": LAZY})
 
 
 class MedicalRecordFile(SQLModel, table=True):
@@ -509,7 +619,7 @@ class MedicalRecordFile(SQLModel, table=True):
 
     # Relationship
     medical_record: Optional[MedicalRecord] = Relationship(
-        back_populates="files", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="files", sa_relationship_kwargs={"lazy": LAZY})
 
 
 # Signup Link - Table to store generated tokens for Admins/Practitioners signup links.
@@ -527,7 +637,7 @@ class SignupLink(SQLModel, table=True):
     practitioner_type: PractitionerType = Field(default=PractitionerType.DOCTOR, sa_column=Column(pgEnum(PractitionerType, values_callable=lambda enum: [e.value for e in enum], name="practitioner_type"), nullable=False))
     notes: Optional[str] = None
     is_used: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True)))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True), index=True)) # expired links are purged by it
 
     def __repr__(self):
         return f"<SignupLink: uid={self.uid}, email= {self.email}, is_used={self.is_used}>"
@@ -540,7 +650,7 @@ class PasswordResetToken(SQLModel, table=True):
         pg.UUID(as_uuid=True), primary_key=True, index=True))
     email: str
     token: str = Field(unique=True, nullable=False)
-    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), index=True))
     is_used: bool = Field(default=False)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True),
@@ -558,10 +668,21 @@ class Message(SQLModel, table=True):
     receiver_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
         "users.uid", ondelete="CASCADE"), nullable=False, index=True))
     content: Optional[str] = Field(default=None)
-    timestamp: datetime = Field(default=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True)))
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True)))
     is_read: bool = Field(default=False)
     is_edited: bool = Field(default=False)
 
+    __table_args__ = (
+        # a conversation is the unordered (sender, receiver) pair, history pages run over it in (timestamp, uid) order
+        Index(
+            "ix_messages_pair_timestamp_uid",
+            text("least(sender_uid, receiver_uid)"),
+            text("greatest(sender_uid, receiver_uid)"),
+            "timestamp",
+            "uid",
+        ),
+    )
+
     def __repr__(self):
         return f"<Message uid={self.uid}, sender's id={self.sender_uid}, receiver's uid={self.receiver_uid}, content={self.content}>"
 
@@ -569,7 +690,7 @@ class Message(SQLModel, table=True):
     sender: "User" = Relationship(
         back_populates="sent_messages",
         sa_relationship_kwargs={
-            "lazy": "joined",
+            "lazy": LAZY,
             "foreign_keys": "[Message.sender_uid]",  # must be string reference
             "passive_deletes": True
         }
@@ -577,13 +698,40 @@ class Message(SQLModel, table=True):
     receiver: "User" = Relationship(
         back_populates="received_messages",
         sa_relationship_kwargs={
-            "lazy": "joined",
+            "lazy": LAZY,
             "foreign_keys": "[Message.receiver_uid]",
             "passive_deletes": True
         }
     )
 
 
+# A user's side of a conversation with one peer: the inbox row, kept up to date as messages are sent and read
+class Conversation(SQLModel, table=True):
+    __tablename__ = "conversations" #type: ignore
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_uid",
+            "peer_uid",
+            name="uq_conversation_user_peer",
+        ),
+        # the inbox, newest conversation first
+        Index("ix_conversations_user_last_message", "user_uid", "last_message_at", "uid"),
+    )
+
+    uid: uuid.UUID = Field(default_factory=uuid.uuid4, sa_column=Column(pg.UUID(as_uuid=True), primary_key=True, nullable=False,))
+    user_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("users.uid", ondelete="CASCADE"), nullable=False,))
+    peer_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("users.uid", ondelete="CASCADE"), nullable=False, index=True,))
+    last_message_uid: Optional[uuid.UUID] = Field(default=None, sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("messages.uid", ondelete="SET NULL"), nullable=True,))
+    last_message_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    unread_count: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    read_up_to: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True), nullable=True)) # messages up to here were read in one go
+
+    # Relationships
+    peer: "User" = Relationship(sa_relationship_kwargs={"lazy": LAZY, "foreign_keys": "[Conversation.peer_uid]"})
+    last_message: Optional["Message"] = Relationship(sa_relationship_kwargs={"lazy": LAZY})
+
+
 class BlacklistedToken(SQLModel, table=True):
     __tablename__ = "blacklistedtokens" #type: ignore
 
@@ -591,7 +739,7 @@ class BlacklistedToken(SQLModel, table=True):
         pg.UUID(as_uuid=True), primary_key=True, index=True))
     token_jti: str = Field(sa_column=Column(String, unique=True))
     session_id: str = Field(sa_column=Column(String, index=True, unique=True))
-    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), index=True))
     
 
 
@@ -604,7 +752,7 @@ class RefreshToken(SQLModel, table=True):
     user_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
         "users.uid", ondelete="CASCADE"), nullable=False, index=True))
     session_id: str = Field(sa_column=Column(String, index=True, unique=True))
-    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True)))
+    expires_at: datetime = Field(sa_column=Column(DateTime(timezone=True), index=True))
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(DateTime(timezone=True)),
@@ -615,6 +763,14 @@ class RefreshToken(SQLModel, table=True):
 class Notification(SQLModel, table=True):
     __tablename__ = "notifications" #type: ignore
 
+    __table_args__ = (
+        # the inbox, all or unread only, newest first
+        Index("ix_notifications_user_timestamp", "user_uid", text("timestamp DESC"), text("uid DESC")),
+        Index("ix_notifications_user_read_timestamp", "user_uid", "is_read", text("timestamp DESC"), text("uid DESC")),
+        # retention pruning of old read notifications
+        Index("ix_notifications_read_timestamp", "timestamp", postgresql_where=text("is_read")),
+    )
+
     uid: Optional[uuid.UUID] = Field(default_factory=uuid.uuid4, sa_column=Column(
         pg.UUID(as_uuid=True), primary_key=True, index=True))
     user_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
@@ -629,7 +785,63 @@ class Notification(SQLModel, table=True):
     )
 
     user: "User" = Relationship(
-        back_populates="notifications", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="notifications", sa_relationship_kwargs={"lazy": LAZY})
+
+
+# Unread notifications per user, kept up to date as notifications are written and read so the badge is one row lookup
+class NotificationCounter(SQLModel, table=True):
+    __tablename__ = "notification_counters" #type: ignore
+
+    uid: uuid.UUID = Field(default_factory=uuid.uuid4, sa_column=Column(pg.UUID(as_uuid=True), primary_key=True, nullable=False,))
+    user_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("users.uid", ondelete="CASCADE"), nullable=False, unique=True,))
+    unread_count: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+
+
+# Emails waiting to be handed to Celery, written in the same transaction as the change that sends them
+class EmailOutbox(SQLModel, table=True):
+    __tablename__ = "email_outbox" #type: ignore
+
+    __table_args__ = (
+        # the relay's queue, oldest first, without walking what was already published
+        Index("ix_email_outbox_pending", "created_at", postgresql_where=text("status = 'pending'")),
+        # retention pruning of published rows
+        Index("ix_email_outbox_published_at", "published_at", postgresql_where=text("status = 'published'")),
+    )
+
+    uid: uuid.UUID = Field(default_factory=uuid.uuid4, sa_column=Column(pg.UUID(as_uuid=True), primary_key=True, nullable=False,))
+    idempotency_key: str = Field(sa_column=Column(String, nullable=False, unique=True)) # claimed by the Celery worker before sending, each key is sent once
+    recipients: List[str] = Field(sa_column=Column(pg.JSONB, nullable=False))
+    subject: str = Field(sa_column=Column(String, nullable=False))
+    template: Optional[str] = Field(default=None, sa_column=Column(String, nullable=True)) # rendered by the Celery worker
+    context: Optional[dict] = Field(default=None, sa_column=Column(pg.JSONB, nullable=True))
+    body: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True)) # prerendered HTML, only on rows staged before templates
+    status: EmailStatus = Field(default=EmailStatus.PENDING, sa_column=Column(pgEnum(EmailStatus, values_callable=lambda enum: [e.value for e in enum], name="email_status"), nullable=False, server_default="pending"))
+    attempts: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default="0"))
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True), nullable=False))
+    published_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True), nullable=True))
+
+
+# One row per run of a scheduled job (see core/scheduler.py)
+class JobRun(SQLModel, table=True):
+    __tablename__ = "job_runs" #type: ignore
+
+    __table_args__ = (
+        # run history, newest first, of one job or of all of them
+        Index("ix_job_runs_job_started", "job_name", "started_at", "uid"),
+        Index("ix_job_runs_started", "started_at", "uid"),
+    )
+
+    uid: uuid.UUID = Field(default_factory=uuid.uuid4, sa_column=Column(pg.UUID(as_uuid=True), primary_key=True, nullable=False,))
+    job_name: str = Field(sa_column=Column(String, nullable=False))
+    runner: str = Field(sa_column=Column(String, nullable=False)) # host:pid of the process that ran it
+    status: JobRunStatus = Field(sa_column=Column(pgEnum(JobRunStatus, values_callable=lambda enum: [e.value for e in enum], name="job_run_status"), nullable=False))
+    started_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    finished_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    duration_ms: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
+    rows_affected: Optional[int] = Field(default=None, sa_column=Column(pg.INTEGER, nullable=True))
+    details: Optional[dict] = Field(default=None, sa_column=Column(pg.JSONB, nullable=True)) # rows affected per part, for jobs that report a breakdown
+    error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
 
 
 class Queue(SQLModel, table=True):
@@ -648,19 +860,30 @@ class Queue(SQLModel, table=True):
 
     # Relationship
     hospital: "Hospital" = Relationship(
-        back_populates="queues", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="queues", sa_relationship_kwargs={"lazy": LAZY})
     queue_entries: List["QueueEntry"] = Relationship(
-        back_populates="queues", sa_relationship_kwargs={"lazy": "selectin"}, passive_deletes=True)
+        back_populates="queues", sa_relationship_kwargs={"lazy": LAZY}, passive_deletes=True)
 
 
 class QueueEntry(SQLModel, table=True):
     __tablename__ = "queue_entries" #type: ignore
 
+    __table_args__ = (
+        # queue numbers restart every day, services/queue.py hands them out
+        UniqueConstraint(
+            "queue_uid",
+            "service_day",
+            "queue_number",
+            name="uq_queue_entries_queue_day_number",
+        ),
+    )
+
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, sa_column=Column(
         pg.UUID(as_uuid=True), primary_key=True, index=True))
     queue_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
         "queues.uid", ondelete="CASCADE"), nullable=False, index=True))
-    queue_number: int    
+    queue_number: int
+    service_day: date = Field(sa_column=Column(pg.DATE, nullable=False)) # UTC day of joined_at
     status: QueueEntryStatus = Field(default=QueueEntryStatus.WAITING, sa_column=Column(
         pgEnum(QueueEntryStatus, values_callable=lambda enum: [e.value for e in enum], name="queue_status"), nullable=False))
     patient_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey(
@@ -677,11 +900,11 @@ class QueueEntry(SQLModel, table=True):
 
     # Relationship
     patient: "Patient" = Relationship(
-        back_populates="queue_entries", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="queue_entries", sa_relationship_kwargs={"lazy": LAZY})
     appointment: "Appointment" = Relationship(
-        back_populates="queue_entries", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="queue_entries", sa_relationship_kwargs={"lazy": LAZY})
     queues: "Queue" = Relationship(
-        back_populates="queue_entries", sa_relationship_kwargs={"lazy": "selectin"})
+        back_populates="queue_entries", sa_relationship_kwargs={"lazy": LAZY})
 
 
 class HospitalPatient(SQLModel, table=True):
@@ -708,8 +931,8 @@ class HospitalPatient(SQLModel, table=True):
     )
 
     # Relationships
-    hospital: "Hospital" = Relationship(back_populates="hospital_patients")
-    patient: "Patient" = Relationship(back_populates="hospital_patients")
+    hospital: "Hospital" = Relationship(back_populates="hospital_patients", sa_relationship_kwargs={"lazy": LAZY})
+    patient: "Patient" = Relationship(back_populates="hospital_patients", sa_relationship_kwargs={"lazy": LAZY})
 
 
 class HospitalMedia(SQLModel, table=True):
@@ -723,6 +946,7 @@ class HospitalMedia(SQLModel, table=True):
     caption: str | None = None
     media_type: MediaType = Field(default=MediaType.IMAGE, sa_column=Column(pgEnum(MediaType, values_callable=lambda enum: [e.value for e in enum], name="media_type"), nullable=False))
     is_cover: bool = False
+    status: MediaStatus = Field(default=MediaStatus.READY, sa_column=Column(pgEnum(MediaStatus, values_callable=lambda enum: [e.value for e in enum], name="media_status"), nullable=False, server_default="ready")) # pending until a deferred upload lands
     width: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
     height: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
     file_size: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
@@ -732,7 +956,34 @@ class HospitalMedia(SQLModel, table=True):
     )
 
     # Relationship
-    hospital: "Hospital" = Relationship(back_populates="media")
+    hospital: "Hospital" = Relationship(back_populates="media", sa_relationship_kwargs={"lazy": LAZY})
+    derivatives: List["HospitalMediaDerivative"] = Relationship(back_populates="media", sa_relationship_kwargs={
+                                                                "lazy": LAZY, "cascade": "all, delete-orphan"}, passive_deletes=True)
+
+
+# Resized WebP copies of a hospital image, one row per variant (thumbnail, medium, large)
+class HospitalMediaDerivative(SQLModel, table=True):
+    __tablename__ = "hospital_media_derivatives" #type: ignore
+
+    __table_args__ = (
+        UniqueConstraint(
+            "media_uid",
+            "variant",
+            name="uq_hospital_media_derivative_variant",
+        ),
+    )
+
+    uid: uuid.UUID = Field(default_factory=uuid.uuid4, sa_column=Column(pg.UUID(as_uuid=True), primary_key=True, nullable=False,))
+    media_uid: uuid.UUID = Field(sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("hospital_media.uid", ondelete="CASCADE"), nullable=False, index=True,))
+    variant: str = Field(sa_column=Column(String, nullable=False))
+    file_url: str
+    public_id: str
+    width: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
+    height: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
+    file_size: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
+
+    # Relationship
+    media: "HospitalMedia" = Relationship(back_populates="derivatives", sa_relationship_kwargs={"lazy": LAZY})
 
 
 
@@ -748,6 +999,10 @@ class Review(SQLModel, table=True):
             "practitioner_rating BETWEEN 1 AND 5",
             name="ck_practitioner_rating",
         ),
+        # keyset pagination order of the review lists, newest first
+        Index("ix_reviews_hospital_created_uid", "hospital_uid", "created_at", "uid"),
+        Index("ix_reviews_practitioner_created_uid", "practitioner_uid", "created_at", "uid"),
+        Index("ix_reviews_patient_created_uid", "patient_uid", "created_at", "uid"),
     )
 
     uid: uuid.UUID = Field(default_factory=uuid.uuid4, sa_column=Column(pg.UUID(as_uuid=True), primary_key=True, nullable=False,),)
@@ -770,7 +1025,7 @@ class Review(SQLModel, table=True):
 
     updated_at: datetime = Field( default_factory=lambda: datetime.now(timezone.utc), sa_column=Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc), nullable=False,))
 
-    appointment: "Appointment" = Relationship(back_populates="review")
-    patient: "Patient" = Relationship(back_populates="reviews")
-    hospital: "Hospital" = Relationship(back_populates="reviews")
-    practitioner: "Practitioner" = Relationship(back_populates="reviews")
\ No newline at end of file
+    appointment: "Appointment" = Relationship(back_populates="review", sa_relationship_kwargs={"lazy": LAZY})
+    patient: "Patient" = Relationship(back_populates="reviews", sa_relationship_kwargs={"lazy": LAZY})
+    hospital: "Hospital" = Relationship(back_populates="reviews", sa_relationship_kwargs={"lazy": LAZY})
+    practitioner: "Practitioner" = Relationship(back_populates="reviews", sa_relationship_kwargs={"lazy": LAZY})
\ No newline at end of file
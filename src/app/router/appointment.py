@@ -1,16 +1,17 @@
 from datetime import datetime, timezone
 from typing import List, Optional
 import uuid
-from fastapi import APIRouter, Depends, status, HTTPException
-from src.app.core.dependencies import get_current_user
+from fastapi import APIRouter, Depends, Query, status, HTTPException
+from src.app.core.dependencies import get_current_user, get_current_principal
+from src.app.core.principal import Principal
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from src.app.schemas import AppointmentCreate, AppointmentRead, PractitionerAssign, AppointmentStatusUpdate, RescheduleAppointment, AppointmentResponse
+from src.app.schemas import Page, AppointmentCreate, AppointmentRead, PractitionerAssign, AppointmentStatusUpdate, RescheduleAppointment, AppointmentResponse
 from src.app.models import Practitioner, User, Appointment, AppointmentStatus, UserRoles, AdminType
-from src.app.services import appointment as apt_service, patients as pat_service, hospital as hp_service, department as dpt_service, queue
+from src.app.services import appointment as apt_service, patients as pat_service, hospital as hp_service, department as dpt_service, queue, daily_stats
 from src.app.database.main import get_session
-from src.app.core import errors, permissions,mails
+from src.app.core import errors, permissions, mails, loaders
 from src.app.services.notification import send_notification
-from src.app.websocket.appointment_ws import notify_queue_update
+from src.app.websocket.appointment_ws import notify_queue_change
 
 """
 create an appointment
@@ -30,11 +31,11 @@ apt_router = APIRouter(
 
 
 @apt_router.post('/appointments/new_appointment', status_code=status.HTTP_201_CREATED, response_model=AppointmentRead)
-async def add_appointment(payload: AppointmentCreate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def add_appointment(payload: AppointmentCreate, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """Please note, you can not edit an appointment after creating"""
 
-    patient = await pat_service.get_patient(current_user.patient.uid, session) #type: ignore
+    patient = await pat_service.get_patient(current_user.patient_uid, session, loaders.PATIENT_CARD) #type: ignore
 
     if not patient:
         raise errors.PatientNotFound()
@@ -78,42 +79,36 @@ async def add_appointment(payload: AppointmentCreate, session: AsyncSession = De
     if current_user.role != UserRoles.PATIENT:
         raise errors.NotAuthorized()
 
-    # Create the appointment
+    # Create the appointment, the confirmation emails go out with it
     appointment = await apt_service.create_appointment(patient.uid, payload, session)
 
-    #send email to patient
-    mails.appointment_success(patient.user.email, patient.user, payload.scheduled_time, hospital)
-
-    #send email to hospital
-    mails.appointment_notification_hospital(hospital.user.email, patient.user, payload.scheduled_time)
-
     return appointment
 
 
 
-@apt_router.get('/appointments', status_code=status.HTTP_200_OK, response_model=List[AppointmentRead])
-async def get_appointments(status: Optional[AppointmentStatus] = None, skip: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+@apt_router.get('/appointments', status_code=status.HTTP_200_OK, response_model=Page[AppointmentRead])
+async def get_appointments(status: Optional[AppointmentStatus] = None, limit: int = 10, cursor: Optional[str] = None, skip: Optional[int] = Query(None, deprecated=True), session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     # Only allow SUPER_ADMIN or ADMIN users
     if current_user.role != UserRoles.ADMIN:
         raise errors.NotAuthorized()
 
-    if current_user.admin is None or current_user.admin.admin_type != AdminType.SUPER_ADMIN:
+    if current_user.admin_type != AdminType.SUPER_ADMIN:
         raise errors.NotAuthorized()
 
-    appointments = await apt_service.get_appointments(skip=skip, limit=limit, status=status, session=session)
+    appointments = await apt_service.get_appointments(limit=limit, status=status, session=session, cursor=cursor, skip=skip)
     return appointments
 
 
-@apt_router.get('/appointments/patient-appointments', status_code=status.HTTP_200_OK, response_model=List[AppointmentRead])
-async def get_patient_appointments(patient_uid: uuid.UUID, skip: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+@apt_router.get('/appointments/patient-appointments', status_code=status.HTTP_200_OK, response_model=Page[AppointmentRead])
+async def get_patient_appointments(patient_uid: uuid.UUID, limit: int = 10, cursor: Optional[str] = None, skip: Optional[int] = Query(None, deprecated=True), session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     patient = await pat_service.get_patient(patient_uid, session)
     
     if not patient:
         raise errors.PatientNotFound()
 
-    appointments = await apt_service.get_patient_appointments(patient_uid, skip, limit, session)
+    appointments = await apt_service.get_patient_appointments(patient_uid, limit, session, cursor=cursor, skip=skip)
 
     #access control
     # permissions.access_grant_for_patient_appointments(current_user, patient.uid, )
@@ -128,19 +123,19 @@ async def get_patient_appointments(patient_uid: uuid.UUID, skip: int = 0, limit:
 #     if not hospital:
 #         raise errors.HospitalNotFound()
     
-#     appointments = await apt_service.get_hospital_appointments(hospital_uid, skip, limit, session)
+#     appointments = await apt_service.get_hospital_appointments(hospital_uid, limit, session, cursor=cursor, skip=skip)
 
 #     #access control
 #     return permissions.access_grant_for_hospital_appointments(current_user, appointments)
 
 
 @apt_router.get('/appointments/uncompleted_appointments', status_code=status.HTTP_200_OK, response_model=List[Appointment])
-async def get_uncompleted_appointments(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: User=Depends(get_current_user)):
+async def get_uncompleted_appointments(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     appointments = await apt_service.get_uncompleted_appointments(hospital_uid, session)
 
     #access control
-    if current_user.hospital is not None and current_user.hospital.uid != hospital_uid:
+    if current_user.owned_hospital_uid is not None and current_user.owned_hospital_uid != hospital_uid:
         raise errors.NotAuthorized()
 
     return appointments
@@ -154,7 +149,7 @@ async def get_uncompleted_appointments(hospital_uid: uuid.UUID, session: AsyncSe
 )
 async def get_all_pending_appointments(
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Get all pending appointments filtered by current user's role and relationship.
@@ -176,7 +171,7 @@ async def get_all_pending_appointments(
 
 
 @apt_router.get('/appointments/appointmnet', status_code=status.HTTP_200_OK, response_model=AppointmentResponse)
-async def get_appointment_by_id(appointment_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: User=Depends(get_current_user)):
+async def get_appointment_by_id(appointment_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     appointment = await apt_service.get_appointment_by_id(appointment_uid, session)
 
@@ -190,7 +185,7 @@ async def get_appointment_by_id(appointment_uid: uuid.UUID, session: AsyncSessio
 
 
 @apt_router.patch('/appointments/cancel', status_code=status.HTTP_202_ACCEPTED)
-async def cancel_appointment(appointment_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: User=Depends(get_current_user)):
+async def cancel_appointment(appointment_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     appointment = await apt_service.get_appointment_by_id(appointment_uid, session)
 
@@ -204,19 +199,17 @@ async def cancel_appointment(appointment_uid: uuid.UUID, session: AsyncSession =
     if current_user.uid != appointment.patient.user_uid:
         raise errors.NotAuthorized()
     
-    await apt_service.cancel_appointment(appointment_uid, session)
+    #send email to patient, written by the cancellation's commit
+    mails.appointment_canceled(session, appointment.patient.user.email, appointment.patient, appointment.scheduled_time, appointment.hospital) #type: ignore
 
-    await notify_queue_update(session, appointment.hospital_uid)
-
-    #send email to patient
-    mails.appointment_canceled(appointment.patient.user.email, appointment.patient.user, appointment.scheduled_time, appointment.hospital) #type: ignore
+    await apt_service.cancel_appointment(appointment_uid, session)
 
     return {"message": "Appointment has been cancelled successfully!"}
 
 
 #set appointment status
 @apt_router.put('/appointments/status', status_code=status.HTTP_200_OK)
-async def update_appointment_status(appointment_uid: uuid.UUID, new_status: AppointmentStatusUpdate, session: AsyncSession = Depends(get_session), current_user: User=Depends(get_current_user)):
+async def update_appointment_status(appointment_uid: uuid.UUID, new_status: AppointmentStatusUpdate, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     appointment = await apt_service.get_appointment_by_id(appointment_uid, session)
 
@@ -228,14 +221,12 @@ async def update_appointment_status(appointment_uid: uuid.UUID, new_status: Appo
 
     await apt_service.switch_appointment_status(appointment_uid, new_status, session)
 
-    await notify_queue_update(session, appointment.hospital_uid)
-
     return {"message": f"Appointment status has been updated to {new_status.status.value}"}
 
 
 
 @apt_router.delete('/appointments/delete', status_code=status.HTTP_204_NO_CONTENT)
-async def delete_db_appointment(appointment_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: User=Depends(get_current_user)):
+async def delete_db_appointment(appointment_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     appointment = await apt_service.get_appointment_by_id(appointment_uid, session)
 
@@ -282,13 +273,13 @@ async def reschedule_appointment(
     #access control
     permissions.appointment_reschedule_access(current_user, appointment)
 
+    #inform the patient through email, written by the reschedule's commit
+    mails.appointment_rescheduled(session, appointment.patient.user.email, patient_name, appointment.hospital.hospital_name, old_time, payload.new_time) #type: ignore
+
     new_appointment = await apt_service.reschedule_appointment(appointment_uid, payload, session, current_user)
 
     new_appointment.updated_at = datetime.now(timezone.utc) #type: ignore
 
-    #inform the patient through email
-    mails.appointment_rescheduled(new_appointment.patient.user.email, patient_name, new_appointment.hospital.hospital_name, old_time, payload.new_time) #type: ignore
-
     return {
         "message": "Appointment rescheduled successfully",
         "appointment": new_appointment
@@ -296,7 +287,7 @@ async def reschedule_appointment(
 
 
 @apt_router.patch('/appointments/assign-practitioner', status_code=status.HTTP_202_ACCEPTED)
-async def assign_practitioner(appointment_uid: uuid.UUID, payload: PractitionerAssign, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def assign_practitioner(appointment_uid: uuid.UUID, payload: PractitionerAssign, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     
     appointment = await apt_service.get_appointment_by_id(appointment_uid, session)
 
@@ -323,19 +314,21 @@ async def assign_practitioner(appointment_uid: uuid.UUID, payload: PractitionerA
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The selected practitioner is currently unavailable")
     
     # Assign practitioner to the appointment
+    before = daily_stats.snapshot(appointment)
     appointment.practitioner_uid = payload.practitioner_uid
     appointment.status = AppointmentStatus.IN_PROGRESS
+    await daily_stats.record_change(session, before, daily_stats.snapshot(appointment))
 
     # Create queue entry
     await queue.create_queue_entry(appointment, session)
 
-    await session.commit()
-    await session.refresh(appointment)
+    await session.flush()
+    appointment = await loaders.reload(appointment, loaders.APPOINTMENT_DETAIL, session)
 
     practitioner_full_name = " ".join(filter(None, [practitioner.first_name, practitioner.last_name]))
 
    
-    #push notification to practitioner
+    #push notification to practitioner (both are written by the commit below)
     await send_notification(session, practitioner.user_uid, {
         "title": "Assigned Appointment",
         "body": f"Hello {practitioner_full_name}, You have been assigned to {appointment.patient.first_name}'s appointment",
@@ -349,4 +342,8 @@ async def assign_practitioner(appointment_uid: uuid.UUID, payload: PractitionerA
         "data": {"appointment_uid": str(appointment.uid)}
     })
 
+    await session.commit()
+
+    await notify_queue_change(appointment)
+
     return {"message": "Practitioner assigned successfully!"}
@@ -1,6 +1,6 @@
 from typing import Optional
 import uuid
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from fastapi.responses import JSONResponse
 from fastapi.security.http import HTTPAuthorizationCredentials
 from fastapi.security import HTTPBearer
@@ -13,20 +13,18 @@ from src.app.services import user as user_service, auth as auth_service, invitat
 from src.app.core.dependencies import get_current_user, refresh_token
 from src.app.core import celery, errors, settings, redis, mails
 from src.app import schemas
+from src.app.core.passwords import hash_password, verify_and_update_password
 from src.app.core.utils import (
-    verify_password, 
     create_access_token, 
     save_refresh_token_jti,
     create_token_blacklist,
     revoke_refresh_token,
-    delete_blacklisted_token,
-    get_blacklisted_token_jti,
+    is_token_blacklisted,
     verify_access_token,
     validate_refresh_token_jti,
     create_url_safe_token,
     decode_url_safe_token,
     decode_password_url_safe_token,
-    hash_password
     )
 
 
@@ -63,7 +61,7 @@ async def register_user(payload: RegisterUser, session: AsyncSession = Depends(g
 
     # token = create_url_safe_token({"email": email})
 
-    # mails.send_verification_email(email, token)
+    # mails.send_verification_email(session, email, token)
 
     # Save the token in Redis
     # await redis.save_email_verification_token(email, token)
@@ -133,11 +131,12 @@ async def super_admin_signup(payload: RegisterAdminUser, session: AsyncSession =
     if existing_user:
         raise errors.UserAlreadyExists()
     
-    new_user = await auth_service.register_super_admin(payload, session)
-
     token = create_url_safe_token({"email": email})
 
-    mails.send_verification_email(email, token)
+    # staged first so the verification email is written by the registration's commit
+    mails.send_verification_email(session, email, token)
+
+    new_user = await auth_service.register_super_admin(payload, session)
 
     # Save the token in Redis
     await redis.save_email_verification_token(email, token)
@@ -163,9 +162,14 @@ async def login(payload: LoginData, session: AsyncSession = Depends(get_session)
         raise errors.AccountNotVerified(user)
 
     # Validate password
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not verified:
         raise errors.InvalidEmailOrPassword()
 
+    # Hashed with an old cost, the refresh token commit below saves the new hash
+    if new_hash:
+        user.hashed_password = new_hash
+
     # Continue only if valid
     access_jti = str(uuid.uuid4())
     refresh_jti = str(uuid.uuid4())
@@ -226,7 +230,7 @@ async def current_user(me: User=Depends(get_current_user)):
 
 
 @auth_router.post('/auth/logout', status_code=status.HTTP_200_OK)
-async def logout(bg_task: BackgroundTasks, credentials: HTTPAuthorizationCredentials = Depends(auth_scheme), session: AsyncSession = Depends(get_session)):
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(auth_scheme), session: AsyncSession = Depends(get_session)):
 
     """
     Logs the user out by revoking their access token via blacklisting.
@@ -246,23 +250,20 @@ async def logout(bg_task: BackgroundTasks, credentials: HTTPAuthorizationCredent
             return
 
         #will not be neccessary just to control exceptions for ease dev exprience
-        revoked_token = await get_blacklisted_token_jti(token_jti, session)
-        if revoked_token:
+        if await is_token_blacklisted(token_jti):
             raise errors.UserLoggedOut()
 
         session_id = token_data.get('session_id')
         if not session_id:
             raise errors.MissingSessionID()
         
-        await create_token_blacklist(token, session)
+        await create_token_blacklist(token)
 
         await revoke_refresh_token(session_id, session)
 
     except ValueError:
         raise errors.InvalidToken()
     
-    bg_task.add_task(delete_blacklisted_token, session)
-
     return {"Message": "User logged out successfully"}
 
 
@@ -344,13 +345,13 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
 #####..........PASSWORD RESET
 
 @auth_router.post('/auth/password-reset')
-async def password_reset_request(email_data: schemas.PasswordResetRequest):
+async def password_reset_request(email_data: schemas.PasswordResetRequest, session: AsyncSession = Depends(get_session)):
     
     email = email_data.email_address
 
     token = create_url_safe_token({"email": email})
 
-    mails.send_password_reset_email(email, token)
+    mails.send_password_reset_email(session, email, token)
 
     return JSONResponse(
         content={"message": "Please check your email for instructions to reset your password."},
@@ -382,7 +383,7 @@ async def confirm_password_reset(passwd_data: schemas.ConfirmPasswordReset, toke
         if not user:
             raise errors.UserNotFound()
         
-        hashed_password = hash_password(new_password)
+        hashed_password = await hash_password(new_password)
         
         await user_service.update_user_info(user, {"hashed_password": hashed_password}, session)
 
@@ -398,11 +399,11 @@ async def confirm_password_reset(passwd_data: schemas.ConfirmPasswordReset, toke
 
 
 @auth_router.post('/send_email', status_code=status.HTTP_200_OK)
-async def send_email(email: EmailModel):
+async def send_email(email: EmailModel, session: AsyncSession = Depends(get_session)):
     mail_to = email.mail_to
 
 
-    mails.send_test(mail_to)
+    mails.send_test(session, mail_to)
 
     return {"message": "email sent successfully!"}
 
@@ -425,7 +426,7 @@ async def invite_practitioner(email: str, notes: str, type: PractitionerType, re
     signup_link = f"{base_url}{signup_path}?token={token}"
 
     #forward the link to the admin's email
-    # mails.hospital_practitioner_invite(email, current_user.hospital.hospital_name, notes, signup_link)
+    # mails.hospital_practitioner_invite(session, email, current_user.hospital.hospital_name, notes, signup_link)
 
     return JSONResponse(
         content={
@@ -453,7 +454,7 @@ async def invite_admin(email: str, notes: str, admin_type: AdminType, request: R
     signup_link = f"{base_url}{signup_path}?token={token}"
 
     #forward the link to the admin's email
-    # mails.hospital_admin_invite(email, current_user.hospital.hospital_name, notes, signup_link)
+    # mails.hospital_admin_invite(session, email, current_user.hospital.hospital_name, notes, signup_link)
 
     return JSONResponse(
         content={
@@ -1,10 +1,11 @@
 from typing import List, Optional
 import uuid
-from fastapi import APIRouter, Depends, status
-from src.app.core.dependencies import get_current_user
+from fastapi import APIRouter, Depends, Query, status
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from src.app.schemas import DepartmentRead, DepartmentCreate, DepartmentUpdate
-from src.app.models import User, Department
+from src.app.schemas import Page, DepartmentRead, DepartmentCreate, DepartmentUpdate
+from src.app.models import Department
 from src.app.services import department as dept_service, hospital as hp_service
 from src.app.database.main import get_session
 from src.app.core import errors, permissions
@@ -22,7 +23,7 @@ delete department
 """
 
 @dept_router.post('/hospitals/departments', status_code=status.HTTP_201_CREATED, response_model=Department, tags=['Hospitals'])
-async def add_department(hospital_uid: uuid.UUID, payload: DepartmentCreate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def add_department(hospital_uid: uuid.UUID, payload: DepartmentCreate, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     #check hospital availability
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
@@ -38,15 +39,15 @@ async def add_department(hospital_uid: uuid.UUID, payload: DepartmentCreate, ses
     return department
 
 
-@dept_router.get('/departments', status_code=status.HTTP_200_OK, response_model=List[Department], tags=['Hospitals'])
-async def list_departments(skip: int = 0, limit: int = 10, search: Optional[str] = "", session: AsyncSession = Depends(get_session)):
+@dept_router.get('/departments', status_code=status.HTTP_200_OK, response_model=Page[Department], tags=['Hospitals'])
+async def list_departments(limit: int = 10, search: Optional[str] = "", cursor: Optional[str] = None, skip: Optional[int] = Query(None, deprecated=True), session: AsyncSession = Depends(get_session)):
 
     """
     Patients should be able to view all departments on hospitals across the platform.
     This will help them identify which hospital to book appointment with
     """
 
-    departments = await dept_service.list_departments(skip, limit, search, session)
+    departments = await dept_service.list_departments(limit, search, session, cursor=cursor, skip=skip)
     
     return departments
 
@@ -76,7 +77,7 @@ async def get_hospital_departments(hospital_uid: uuid.UUID, session: AsyncSessio
     return department
 
 @dept_router.patch('/departments/update', status_code=status.HTTP_202_ACCEPTED, response_model=Department)
-async def update_department(department_uid: uuid.UUID, payload: DepartmentUpdate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def update_department(department_uid: uuid.UUID, payload: DepartmentUpdate, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     department = await dept_service.get_department_by_id(department_uid, session)
 
@@ -92,7 +93,7 @@ async def update_department(department_uid: uuid.UUID, payload: DepartmentUpdate
 
 
 @dept_router.delete('/departments/remove-department', status_code=status.HTTP_204_NO_CONTENT)
-async def remove_department(department_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def remove_department(department_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     department_to_remove = await dept_service.get_department_by_id(department_uid, session)
     
@@ -1,10 +1,11 @@
 from typing import List, Optional
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
-from src.app.core.dependencies import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from src.app.core.dependencies import get_current_user, get_current_principal
+from src.app.core.principal import Principal
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from src.app import schemas, models
-from src.app.services import hospital as hp_service, admins as ad_service, notification, review
+from src.app.services import hospital as hp_service, admins as ad_service, notification, review, statistics as stats_service, hospital_search
 from src.app.core import errors, permissions
 from src.app.database.main import get_session
 from fastapi import UploadFile, File
@@ -24,7 +25,7 @@ delete/remove hospital
 """
 
 @hp_router.patch('/hospitals/profile-update', status_code=status.HTTP_200_OK, response_model=schemas.HospitalRead)
-async def update_hospital_profile(hospital_uid: uuid.UUID, payload: schemas.HospitalProfileUpdate, session: AsyncSession = Depends(get_session), current_user: models.Hospital = Depends(get_current_user)):
+async def update_hospital_profile(hospital_uid: uuid.UUID, payload: schemas.HospitalProfileUpdate, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """
     Update the hospital profile with the given payload.
@@ -47,31 +48,34 @@ async def update_hospital_profile(hospital_uid: uuid.UUID, payload: schemas.Hosp
     return updated_hospital
 
 
-@hp_router.get("/hospitals", status_code=status.HTTP_200_OK, response_model=List[schemas.HospitalRead])
+@hp_router.get("/hospitals", status_code=status.HTTP_200_OK, response_model=schemas.Page[schemas.HospitalCard])
 async def get_all_hospitals(
-    skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    skip: Optional[int] = Query(None, deprecated=True),
     search: Optional[str] = None,
     location: Optional[str] = None,
     session: AsyncSession = Depends(get_session)
 ):
+    """Search hospitals by name, place or description, best matches first. Without search or location they are listed by name."""
 
-    hospitals = await hp_service.get_hospitals(skip, limit, session, search=search, location=location)
+    hospitals = await hospital_search.search_hospitals(session, limit, search=search, location=location, cursor=cursor, skip=skip)
 
     return hospitals
 
 
-@hp_router.get("/hospitals/by-location", status_code=status.HTTP_200_OK, response_model=List[schemas.HospitalRead])
+@hp_router.get("/hospitals/by-location", status_code=status.HTTP_200_OK, response_model=schemas.Page[schemas.HospitalCard])
 async def get_hospitals_by_location(
     location: str,
-    skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    skip: Optional[int] = Query(None, deprecated=True),
     session: AsyncSession = Depends(get_session),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Return hospitals whose address or state matches the requested location."""
 
-    hospitals = await hp_service.get_hospitals(skip, limit, session, search=None, location=location)
+    hospitals = await hospital_search.search_hospitals(session, limit, location=location, cursor=cursor, skip=skip)
 
     return hospitals
 
@@ -80,7 +84,7 @@ async def get_hospitals_by_location(
 #response_model=List[schemas.HospitalDoctors]
 
 @hp_router.get('/hospitals/practitioners', status_code=status.HTTP_200_OK, response_model=List[schemas.PractitionerRead])
-async def view_hospital_practitioners(hospital_uid: uuid.UUID, availability: bool | None = None, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def view_hospital_practitioners(hospital_uid: uuid.UUID, availability: bool | None = None, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
 
@@ -93,7 +97,7 @@ async def view_hospital_practitioners(hospital_uid: uuid.UUID, availability: boo
 
 
 @hp_router.get('/hospitals/hospital-appointments', status_code=status.HTTP_200_OK, response_model=List[schemas.AppointmentRead])
-async def view_hospital_appointments(hospital_uid: uuid.UUID, status: models.ViewAppointmentStatus, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def view_hospital_appointments(hospital_uid: uuid.UUID, status: models.ViewAppointmentStatus, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
 
@@ -113,7 +117,7 @@ async def view_hospital_appointments(hospital_uid: uuid.UUID, status: models.Vie
 
 
 @hp_router.get('/hospitals/single-hospital', status_code=status.HTTP_200_OK, response_model=schemas.HospitalRead)
-async def get_single_hospital(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_single_hospital(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
 
@@ -124,20 +128,20 @@ async def get_single_hospital(hospital_uid: uuid.UUID, session: AsyncSession = D
 
 
 @hp_router.get('/hospitals/appointment-stats', status_code=status.HTTP_200_OK, response_model=schemas.HospitalAppointmentStats)
-async def get_hospital_appointment_stats(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_hospital_appointment_stats(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
 
     if not hospital:
         raise errors.HospitalNotFound()
     
-    stats = await hp_service.get_hospital_appointment_stats(hospital_uid, session)
+    stats = await stats_service.get_hospital_appointment_stats(hospital_uid, session)
 
     return stats
 
 
 @hp_router.post('/hospitals/ratings', status_code=status.HTTP_200_OK, response_model=schemas.HospitalRead)
-async def rate_hospital(hospital_uid: uuid.UUID, payload: schemas.HospitalRatingCreate, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def rate_hospital(hospital_uid: uuid.UUID, payload: schemas.HospitalRatingCreate, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
 
     if not hospital:
@@ -149,7 +153,7 @@ async def rate_hospital(hospital_uid: uuid.UUID, payload: schemas.HospitalRating
 
 
 @hp_router.delete('/hospitals/delete-hospital', status_code=status.HTTP_204_NO_CONTENT)
-async def delete_hospital(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def delete_hospital(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     #hospital availability check
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
@@ -166,7 +170,7 @@ async def delete_hospital(hospital_uid: uuid.UUID, session: AsyncSession = Depen
 
 
 @hp_router.patch('/hospitals/assign-duty', status_code=status.HTTP_200_OK)
-async def assign_duty(admin_uid: uuid.UUID, payload: schemas.AssignAdminDuty, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def assign_duty(admin_uid: uuid.UUID, payload: schemas.AssignAdminDuty, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """
     Helps hospitals assign duties to department admins.
@@ -229,27 +233,28 @@ async def update_cover_image(
     return current_user
 
 @hp_router.get("/hospitals/hospital_patients", status_code=status.HTTP_200_OK, response_model=List[schemas.HospitalPatientRead])
-async def get_hospital_patients(session: AsyncSession=Depends(get_session), current_user:models.User = Depends(get_current_user)):
+async def get_hospital_patients(session: AsyncSession=Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     
-    if not current_user.hospital:
+    if not current_user.owned_hospital_uid:
         raise errors.HospitalNotFound()
     
-    hospital_patients = await hp_service.get_hospital_patients(current_user.hospital.uid, session)
+    hospital_patients = await hp_service.get_hospital_patients(current_user.owned_hospital_uid, session)
 
     return hospital_patients
 
 
-@hp_router.get("/hospitals/reviews", response_model=list[schemas.ReviewRead], tags=["Reviews"])
-async def get_hospital_reviews(offset: int = 0, limit: int = 20, current_user: models.User=Depends(get_current_user), session: AsyncSession=Depends(get_session),):
+@hp_router.get("/hospitals/reviews", response_model=schemas.Page[schemas.ReviewRead], tags=["Reviews"])
+async def get_hospital_reviews(limit: int = 20, cursor: Optional[str] = None, offset: Optional[int] = Query(None, deprecated=True), current_user: Principal = Depends(get_current_principal), session: AsyncSession=Depends(get_session),):
 
-    if not current_user.hospital:
+    if not current_user.owned_hospital_uid:
         raise errors.NotAuthorized()
 
     reviews = await review.get_hospital_reviews(
-        hospital_uid=current_user.hospital.uid,
-        offset=offset,
+        hospital_uid=current_user.owned_hospital_uid,
         limit=limit,
         session=session,
+        cursor=cursor,
+        offset=offset,
     )
 
     return reviews
\ No newline at end of file
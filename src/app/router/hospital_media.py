@@ -1,14 +1,15 @@
 from datetime import datetime, timezone
 from typing import List, Optional
 import uuid
-from fastapi import APIRouter, Depends, File, Form, UploadFile, status, HTTPException
-from src.app.core.dependencies import get_current_user
-from src.app.models import User
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, UploadFile, status, HTTPException
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from src.app.database.main import get_session
 from src.app.core import errors, validate_upload
 from src.app.schemas import HospitalMediaRead
 from src.app.services import hospital_media, upload_service, hospital as hp_service
+from src.app.models import MediaStatus
 
 
 """
@@ -26,49 +27,136 @@ media_router = APIRouter(
     tags=['Hospital Media']
 )
 
+MEDIA_FOLDER = "queuemedix/hospital_media"
+MEDIA_TYPES = {
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+}
+MEDIA_MAX_SIZE = 5 * 1024 * 1024
+MEDIA_BATCH_LIMIT = 10 #Files a single batch upload may carry
+
 @media_router.post("/hospitals/media", response_model=HospitalMediaRead, status_code=status.HTTP_201_CREATED,)
 async def upload_hospital_media(
+    background_tasks: BackgroundTasks,
     caption: str | None = Form(None),
     display_order: int = Form(0),
     is_cover: bool = Form(False),
+    defer: bool = Form(False),
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
-    if not current_user.hospital:
+    """
+    Upload one image. With defer the record comes back as pending straight away
+    and turns ready (or failed) once the upload finishes in the background.
+    """
+    if not current_user.owned_hospital_uid:
         raise errors.NotAuthorized()
     
     await validate_upload.validate_upload(
         file=file,
-        allowed_types={
-            "image/jpeg",
-            "image/png",
-            "image/webp",
-        },
-        max_size=5 * 1024 * 1024,
+        allowed_types=MEDIA_TYPES,
+        max_size=MEDIA_MAX_SIZE,
     )
 
+    if defer:
+        path = await upload_service.stash_upload(file)
+
+        try:
+            media = await hospital_media.create_hospital_media(
+                hospital_uid=current_user.owned_hospital_uid,
+                file_url="",
+                public_id="",
+                caption=caption, #type: ignore
+                display_order=display_order,
+                is_cover=is_cover,
+                width=0,
+                height=0,
+                file_size=file.size or 0,
+                status=MediaStatus.PENDING,
+                session=session,
+            )
+        except Exception:
+            # no background task will pick the stash up
+            upload_service.discard_stash(path)
+            raise
+
+        background_tasks.add_task(hospital_media.finalize_hospital_media, media.uid, path, MEDIA_FOLDER, file.filename)
+
+        return media
+
     upload = await upload_service.upload_hospital_media(
         file=file,
-        folder="queuemedix/hospital_media",
+        folder=MEDIA_FOLDER,
     )
 
-    media = await hospital_media.create_hospital_media(
-        hospital_uid=current_user.hospital.uid,
-        file_url=upload["url"],
-        public_id=upload["public_id"],
-        caption=caption, #type: ignore
-        display_order=display_order,
-        is_cover=is_cover,
-        width=upload["width"],
-        height=upload["height"],
-        file_size=upload["bytes"],
-        session=session,
-    )
+    try:
+        media = await hospital_media.create_hospital_media(
+            hospital_uid=current_user.owned_hospital_uid,
+            file_url=upload["url"],
+            public_id=upload["public_id"],
+            caption=caption, #type: ignore
+            display_order=display_order,
+            is_cover=is_cover,
+            width=upload["width"],
+            height=upload["height"],
+            file_size=upload["bytes"],
+            derivatives=upload["derivatives"],
+            session=session,
+        )
+    except Exception:
+        # the files are stored but no record points to them
+        await upload_service.discard_uploads([upload])
+        raise
 
     return media
 
 
+@media_router.post("/hospitals/media/batch", response_model=List[HospitalMediaRead], status_code=status.HTTP_201_CREATED,)
+async def upload_hospital_media_batch(
+    caption: str | None = Form(None),
+    display_order: int = Form(0),
+    files: List[UploadFile] = File(...),
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Upload several images at once, they are sent to storage concurrently.
+    """
+    if not current_user.owned_hospital_uid:
+        raise errors.NotAuthorized()
+
+    if len(files) > MEDIA_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MEDIA_BATCH_LIMIT} files can be uploaded at once"
+        )
+
+    for file in files:
+        await validate_upload.validate_upload(
+            file=file,
+            allowed_types=MEDIA_TYPES,
+            max_size=MEDIA_MAX_SIZE,
+        )
+
+    uploads = await upload_service.upload_hospital_medias(files, folder=MEDIA_FOLDER)
+
+    try:
+        medias = await hospital_media.create_hospital_media_batch(
+            hospital_uid=current_user.owned_hospital_uid,
+            uploads=uploads,
+            caption=caption,
+            display_order=display_order,
+            session=session,
+        )
+    except Exception:
+        await upload_service.discard_uploads(uploads)
+        raise
+
+    return medias
+
+
 @media_router.get("/hospitals/media", status_code=status.HTTP_200_OK, response_model=List[HospitalMediaRead])
 async def get_hospital_medias(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session)):
 
@@ -82,12 +170,12 @@ async def get_hospital_medias(hospital_uid: uuid.UUID, session: AsyncSession = D
 
 
 @media_router.get("/hospitals/media/{media_uid}", status_code=status.HTTP_200_OK, response_model=HospitalMediaRead)
-async def get_hospital_media(media_uid: uuid.UUID, session: AsyncSession=Depends(get_session), current_user: User = Depends(get_current_user)):
+async def get_hospital_media(media_uid: uuid.UUID, session: AsyncSession=Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
-    if not current_user.hospital:
+    if not current_user.owned_hospital_uid:
         raise errors.HospitalNotFound()
 
-    media = await hospital_media.get_hospital_media(media_uid, current_user.hospital.uid, session)
+    media = await hospital_media.get_hospital_media(media_uid, current_user.owned_hospital_uid, session)
     if not media:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,19 +186,19 @@ async def get_hospital_media(media_uid: uuid.UUID, session: AsyncSession=Depends
 
 
 @media_router.delete("/hospitals/media/{media_uid}")
-async def delete_hospital_media(media_uid: uuid.UUID, session: AsyncSession=Depends(get_session), current_user: User=Depends(get_current_user)):
+async def delete_hospital_media(media_uid: uuid.UUID, session: AsyncSession=Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
-    if not current_user.hospital:
+    if not current_user.owned_hospital_uid:
         raise errors.HospitalNotFound()
     
-    media = await hospital_media.get_hospital_media(media_uid, current_user.hospital.uid, session)
+    media = await hospital_media.get_hospital_media(media_uid, current_user.owned_hospital_uid, session)
     if not media:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Media not found"
         )
     
-    await hospital_media.delete_hospital_media(current_user.hospital.uid, media.uid, session)
+    await hospital_media.delete_hospital_media(current_user.owned_hospital_uid, media.uid, session)
 
     return {"message": "Media deleted successfully!"}
     
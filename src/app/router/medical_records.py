@@ -1,17 +1,15 @@
 import uuid
 from src.app.core import permissions
 from src.app.schemas import MedicalRecordCreate
-from src.app.models import (
-    MedicalRecord,
-    User,
-)
+from src.app.models import MedicalRecord
 from datetime import datetime
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from src.app.core.dependencies import get_current_user
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
 from src.app.database.main import get_session
-from src.app.schemas import MedicalRecordUpdate, MedicalRecordRead
+from src.app.schemas import MedicalRecordUpdate, MedicalRecordRead, Page
 from src.app.services import medical_records as med_service, appointment as apt_service
 from src.app.core import errors as exec_errors
 
@@ -23,7 +21,7 @@ async def create_medical_record(
     appointment_id: uuid.UUID,
     payload: MedicalRecordCreate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Practitioners or hospital admins create medical records through appointment routes.
@@ -49,7 +47,7 @@ async def create_medical_record(
 
 
 @med_router.get("/medical_records/hospital-medical-records", status_code=status.HTTP_200_OK, response_model=List[MedicalRecord])
-async def get_hospital_medical_records(hospital_id: uuid.UUID, offset: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def get_hospital_medical_records(hospital_id: uuid.UUID, offset: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     
     # Role check only hospital admin and department admin can access
     permissions.get_hospital_medical_record_access(current_user, hospital_id)
@@ -63,7 +61,7 @@ async def get_hospital_medical_records(hospital_id: uuid.UUID, offset: int = 0,
 async def get_medical_record(
     record_id: uuid.UUID,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     
     record = await med_service.get_medical_record_by_id(record_id, session)
@@ -77,19 +75,20 @@ async def get_medical_record(
 
 
 # Get patient medical records
-@med_router.get("/medical_records/patient-records", status_code=status.HTTP_200_OK, response_model=List[MedicalRecordRead])
+@med_router.get("/medical_records/patient-records", status_code=status.HTTP_200_OK, response_model=Page[MedicalRecordRead])
 async def get_patient_medical_records(
     patient_id: uuid.UUID,
     hospital_id: uuid.UUID,
-    offset: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    offset: Optional[int] = Query(None, deprecated=True),
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     # Role check - only hospital admins, department admins, practitioner and patients can access
     permissions.can_access_patient_medical_records(current_user, patient_id, hospital_id)
     
-    records = await med_service.get_medical_record_by_patient(patient_id, hospital_id, offset, limit, session)
+    records = await med_service.get_medical_record_by_patient(patient_id, hospital_id, limit, session, cursor=cursor, offset=offset)
 
     return records
 
@@ -99,7 +98,7 @@ async def update_medical_record_endpoint(
     record_id: uuid.UUID,
     payload: MedicalRecordUpdate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     
     # Fetch existing record
@@ -125,7 +124,7 @@ async def search_medical_records_endpoint(
         date_from: Optional[datetime] = Query(None),
         date_to: Optional[datetime] = Query(None),
         session: AsyncSession = Depends(get_session),
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_principal),
     ):
 
     # Role check - only practitioners and hospital admins can search medical records
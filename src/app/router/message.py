@@ -1,11 +1,13 @@
+import uuid
+from typing import Optional
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.app.schemas import MessageCreate, MessageUpdate, MessageRead, DataPlusMessage
+from src.app.schemas import MessageCreate, MessageUpdate, MessageRead, MessagePage, DataPlusMessage, Page, ConversationRead, ConversationMarkRead, ConversationReadReceipt
 from src.app.services import message as m_service, user as user_service
 from src.app.database.main import get_session
 from src.app.websocket.connection_manager import manager
-from src.app.models import User
-from src.app.core.dependencies import get_current_user
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
 from src.app.core import errors
 
 router = APIRouter(tags=['Messages'])
@@ -16,7 +18,7 @@ ws_router = APIRouter(tags=['Messages', 'Websockets'])
 async def send_message(
     payload: MessageCreate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Create a new message via REST.
@@ -55,27 +57,78 @@ async def websocket_dm(
         while True:
             await websocket.receive_text()  # Keep alive (or ping/pong)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, channel="dm", room_id=hospital_uid)
+        await manager.disconnect(websocket, channel="dm", room_id=hospital_uid)
 
 
 #Get chat history
-@router.get("/chat/history/{other_user_id}", response_model=list[MessageRead])
+@router.get("/chat/history/{other_user_id}", response_model=MessagePage)
 async def get_chat_history(
-    other_user_id: str,
+    other_user_id: uuid.UUID,
+    limit: int = 50,
+    before: Optional[str] = None,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
    
-    """Fetch chat history between the logged-in user and another user."""
+    """
+    Fetch chat history between the logged-in user and another user, newest page first.
+    Pass before_cursor back as before to scroll to older messages, and keep since_cursor of the newest page for /chat/sync.
+    """
+
+    return await m_service.get_chat_history(other_user_id, session, current_user, limit=limit, before=before)
+
+
+#Sync missed messages
+@router.get("/chat/sync/{other_user_id}", response_model=MessagePage)
+async def sync_chat(
+    other_user_id: uuid.UUID,
+    since: Optional[str] = None,
+    limit: int = 100,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+
+    """
+    Fetch only the messages sent after since, e.g. after a reconnect.
+    Pass since_cursor back as since next time; while has_more is true call again straight away.
+    """
+
+    return await m_service.sync_chat(other_user_id, since, session, current_user, limit=limit)
+
+
+#Inbox
+@router.get("/conversations", response_model=Page[ConversationRead])
+async def get_conversations(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+
+    """List the logged-in user's conversations, most recent first, each with its last message and unread count."""
+
+    return await m_service.get_conversations(session, current_user, limit=limit, cursor=cursor)
+
+
+#Mark a conversation read
+@router.patch("/conversations/{peer_uid}/read", response_model=ConversationReadReceipt)
+async def mark_conversation_read(
+    peer_uid: uuid.UUID,
+    payload: Optional[ConversationMarkRead] = None,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_principal),
+):
+
+    """Mark every message received from peer_uid up to up_to read at once (everything so far without a body)."""
 
-    message = await m_service.get_chat_history(other_user_id, session, current_user)
+    up_to = payload.up_to if payload else None
 
-    return message
+    return await m_service.mark_conversation_read(peer_uid, up_to, session, current_user)
 
 
 #Edit message
 @router.patch("/messages/{message_uid}", response_model=MessageRead)
-async def edit_message(message_uid: str, payload: MessageUpdate, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def edit_message(message_uid: str, payload: MessageUpdate, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """Edit chat message."""
 
@@ -94,7 +147,7 @@ async def edit_message(message_uid: str, payload: MessageUpdate, session: AsyncS
 
 #Delete message
 @router.delete("/messages/{message_uid}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_message(message_uid: str, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def delete_message(message_uid: str, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """Delete chat message."""
 
@@ -111,7 +164,7 @@ async def delete_message(message_uid: str, session: AsyncSession = Depends(get_s
 
 #Mark message as read
 @router.patch("/messages/{message_uid}/read_receipt", response_model=MessageRead)
-async def mark_message_as_read(message_uid: str, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def mark_message_as_read(message_uid: str, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """Use this endpont to toggle "is_read" field to "True" when a message is opened"""
 
@@ -0,0 +1,55 @@
+from typing import Optional
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
+from src.app.schemas import Page, NotificationRead, NotificationMarkRead, NotificationUnreadCount, NotificationReadReceipt
+from src.app.services import notification as notif_service
+from src.app.database.main import get_session
+
+
+notification_router = APIRouter(
+    tags=['Notifications']
+)
+
+
+@notification_router.get("/notifications", response_model=Page[NotificationRead])
+async def get_notifications(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    unread_only: bool = False,
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
+):
+
+    """The logged-in user's notifications, newest first."""
+
+    return await notif_service.get_notifications(current_user.uid, session, limit=limit, cursor=cursor, unread_only=unread_only)
+
+
+@notification_router.get("/notifications/unread_count", response_model=NotificationUnreadCount)
+async def get_unread_count(
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
+):
+
+    """Unread badge count, read from a maintained counter rather than counted."""
+
+    return {"unread_count": await notif_service.get_unread_count(current_user.uid, session)}
+
+
+@notification_router.patch("/notifications/read", response_model=NotificationReadReceipt)
+async def mark_notifications_read(
+    payload: Optional[NotificationMarkRead] = None,
+    current_user: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_session),
+):
+
+    """
+    Mark notifications read in one go: the uids listed, or everything up to up_to.
+    Without a body every notification received so far is marked read.
+    """
+
+    payload = payload or NotificationMarkRead()
+
+    return await notif_service.mark_notifications_read(current_user.uid, session, uids=payload.uids, up_to=payload.up_to)
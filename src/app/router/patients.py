@@ -1,12 +1,13 @@
 import uuid
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from typing import Optional, List
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from src.app.database.main import get_session
-from src.app.core.dependencies import get_current_user
-from src.app.schemas import PatientProfileUpdate, PatientRead, PatientHospitalRead, ReviewRead
-from src.app.models import User, UserRoles, Admin, AdminType
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
+from src.app.schemas import Page, PatientProfileUpdate, PatientRead, PatientHospitalRead, ReviewRead
+from src.app.models import UserRoles, AdminType
 from src.app.services import patients as pat_service, hospital as hp_service, review
 from src.app.core import errors
 
@@ -17,7 +18,7 @@ pat_router = APIRouter(
 
 
 @pat_router.patch('/patients/profile-update', status_code=status.HTTP_200_OK, response_model=PatientRead)
-async def update_patient_profile(patient_uid: uuid.UUID, payload: PatientProfileUpdate, session: AsyncSession=Depends(get_session), current_user: User = Depends(get_current_user)):
+async def update_patient_profile(patient_uid: uuid.UUID, payload: PatientProfileUpdate, session: AsyncSession=Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """
     Update patient route
@@ -40,7 +41,7 @@ async def update_patient_profile(patient_uid: uuid.UUID, payload: PatientProfile
 
 
 @pat_router.get("/patients", status_code=status.HTTP_200_OK, response_model=List[PatientRead])
-async def get_all_patients(skip: int = 0, limit: int = 10, search: Optional[str] = "", session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def get_all_patients(skip: int = 0, limit: int = 10, search: Optional[str] = "", session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """
     Only Admins, Practitioners, Hospitals has access to pull or view all patients
@@ -58,7 +59,7 @@ async def get_all_patients(skip: int = 0, limit: int = 10, search: Optional[str]
     return patients
 
 @pat_router.get('/patients/single-patient', status_code=status.HTTP_200_OK, response_model=PatientRead)
-async def get_single_patient(patient_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def get_single_patient(patient_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """
     Only Admins, Practitioners, Hospitals or the Patient itself has the access to pull or view patient's info by uid.
@@ -70,7 +71,7 @@ async def get_single_patient(patient_uid: uuid.UUID, session: AsyncSession = Dep
         raise errors.PatientNotFound()
     
     #authorized user
-    is_hospital = (current_user.hospital is not None and current_user.role in [UserRoles.HOSPITAL, UserRoles.ADMIN])
+    is_hospital = (current_user.owned_hospital_uid is not None)
 
     is_patient = (current_user.uid == patient.user_uid)
 
@@ -80,7 +81,7 @@ async def get_single_patient(patient_uid: uuid.UUID, session: AsyncSession = Dep
     return patient
 
 @pat_router.get('/patients/patient-card', status_code=status.HTTP_200_OK, response_model=PatientRead)
-async def fetch_patient(patient_card_id: str, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def fetch_patient(patient_card_id: str, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """
     Only Admins, Practitioners, Hospitals or the Patient itself has the access to pull or view patient's info by patient hospital card id.
@@ -102,7 +103,7 @@ async def fetch_patient(patient_card_id: str, session: AsyncSession = Depends(ge
 
 
 @pat_router.delete('/patients/{patient_uid}', status_code=status.HTTP_204_NO_CONTENT)
-async def delete_patient(patient_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user), admin_user: Admin = Depends(get_current_user)):
+async def delete_patient(patient_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
     """
     Only Admins[SUPER_ADMIN, HOSPITAL_ADMIN], or the Patient itself has the access to delete.
@@ -117,7 +118,7 @@ async def delete_patient(patient_uid: uuid.UUID, session: AsyncSession = Depends
     allowed_admins = {AdminType.SUPER_ADMIN, AdminType.HOSPITAL_ADMIN}
 
     # Check if current user is an admin(endpoint is only accessible to super admins and hospital admins)
-    if admin_user.admin_type not in allowed_admins and current_user.uid != patient.user_uid:
+    if current_user.admin_type not in allowed_admins and current_user.uid != patient.user_uid:
         raise errors.NotAuthorized()
     
     
@@ -125,27 +126,28 @@ async def delete_patient(patient_uid: uuid.UUID, session: AsyncSession = Depends
 
 
 @pat_router.get("/patients/patient_hospitals", status_code=status.HTTP_200_OK, response_model=List[PatientHospitalRead])
-async def get_hospital_patients(session: AsyncSession=Depends(get_session), current_user:User = Depends(get_current_user)):
+async def get_hospital_patients(session: AsyncSession=Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     
-    if not current_user.patient:
+    if current_user.patient_uid is None:
         raise errors.PatientNotFound()
     
-    patient_hospitals = await hp_service.get_patient_hospitals(current_user.patient.uid, session)
+    patient_hospitals = await hp_service.get_patient_hospitals(current_user.patient_uid, session)
 
     return patient_hospitals
 
 
-@pat_router.get("/patients/reviews", response_model=list[ReviewRead], tags=["Reviews"])
-async def get_patient_reviews(offset: int = 0, limit: int = 20, current_user: User=Depends(get_current_user), session: AsyncSession=Depends(get_session),):
+@pat_router.get("/patients/reviews", response_model=Page[ReviewRead], tags=["Reviews"])
+async def get_patient_reviews(limit: int = 20, cursor: Optional[str] = None, offset: Optional[int] = Query(None, deprecated=True), current_user: Principal = Depends(get_current_principal), session: AsyncSession=Depends(get_session),):
 
-    if not current_user.patient:
+    if current_user.patient_uid is None:
         raise errors.NotAuthorized()
 
     reviews = await review.get_patient_reviews(
-        patient_uid=current_user.patient.uid,
-        offset=offset,
+        patient_uid=current_user.patient_uid,
         limit=limit,
         session=session,
+        cursor=cursor,
+        offset=offset,
     )
 
     return reviews
\ No newline at end of file
@@ -1,11 +1,11 @@
 # from pydoc import doc
-from typing import List
+from typing import List, Optional
 import uuid
 from fastapi import APIRouter, Depends, Query, status, HTTPException
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from src.app.models import AdminType, PractitionerStatus, User, UserRoles, PractitionerType
 from src.app.core.dependencies import AccessTokenBearer, get_current_user
-from src.app.schemas import PractitionerProfileUpdate, PractitionerRead, ReviewRead
+from src.app.schemas import Page, PractitionerProfileUpdate, PractitionerRead, ReviewRead
 from src.app.services import practitioners as pract_services, review
 from src.app.database.main import get_session
 from src.app.core import errors
@@ -72,11 +72,12 @@ async def search_practitioners(
 
 
 @practitioner_router.get(
-    "/", response_model=List[PractitionerRead], status_code=status.HTTP_200_OK
+    "/", response_model=Page[PractitionerRead], status_code=status.HTTP_200_OK
 )
 async def get_all_practitioners(
-    skip: int = 0,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    skip: Optional[int] = Query(None, deprecated=True),
     practioner_type: PractitionerType | None = None,
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
@@ -95,7 +96,7 @@ async def get_all_practitioners(
     
 
     practitioners = await pract_services.get_all_practitioners(
-        skip=skip, limit=limit, practitioner_type=practioner_type, session=session
+        limit=limit, practitioner_type=practioner_type, session=session, cursor=cursor, skip=skip
     )
 
     return practitioners
@@ -279,17 +280,18 @@ async def update_practitioner_profile(practitioner_id: uuid.UUID, update_data: P
     
     return updated_practitioner
 
-@practitioner_router.get("/reviews", response_model=list[ReviewRead], tags=["Reviews"])
-async def get_practitioner_reviews(offset: int = 0, limit: int = 20, current_user: User=Depends(get_current_user), session: AsyncSession=Depends(get_session),):
+@practitioner_router.get("/reviews", response_model=Page[ReviewRead], tags=["Reviews"])
+async def get_practitioner_reviews(limit: int = 20, cursor: Optional[str] = None, offset: Optional[int] = Query(None, deprecated=True), current_user: User=Depends(get_current_user), session: AsyncSession=Depends(get_session),):
 
     if not current_user.practitioner:
         raise errors.NotAuthorized()
 
     reviews = await review.get_practitioner_reviews(
         practitioner_uid=current_user.practitioner.uid,
-        offset=offset,
         limit=limit,
         session=session,
+        cursor=cursor,
+        offset=offset,
     )
 
     return reviews
\ No newline at end of file
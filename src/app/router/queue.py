@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, status, HTTPException
-from src.app.core.dependencies import  get_current_user
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from src.app.models import User
-from src.app.services import queue, patients
+from src.app.services import queue
 from src.app.database.main import get_session
 from src.app.core import errors
 
@@ -17,14 +17,12 @@ queue_router = APIRouter(
 
 
 @queue_router.get('/queues/me', status_code=status.HTTP_200_OK)
-async def get_my_queue_status(session: AsyncSession = Depends(get_session), current_user: User = Depends(get_current_user)):
+async def get_my_queue_status(session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
 
-    patient = await patients.get_patient_by_user_uid(current_user.uid, session)
-
-    if not patient:
+    if current_user.patient_uid is None:
         raise errors.PatientNotFound()
     
-    queue_entry = await queue.get_active_queue_entry_by_patient_uid(session, patient.uid)
+    queue_entry = await queue.get_active_queue_entry_by_patient_uid(session, current_user.patient_uid)
 
     if not queue_entry:
         raise HTTPException(
@@ -33,15 +31,14 @@ async def get_my_queue_status(session: AsyncSession = Depends(get_session), curr
         )
     
 
-    patients_ahead = await queue.count_patients_ahead(session, queue_entry.queue_uid, queue_entry.queue_number)
-
-    position = patients_ahead + 1
+    live = await queue.get_queue_position(session, queue_entry)
 
     return {
     "queue_entry_uid": queue_entry.uid,
     "queue_number": queue_entry.queue_number,
-    "position": position,
-    "patients_ahead": patients_ahead,
+    "position": live["position"],
+    "patients_ahead": live["patients_ahead"],
+    "now_serving": live["now_serving"],
     "status": queue_entry.status,
     "hospital_name": queue_entry.queues.hospital.hospital_name,
     "queue_name": queue_entry.queues.name
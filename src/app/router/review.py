@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, status
-from src.app.core.dependencies import get_current_user
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from src.app.schemas import ReviewCreate, ReviewRead
-from src.app.models import User
 from src.app.services import review
 from src.app.database.main import get_session
 
@@ -15,7 +15,7 @@ review_router = APIRouter(
 @review_router.post("/reviews", response_model=ReviewRead, status_code=status.HTTP_201_CREATED,)
 async def create_review(
     review_data: ReviewCreate,
-    current_user: User=Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     session: AsyncSession=Depends(get_session),
 ):
     return await review.create_review(
@@ -1,10 +1,14 @@
+import os
 import uuid
+from typing import Optional
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from src.app.core.dependencies import get_current_user
+from src.app.core.dependencies import get_current_principal
+from src.app.core.principal import Principal
 from src.app import schemas, models
-from src.app.services import statistics as stats_service, hospital as hp_service
-from src.app.core import errors
+from src.app.services import statistics as stats_service, hospital as hp_service, jobs as jobs_service
+from src.app.core import errors, permissions, redis
+from src.app.core.passwords import password_hasher
 from src.app.database.main import get_session
 
 stats_router = APIRouter(
@@ -14,7 +18,7 @@ stats_router = APIRouter(
 # Hospital Statistics Endpoints
 
 @stats_router.get('/hospitals/appointment-stats', status_code=status.HTTP_200_OK, response_model=schemas.HospitalAppointmentStats)
-async def get_hospital_appointment_stats(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_hospital_appointment_stats(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get core appointment statistics for a hospital"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -24,8 +28,18 @@ async def get_hospital_appointment_stats(hospital_uid: uuid.UUID, session: Async
     return stats
 
 
+@stats_router.get('/hospitals/dashboard', status_code=status.HTTP_200_OK, response_model=schemas.HospitalDashboard)
+async def get_hospital_dashboard(hospital_uid: uuid.UUID, limit: int = 5, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    """Get every dashboard statistic for a hospital in one call"""
+    hospital = await hp_service.get_single_hospital(hospital_uid, session)
+    if not hospital:
+        raise errors.HospitalNotFound()
+
+    return await stats_service.get_hospital_dashboard(hospital_uid, session, limit)
+
+
 @stats_router.get('/hospitals/time-based-stats', status_code=status.HTTP_200_OK)
-async def get_hospital_time_based_stats(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_hospital_time_based_stats(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get time-based appointment statistics for a hospital"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -36,7 +50,7 @@ async def get_hospital_time_based_stats(hospital_uid: uuid.UUID, session: AsyncS
 
 
 @stats_router.get('/hospitals/average-appointments-per-day', status_code=status.HTTP_200_OK)
-async def get_hospital_average_appointments_per_day(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_hospital_average_appointments_per_day(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get average appointments per day for a hospital"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -47,7 +61,7 @@ async def get_hospital_average_appointments_per_day(hospital_uid: uuid.UUID, ses
 
 
 @stats_router.get('/hospitals/rescheduled-appointments', status_code=status.HTTP_200_OK)
-async def get_hospital_rescheduled_appointments(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_hospital_rescheduled_appointments(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get count of rescheduled appointments for a hospital"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -58,7 +72,7 @@ async def get_hospital_rescheduled_appointments(hospital_uid: uuid.UUID, session
 
 
 @stats_router.get('/hospitals/average-wait-time', status_code=status.HTTP_200_OK)
-async def get_hospital_average_wait_time(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_hospital_average_wait_time(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get average wait time in hours for a hospital"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -69,7 +83,7 @@ async def get_hospital_average_wait_time(hospital_uid: uuid.UUID, session: Async
 
 
 @stats_router.get('/hospitals/cancellation-rate', status_code=status.HTTP_200_OK)
-async def get_hospital_cancellation_rate(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_hospital_cancellation_rate(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get cancellation rate percentage for a hospital"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -80,7 +94,7 @@ async def get_hospital_cancellation_rate(hospital_uid: uuid.UUID, session: Async
 
 
 @stats_router.get('/hospitals/appointments-by-department', status_code=status.HTTP_200_OK)
-async def get_appointments_by_department(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_appointments_by_department(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get appointment counts grouped by department"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -91,7 +105,7 @@ async def get_appointments_by_department(hospital_uid: uuid.UUID, session: Async
 
 
 @stats_router.get('/hospitals/appointments-by-practitioner', status_code=status.HTTP_200_OK)
-async def get_appointments_by_practitioner(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_appointments_by_practitioner(hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get appointment counts grouped by practitioner"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -102,7 +116,7 @@ async def get_appointments_by_practitioner(hospital_uid: uuid.UUID, session: Asy
 
 
 @stats_router.get('/hospitals/top-departments', status_code=status.HTTP_200_OK)
-async def get_top_departments_by_appointments(hospital_uid: uuid.UUID, limit: int = 5, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_top_departments_by_appointments(hospital_uid: uuid.UUID, limit: int = 5, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get top departments by appointment volume"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -113,7 +127,7 @@ async def get_top_departments_by_appointments(hospital_uid: uuid.UUID, limit: in
 
 
 @stats_router.get('/hospitals/top-practitioners', status_code=status.HTTP_200_OK)
-async def get_top_practitioners_by_appointments(hospital_uid: uuid.UUID, limit: int = 5, session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_top_practitioners_by_appointments(hospital_uid: uuid.UUID, limit: int = 5, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get top practitioners by appointment volume"""
     hospital = await hp_service.get_single_hospital(hospital_uid, session)
     if not hospital:
@@ -126,25 +140,57 @@ async def get_top_practitioners_by_appointments(hospital_uid: uuid.UUID, limit:
 # Patient Statistics Endpoints
 
 @stats_router.get('/patients/appointment-stats', status_code=status.HTTP_200_OK)
-async def get_patient_appointment_stats(session: AsyncSession = Depends(get_session), current_user: models.User = Depends(get_current_user)):
+async def get_patient_appointment_stats(session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
     """Get appointment statistics for the current patient"""
     if current_user.role != models.UserRoles.PATIENT:
         raise errors.NotAuthorized()
     
-    from sqlmodel import select
-    patient_stmt = select(models.Patient).where(models.Patient.user_uid == current_user.uid)
-    result = await session.execute(patient_stmt)
-    patient = result.scalar_one_or_none()
-    
-    if not patient:
+    if current_user.patient_uid is None:
         raise errors.PatientNotFound()
     
-    total = await stats_service.get_patient_total_appointments(str(patient.uid), session)
-    upcoming = await stats_service.get_patient_upcoming_appointments(str(patient.uid), session)
-    completed = await stats_service.get_patient_completed_appointments(str(patient.uid), session)
+    total = await stats_service.get_patient_total_appointments(str(current_user.patient_uid), session)
+    upcoming = await stats_service.get_patient_upcoming_appointments(str(current_user.patient_uid), session)
+    completed = await stats_service.get_patient_completed_appointments(str(current_user.patient_uid), session)
 
     return {
         "total_appointments": total,
         "upcoming_appointments": upcoming,
         "completed_appointments": completed
-    }
\ No newline at end of file
+    }
+
+
+# Platform Statistics Endpoints
+
+@stats_router.get('/statistics/email-throughput', status_code=status.HTTP_200_OK, response_model=schemas.EmailThroughput)
+async def get_email_throughput(limit: int = 50, current_user: Principal = Depends(get_current_principal)):
+    """Throughput of the Celery email worker over its most recent batches"""
+    permissions.accessible_to_super_admin(current_user)
+
+    recent = await redis.get_email_batch_metrics(limit)
+    sent = sum(batch["sent"] for batch in recent)
+    seconds = sum(batch["seconds"] for batch in recent)
+
+    return {
+        "batches": len(recent),
+        "sent": sent,
+        "seconds": round(seconds, 4),
+        "emails_per_second": round(sent / seconds, 2) if seconds else 0.0,
+        "connections_opened": sum(batch["connections_opened"] for batch in recent),
+        "recent": recent,
+    }
+
+
+@stats_router.get('/statistics/password-hashing', status_code=status.HTTP_200_OK, response_model=schemas.PasswordHashingStats)
+async def get_password_hashing_stats(current_user: Principal = Depends(get_current_principal)):
+    """Load of the bcrypt thread pool on the worker that answers, each API worker runs its own"""
+    permissions.accessible_to_super_admin(current_user)
+
+    return {"pid": os.getpid(), **password_hasher.stats()}
+
+
+@stats_router.get('/statistics/job-runs', status_code=status.HTTP_200_OK, response_model=schemas.Page[schemas.JobRunRead])
+async def get_job_runs(job_name: Optional[str] = None, limit: int = 20, cursor: Optional[str] = None, session: AsyncSession = Depends(get_session), current_user: Principal = Depends(get_current_principal)):
+    """Run history of the periodic jobs, newest first: duration, rows affected and errors"""
+    permissions.accessible_to_super_admin(current_user)
+
+    return await jobs_service.get_job_runs(session, limit=limit, cursor=cursor, job_name=job_name)
@@ -1,8 +1,9 @@
-from typing import List
+from typing import Optional
 import uuid
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from src.app.models import Admin, AdminType, User, UserRoles
+from src.app.schemas import Page
 from src.app.core.dependencies import AccessTokenBearer, get_current_user, require_super_admin
 from src.app.services import user as user_service
 from src.app.database.main import get_session
@@ -29,13 +30,13 @@ async def check_username_availability(
 
     return {"available": not existing_user}
 
-@user_router.get('/', response_model=List[User])
-async def get_all_users(skip: int = 0, limit: int = 100, session: AsyncSession = Depends(get_session),
+@user_router.get('/', response_model=Page[User])
+async def get_all_users(limit: int = 100, cursor: Optional[str] = None, skip: Optional[int] = Query(None, deprecated=True), session: AsyncSession = Depends(get_session),
                         current_user: User = Depends(require_super_admin)):
     
     """Protected endpoint for super admins to get all users"""
 
-    users = await user_service.get_all_users(skip=skip, limit=limit, session=session)
+    users = await user_service.get_all_users(limit=limit, session=session, cursor=cursor, skip=skip)
 
     return users
 
@@ -1,11 +1,22 @@
-from pydantic import AfterValidator, BaseModel, EmailStr, Field, field_validator, ConfigDict
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, computed_field, field_validator, ConfigDict
 import uuid
 from datetime import datetime, date
-from typing import Annotated, Optional
-from src.app.models import AdminTypeUpdate, UserRoles, HospitalType, AdminType, AppointmentStatus, RecordType, PractitionerStatus, HospitalStatus, PractitionerType
+from typing import Annotated, Generic, Optional, TypeVar
+from src.app.models import AdminTypeUpdate, UserRoles, HospitalType, AdminType, AppointmentStatus, RecordType, PractitionerStatus, HospitalStatus, PractitionerType, MediaStatus, JobRunStatus
 from src.app import validators
 
+######### ............Pagination.............###########
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """One page of a list endpoint, pass next_cursor back as cursor to get the next one (null on the last page)"""
+    items: list[T]
+    next_cursor: str | None = None
+
+
 ######### ............Department Model.............###########
+
 class DepartmentCreate(BaseModel):
     name: str
     description: str | None
@@ -168,6 +179,21 @@ class HospitalRead(HospitalBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class HospitalCard(BaseModel):
+    """A hospital in the search and browse lists, read straight off the columns the list selects"""
+    uid: uuid.UUID
+    hospital_name: str
+    full_address: str
+    state: str
+    cover_image: Optional[str] = None
+    ownership_type: HospitalType = HospitalType.PRIVATE
+    is_verified: bool = False
+    average_rating: float = 0.0
+    rating_count: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class HospitalAppointmentStats(BaseModel):
     total_appointments: int
     todays_appointments: int
@@ -178,6 +204,18 @@ class HospitalAppointmentStats(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class HospitalDashboard(HospitalAppointmentStats):
+    rescheduled_appointments: int
+    this_week_appointments: int
+    this_month_appointments: int
+    upcoming_appointments: int
+    average_appointments_per_day: float
+    average_wait_time_hours: float
+    cancellation_rate_percent: float
+    top_departments: list[dict]
+    top_practitioners: list[dict]
+
 class HospitalResponse(BaseModel):
     uid: uuid.UUID
     hospital_name: str
@@ -487,6 +525,134 @@ class MessageRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class MessageItem(BaseModel):
+    """A message without its sender and receiver users, for chat history and sync"""
+    uid: uuid.UUID
+    sender_uid: uuid.UUID
+    receiver_uid: uuid.UUID
+    content: Optional[str]
+    timestamp: datetime
+    is_read: bool = False
+    is_edited: bool = False
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MessagePage(BaseModel):
+    """
+    Messages of a conversation, oldest first.
+    before_cursor continues to older messages (null at the start of the conversation),
+    since_cursor is passed to the sync endpoint to fetch only newer ones, has_more means sync has more to send right away.
+    """
+    items: list[MessageItem]
+    before_cursor: str | None = None
+    since_cursor: str | None = None
+    has_more: bool = False
+
+
+class ConversationPeer(BaseModel):
+    uid: uuid.UUID
+    username: str
+    profile_picture: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ConversationRead(BaseModel):
+    peer: ConversationPeer
+    last_message: Optional[MessageItem] = None
+    last_message_at: datetime
+    unread_count: int = 0
+    read_up_to: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ConversationMarkRead(BaseModel):
+    up_to: Optional[datetime] = None # read everything received so far when left out
+
+
+class ConversationReadReceipt(BaseModel):
+    marked_read: int
+    unread_count: int
+
+
+######## ..........Notification Model.........#########
+
+class NotificationRead(BaseModel):
+    uid: uuid.UUID
+    title: str
+    body: str
+    data: dict
+    is_read: bool = False
+    timestamp: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class NotificationMarkRead(BaseModel):
+    uids: list[uuid.UUID] = Field(default_factory=list, max_length=500) # these ones, or when empty:
+    up_to: Optional[datetime] = None # everything up to here, everything received so far when left out
+
+
+class NotificationUnreadCount(BaseModel):
+    unread_count: int
+
+
+class NotificationReadReceipt(BaseModel):
+    marked_read: int
+    unread_count: int
+
+
+class EmailBatchMetrics(BaseModel):
+    at: datetime
+    pid: int
+    batch_size: int
+    sent: int
+    skipped: int # already sent under the same idempotency key
+    refused: int # refused by the server or not renderable
+    unsent: int # left for the task's retry
+    seconds: float
+    emails_per_second: float
+    connections_opened: int # 0 when the batch reused a pooled SMTP connection
+
+
+class EmailThroughput(BaseModel):
+    batches: int
+    sent: int
+    seconds: float
+    emails_per_second: float
+    connections_opened: int
+    recent: list[EmailBatchMetrics]
+
+
+class PasswordHashingStats(BaseModel):
+    pid: int
+    workers: int
+    pending: int # submitted and not finished yet, running calls included
+    queued: int # pending calls waiting for a thread
+    peak_pending: int
+    max_pending: int # past this, calls are refused with a 503
+    completed: int
+    rejected: int
+    average_wait_ms: float # time completed calls spent waiting for a thread
+
+
+class JobRunRead(BaseModel):
+    uid: uuid.UUID
+    job_name: str
+    runner: str
+    status: JobRunStatus
+    started_at: datetime
+    finished_at: datetime
+    duration_ms: int
+    rows_affected: Optional[int] = None
+    details: Optional[dict[str, int]] = None
+    error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class LoginData(BaseModel):
     username: str
     password: str
@@ -577,19 +743,39 @@ class HospitalMediaCreate(BaseModel):
     display_order: int
     is_cover: bool
 
+class HospitalMediaDerivativeRead(BaseModel):
+    variant: str
+    file_url: str
+    width: int
+    height: int
+    file_size: int
+
+    model_config = ConfigDict(from_attributes=True)
+
 class HospitalMediaRead(BaseModel):
     uid: uuid.UUID
     file_url: str
     caption: str | None
     is_cover: bool
+    status: MediaStatus
     display_order: int
     width: int
     height: int
     file_size: int
     uploaded_at: datetime
+    derivatives: list[HospitalMediaDerivativeRead] = []
 
     model_config = ConfigDict(from_attributes=True)
 
+    @computed_field
+    @property
+    def srcset(self) -> str | None:
+        """<img srcset> over the WebP derivatives, smallest first. Small originals give variants of the same width, listed once."""
+        if not self.derivatives:
+            return None
+        widths = {d.width: d.file_url for d in sorted(self.derivatives, key=lambda d: d.width, reverse=True)}
+        return ", ".join(f"{url} {width}w" for width, url in sorted(widths.items()))
+
 class PatientReviewResponse(BaseModel):
     uid: uuid.UUID
     first_name: str
@@ -1,19 +1,16 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
 import uuid
 
-from src.app.models import Admin, Hospital
+from src.app.models import Admin
 from src.app.schemas import AdminProfileUpdate
+from src.app.core.principal import invalidate_principal
+from src.app.core import loaders
 
 
 async def get_admin(admin_uid: uuid.UUID, session: AsyncSession):
 
-   stmt = select(Admin).where(Admin.uid == admin_uid).options(
-       selectinload(Admin.user),
-       selectinload(Admin.hospital).selectinload(Hospital.user),
-       selectinload(Admin.department)
-   )
+   stmt = select(Admin).where(Admin.uid == admin_uid).options(*loaders.ADMIN_CARD)
    result = await session.execute(stmt)
 
    return result.scalar_one_or_none()
@@ -21,22 +18,14 @@ async def get_admin(admin_uid: uuid.UUID, session: AsyncSession):
 
 async def get_admins(skip: int, limit: int, session: AsyncSession):
 
-   stmt = select(Admin).offset(skip).limit(limit).options(
-       selectinload(Admin.user),
-       selectinload(Admin.hospital).selectinload(Hospital.user),
-       selectinload(Admin.department)
-   )
+   stmt = select(Admin).offset(skip).limit(limit).options(*loaders.ADMIN_CARD)
    result = await session.execute(stmt)
 
    return result.scalars().all()
 
 async def get_hospital_admins(hospital_uid: uuid.UUID, session: AsyncSession):
 
-   stmt = select(Admin).where(Admin.hospital_uid == hospital_uid).options(
-       selectinload(Admin.user),
-       selectinload(Admin.hospital).selectinload(Hospital.user),
-       selectinload(Admin.department)
-   )
+   stmt = select(Admin).where(Admin.hospital_uid == hospital_uid).options(*loaders.ADMIN_CARD)
    result = await session.execute(stmt)
 
    return result.scalars().all()
@@ -51,7 +40,9 @@ async def update_admin(admin_uid: uuid.UUID, update_data: AdminProfileUpdate, se
                 setattr(admin_to_update, k, v)
 
       await session.commit()
-      await session.refresh(admin_to_update)
+      admin_to_update = await loaders.reload(admin_to_update, loaders.ADMIN_CARD, session)
+
+      await invalidate_principal(admin_to_update.user_uid)
 
       return admin_to_update
     else:
@@ -68,6 +59,8 @@ async def delete_admin(admin_uid: uuid.UUID, session: AsyncSession):
 
         await session.commit()
 
+        await invalidate_principal(admin.user_uid)
+
         return {}
 
     else:
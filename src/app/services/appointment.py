@@ -1,17 +1,18 @@
 import uuid
 from collections.abc import Sequence
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
 from sqlmodel import select
+from dataclasses import replace
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import update
+from sqlalchemy import literal_column, update
 from typing import Any, List, Optional
-from src.app.models import Appointment, AppointmentStatus, HospitalPatient, Practitioner, User, RescheduleHistory, Hospital, Patient
-from src.app.schemas import AppointmentCreate, AppointmentStatusUpdate, RescheduleAppointment
-from src.app.services import hospital as hp_service
-from src.app.websocket.appointment_ws import notify_queue_update
+from src.app.models import Appointment, AppointmentStatus, QueueEntryStatus, HospitalPatient, Patient, Practitioner, User, RescheduleHistory
+from src.app.schemas import AppointmentCreate, AppointmentRead, AppointmentStatusUpdate, RescheduleAppointment
+from src.app.services import hospital as hp_service, daily_stats, queue, live_queue
+from src.app.core import loaders, mails
+from src.app.core.pagination import Keyset, paginate
+from src.app.websocket.appointment_ws import notify_queue_change, publish_queue_events, queue_row
 from src.app.services.notification import send_notification
-# from src.app.core import mails
 
 """
 create an appointment
@@ -25,16 +26,22 @@ check pending appointment
 switch apointment status
 """
 
-async def create_appointment(patient_uid: uuid.UUID, payload: AppointmentCreate, session: AsyncSession):
+async def create_appointment(patient_uid: uuid.UUID, payload: AppointmentCreate, session: AsyncSession) -> AppointmentRead:
     
     new_appt = Appointment(**payload.model_dump(), patient_uid=patient_uid)
 
     session.add(new_appt)
-    await session.commit()
-    await session.refresh(new_appt)
-    
-    # Broadcast updated queue (real-time to hospital staff)
-    await notify_queue_update(hospital_uid=new_appt.hospital_uid, session=session)
+    await daily_stats.record_change(session, None, daily_stats.snapshot(new_appt))
+    await session.flush()
+    new_appt = await loaders.reload(new_appt, loaders.APPOINTMENT_DETAIL, session)
+
+    # built before anything is staged, a graph the response can't read fails the booking instead of
+    # failing after the commit below and getting the appointment booked again by a client retry
+    booked = AppointmentRead.model_validate(new_appt, from_attributes=True)
+
+    # the emails and notifications are written by the commit below
+    mails.appointment_success(session, new_appt.patient.user.email, new_appt.patient, new_appt.scheduled_time, new_appt.hospital) #type: ignore
+    mails.appointment_notification_hospital(session, new_appt.hospital.user.email, new_appt.patient, new_appt.scheduled_time) #type: ignore
 
     # Notify hospital
     await send_notification(session, new_appt.hospital.user_uid, {
@@ -50,7 +57,12 @@ async def create_appointment(patient_uid: uuid.UUID, payload: AppointmentCreate,
         "data": {"appointment_uid": str(new_appt.uid)}
     })
 
-    return new_appt 
+    await session.commit()
+
+    # Broadcast the new queue row (real-time to hospital staff)
+    await notify_queue_change(new_appt, created=True)
+
+    return booked
 
 
 # async def update_appointment(appointment_uid: str, payload: AppointmentUpdate, session: AsyncSession):
@@ -73,69 +85,42 @@ async def create_appointment(patient_uid: uuid.UUID, payload: AppointmentCreate,
 #         return None
     
 
-async def get_appointments(skip: int, limit: int, status: Optional[AppointmentStatus], session: AsyncSession) -> Sequence[Appointment]:
+# appointment lists run in schedule order
+APPOINTMENT_KEYSET = Keyset("appointments", Appointment.scheduled_time, Appointment.uid)
 
-    stmt = select(Appointment).options(
-        selectinload(Appointment.patient).selectinload(Patient.user),
-        selectinload(Appointment.practitioner).selectinload(Practitioner.user),
-        selectinload(Appointment.hospital).selectinload(Hospital.user),
-        selectinload(Appointment.department)
-    ).order_by(Appointment.scheduled_time).offset(skip).limit(limit) #type: ignore
+
+async def get_appointments(limit: int, status: Optional[AppointmentStatus], session: AsyncSession, cursor: Optional[str] = None, skip: Optional[int] = None) -> dict:
+
+    stmt = select(Appointment).options(*loaders.APPOINTMENT_LIST)
 
     if status is not None:
         stmt = stmt.where(Appointment.status == status)
 
-    result = await session.execute(stmt)
+    return await paginate(session, stmt, APPOINTMENT_KEYSET, limit, cursor, skip)
 
-    return result.scalars().all()
 
+async def get_patient_appointments(patient_uid: uuid.UUID, limit: int, session: AsyncSession, cursor: Optional[str] = None, skip: Optional[int] = None) -> dict:
 
-async def get_patient_appointments(patient_uid: uuid.UUID, skip: int, limit: int, session: AsyncSession) -> Sequence[Appointment]:
+    stmt = select(Appointment).where(Appointment.patient_uid == patient_uid).options(*loaders.APPOINTMENT_LIST)
 
-    stmt = select(Appointment).where(Appointment.patient_uid == patient_uid).options(
-        selectinload(Appointment.patient).selectinload(Patient.user),
-        selectinload(Appointment.practitioner).selectinload(Practitioner.user),
-        selectinload(Appointment.hospital).selectinload(Hospital.user),
-        selectinload(Appointment.department)
-    ).order_by(Appointment.scheduled_time).offset(skip).limit(limit) #type: ignore
-
-    result = await session.execute(stmt)
-
-    return result.scalars().all()
+    return await paginate(session, stmt, APPOINTMENT_KEYSET, limit, cursor, skip)
 
 
 async def get_appointment_by_id(appointment_uid: uuid.UUID, session: AsyncSession) -> Appointment | None:
 
-    return (await session.execute(select(Appointment).where(Appointment.uid == appointment_uid).options(
-        selectinload(Appointment.patient).selectinload(Patient.user),
-        selectinload(Appointment.practitioner).selectinload(Practitioner.user),
-        selectinload(Appointment.hospital).selectinload(Hospital.user),
-        selectinload(Appointment.department)
-    ))).scalar_one_or_none()
-
+    return (await session.execute(select(Appointment).where(Appointment.uid == appointment_uid).options(*loaders.APPOINTMENT_DETAIL))).scalar_one_or_none()
 
-async def get_hospital_appointments(hospital_uid: uuid.UUID, skip: int, limit: int, session: AsyncSession) -> Sequence[Appointment]:
 
-    stmt = select(Appointment).where(Appointment.hospital_uid == hospital_uid).options(
-        selectinload(Appointment.patient).selectinload(Patient.user),
-        selectinload(Appointment.practitioner).selectinload(Practitioner.user),
-        selectinload(Appointment.hospital).selectinload(Hospital.user),
-        selectinload(Appointment.department)
-    ).order_by(Appointment.scheduled_time).offset(skip).limit(limit) #type: ignore
+async def get_hospital_appointments(hospital_uid: uuid.UUID, limit: int, session: AsyncSession, cursor: Optional[str] = None, skip: Optional[int] = None) -> dict:
 
-    result = await session.execute(stmt)
+    stmt = select(Appointment).where(Appointment.hospital_uid == hospital_uid).options(*loaders.APPOINTMENT_LIST)
 
-    return result.scalars().all()
+    return await paginate(session, stmt, APPOINTMENT_KEYSET, limit, cursor, skip)
 
 
 async def appointment_by_schedule_time(hospital_uid: uuid.UUID, scheduled_time: datetime, session: AsyncSession) ->Appointment | None:
 
-    stmt = select(Appointment).where(Appointment.hospital_uid == hospital_uid, Appointment.scheduled_time == scheduled_time).options(
-        selectinload(Appointment.patient).selectinload(Patient.user),
-        selectinload(Appointment.practitioner).selectinload(Practitioner.user),
-        selectinload(Appointment.hospital).selectinload(Hospital.user),
-        selectinload(Appointment.department)
-    )
+    stmt = select(Appointment).where(Appointment.hospital_uid == hospital_uid, Appointment.scheduled_time == scheduled_time)
 
     result = await session.execute(stmt)
 
@@ -144,12 +129,7 @@ async def appointment_by_schedule_time(hospital_uid: uuid.UUID, scheduled_time:
 
 async def get_uncompleted_appointments(hospital_uid: uuid.UUID, session: AsyncSession) -> Sequence[Appointment]:
 
-    stmt = select(Appointment).where(Appointment.status != AppointmentStatus.COMPLETED, Appointment.hospital_uid == hospital_uid).options(
-        selectinload(Appointment.patient).selectinload(Patient.user),
-        selectinload(Appointment.practitioner).selectinload(Practitioner.user),
-        selectinload(Appointment.hospital).selectinload(Hospital.user),
-        selectinload(Appointment.department)
-    ).order_by(Appointment.scheduled_time) #type: ignore
+    stmt = select(Appointment).where(Appointment.status != AppointmentStatus.COMPLETED, Appointment.hospital_uid == hospital_uid).options(*loaders.APPOINTMENT_LIST).order_by(Appointment.scheduled_time) #type: ignore
 
     result = await session.execute(stmt)
 
@@ -158,11 +138,7 @@ async def get_uncompleted_appointments(hospital_uid: uuid.UUID, session: AsyncSe
 
 async def get_single_practitioner(practitioner_uid: uuid.UUID, session: AsyncSession) -> Practitioner | Any:
 
-    stmt = select(Practitioner).where(Practitioner.uid == practitioner_uid).options(
-        selectinload(Practitioner.user),
-        selectinload(Practitioner.hospital).selectinload(Hospital.user),
-        selectinload(Practitioner.department)
-    )
+    stmt = select(Practitioner).where(Practitioner.uid == practitioner_uid).options(*loaders.PRACTITIONER_CARD)
 
     result = await session.execute(stmt)
 
@@ -177,21 +153,22 @@ async def cancel_appointment(appointment_uid: uuid.UUID, session: AsyncSession):
     if not appointment:
         return None
     
+    before = daily_stats.snapshot(appointment)
     appointment.status = AppointmentStatus.CANCELED
+    await daily_stats.record_change(session, before, daily_stats.snapshot(appointment))
+    closed_entries = await queue.close_queue_entries(session, [appointment.uid], QueueEntryStatus.LEFT)
     await session.commit()
-    await session.refresh(appointment)
+    appointment = await loaders.reload(appointment, loaders.APPOINTMENT_DETAIL, session)
+
+    await live_queue.untrack(closed_entries)
+    await notify_queue_change(appointment)
 
     return appointment
 
 
 async def get_all_pending_appointments(session: AsyncSession) -> Sequence[Appointment]:
     
-    stmt = select(Appointment).where(Appointment.status == AppointmentStatus.PENDING).options(
-        selectinload(Appointment.patient).selectinload(Patient.user),
-        selectinload(Appointment.practitioner).selectinload(Practitioner.user),
-        selectinload(Appointment.hospital).selectinload(Hospital.user),
-        selectinload(Appointment.department)
-    ).order_by(Appointment.scheduled_time) #type: ignore
+    stmt = select(Appointment).where(Appointment.status == AppointmentStatus.PENDING).options(*loaders.APPOINTMENT_LIST).order_by(Appointment.scheduled_time) #type: ignore
 
     result = await session.execute(stmt)
 
@@ -201,12 +178,7 @@ async def get_all_pending_appointments(session: AsyncSession) -> Sequence[Appoin
 
 async def get_patient_pending_appointments(patient_uid: uuid.UUID, session: AsyncSession) -> Appointment | None:
 
-    stmt = select(Appointment).where(Appointment.patient_uid == patient_uid, Appointment.status != AppointmentStatus.COMPLETED).options(
-        selectinload(Appointment.patient).selectinload(Patient.user),
-        selectinload(Appointment.practitioner).selectinload(Practitioner.user),
-        selectinload(Appointment.hospital).selectinload(Hospital.user),
-        selectinload(Appointment.department)
-    )
+    stmt = select(Appointment).where(Appointment.patient_uid == patient_uid, Appointment.status != AppointmentStatus.COMPLETED).options(*loaders.APPOINTMENT_LIST)
     
     result = await session.execute(stmt)
 
@@ -220,6 +192,7 @@ async def switch_appointment_status(appointment_uid: uuid.UUID, new_status: Appo
     if not appointment:
         return None
     
+    before = daily_stats.snapshot(appointment)
     old_status = appointment.status
     appointment.status = new_status.status
 
@@ -246,8 +219,17 @@ async def switch_appointment_status(appointment_uid: uuid.UUID, new_status: Appo
             )
             session.add(hospital_patient)
 
+    await daily_stats.record_change(session, before, daily_stats.snapshot(appointment))
+
+    closed_entries = []
+    if appointment.status in queue.APPOINTMENT_ENTRY_STATUS:
+        closed_entries = await queue.close_queue_entries(session, [appointment.uid], queue.APPOINTMENT_ENTRY_STATUS[appointment.status])
+
     await session.commit()
-    await session.refresh(appointment)
+    appointment = await loaders.reload(appointment, loaders.APPOINTMENT_DETAIL, session)
+
+    await live_queue.untrack(closed_entries)
+    await notify_queue_change(appointment)
 
     return appointment
 
@@ -259,10 +241,13 @@ async def delete_appointment(appointment_uid: uuid.UUID, session: AsyncSession):
     if not appointment:
         return None
     
+    await daily_stats.record_change(session, daily_stats.snapshot(appointment), None)
+    closed_entries = await queue.close_queue_entries(session, [appointment.uid], QueueEntryStatus.LEFT)
     await session.delete(appointment)
     await session.commit()
 
-    await notify_queue_update(session, appointment.hospital_uid)
+    await live_queue.untrack(closed_entries)
+    await notify_queue_change(appointment, deleted=True)
 
 
 async def reschedule_appointment(
@@ -276,6 +261,7 @@ async def reschedule_appointment(
     if not appointment:
         return None
 
+    before = daily_stats.snapshot(appointment)
     old_time = appointment.scheduled_time
     appointment.scheduled_time = payload.new_time
     appointment.status = AppointmentStatus.RESCHEDULED
@@ -292,8 +278,9 @@ async def reschedule_appointment(
     )
     session.add(history)
 
-    await session.commit()
-    await session.refresh(appointment)
+    await daily_stats.record_change(session, before, daily_stats.snapshot(appointment))
+    await session.flush()
+    appointment = await loaders.reload(appointment, loaders.APPOINTMENT_DETAIL, session)
 
     # Notify patient
     await send_notification(session, appointment.patient.user_uid, {
@@ -301,36 +288,115 @@ async def reschedule_appointment(
         "body": f"Your appointment with {appointment.hospital.hospital_name}, has been rescheduled to {payload.new_time}",
         "data": {"appointment_uid": str(appointment.uid)}
     })
+
+    await session.commit()
+
+    await notify_queue_change(appointment)
     
     return appointment
 
 
 
+# still open, a sweep moves these to missed once they are overdue
+OVERDUE_STATUSES = (AppointmentStatus.PENDING, AppointmentStatus.IN_PROGRESS, AppointmentStatus.RESCHEDULED)
+
+# inlined rather than bound so the planner matches the partial ix_appointments_open_scheduled
+_OPEN = Appointment.status.in_([literal_column(f"'{status.value}'") for status in OVERDUE_STATUSES]) #type: ignore
+
+
 async def mark_missed_appointments(
     session: AsyncSession,
+    batch_size: int = 500,
 ) -> int:
+    """
+    Mark overdue appointments missed, batch_size rows per transaction.
+    Each batch locks only the rows it takes (SKIP LOCKED, so a booking or status change in flight is left for the next sweep),
+    stages a notification for each patient, and the queue boards get one update per hospital once the sweep is done.
+    """
 
     cutoff = datetime.now(timezone.utc) - timedelta(minutes=30)
-
-    stmt = (
-        update(Appointment)
-        .where(
-            Appointment.scheduled_time < cutoff, #type: ignore
-            Appointment.status.in_( #type: ignore
-                [
-                    AppointmentStatus.PENDING,
-                    AppointmentStatus.IN_PROGRESS,
-                    AppointmentStatus.RESCHEDULED
-                ]
-            ),
+    today = datetime.now(timezone.utc).date()
+    swept = 0
+    events: dict = {}
+
+    while True:
+        # lock a batch of overdue rows and keep their old status so the rollup can move them
+        overdue = (
+            select(Appointment.uid, Appointment.status.label("old_status")) #type: ignore
+            .where(Appointment.scheduled_time < cutoff, _OPEN) #type: ignore
+            .order_by(Appointment.scheduled_time) #type: ignore
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .subquery()
         )
-        .values(
-            status=AppointmentStatus.MISSED
+
+        stmt = (
+            update(Appointment)
+            .where(Appointment.uid == overdue.c.uid, Patient.uid == Appointment.patient_uid)
+            .values(
+                status=AppointmentStatus.MISSED
+            )
+            .returning(
+                Appointment.uid,
+                Appointment.hospital_uid,
+                Appointment.department_uid,
+                Appointment.practitioner_uid,
+                Appointment.scheduled_time,
+                Appointment.patient_uid,
+                Patient.user_uid,
+                Patient.first_name,
+                Patient.last_name,
+                overdue.c.old_status,
+            )
+            .execution_options(synchronize_session=False)
         )
-    )
 
-    result = await session.execute(stmt)
+        rows = (await session.execute(stmt)).all()
 
-    await session.commit()
+        if not rows:
+            await session.commit()
+            break
+
+        changes = []
+        for row in rows:
+            before = daily_stats.AppointmentSnapshot(
+                hospital_uid=row.hospital_uid,
+                department_uid=row.department_uid,
+                practitioner_uid=row.practitioner_uid,
+                day=daily_stats.utc_day(row.scheduled_time),
+                status=AppointmentStatus(row.old_status),
+            )
+            changes.append((before, replace(before, status=AppointmentStatus.MISSED)))
+
+            # written by the commit below in one multi-row insert
+            await send_notification(session, row.user_uid, {
+                "title": "Appointment Missed",
+                "body": f"Your appointment scheduled for {row.scheduled_time} was marked as missed. Please book a new one if you still need it.",
+                "data": {"appointment_uid": str(row.uid)}
+            })
+
+        await daily_stats.record_changes(session, changes)
+
+        closed_entries = await queue.close_queue_entries(session, [row.uid for row in rows], QueueEntryStatus.SKIPPED)
+
+        await session.commit()
+
+        await live_queue.untrack(closed_entries)
+
+        # missed appointments stay on the board for the day they were scheduled
+        for row in rows:
+            if daily_stats.utc_day(row.scheduled_time) == today:
+                # the whole row, "updated" replaces the board's row
+                event = ("updated", queue_row(row.uid, row.first_name, row.last_name, row.patient_uid, row.scheduled_time, AppointmentStatus.MISSED))
+            else:
+                event = ("removed", {"id": row.uid})
+            events.setdefault(row.hospital_uid, []).append(event)
+
+        swept += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    for hospital_uid, hospital_events in events.items():
+        await publish_queue_events(hospital_uid, hospital_events)
 
-    return result.rowcount or 0
\ No newline at end of file
+    return swept
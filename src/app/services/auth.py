@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from src.app.schemas import RegisterUser, RegisterAdminUser, RegisterPractitionerUser
 from src.app.models import User, Patient, Hospital, Practitioner, Admin, AdminType, SignupLink, Queue
-from src.app.core.utils import hash_password
+from src.app.core.passwords import hash_password
 from src.app.services import department as dpt_service
 from datetime import date, datetime, timedelta, timezone
 import uuid
@@ -20,7 +20,7 @@ async def register_user(payload: RegisterUser, session: AsyncSession):
     # Create base user
     new_user = User(**model_dict, username=generate_username(payload.role.value))
 
-    new_user.hashed_password = hash_password(payload.password)
+    new_user.hashed_password = await hash_password(payload.password)
     new_user.is_active = True  
 
     session.add(new_user)
@@ -109,7 +109,7 @@ async def register_practitioners(payload: RegisterPractitionerUser, token: str,
     # Create base user
     new_user = User(**model_dict, username=generate_username(signup_link.practitioner_type.value))
 
-    new_user.hashed_password = hash_password(payload.password)
+    new_user.hashed_password = await hash_password(payload.password)
     new_user.is_active = True  
 
     session.add(new_user)
@@ -186,7 +186,7 @@ async def register_admin(payload: RegisterAdminUser, token: str, session: AsyncS
     # Create base user
     new_user = User(**model_dict, username=generate_username(payload.role.value))
 
-    new_user.hashed_password = hash_password(payload.password)
+    new_user.hashed_password = await hash_password(payload.password)
     new_user.is_active = True
 
     session.add(new_user)
@@ -222,7 +222,7 @@ async def register_super_admin(payload: RegisterAdminUser, session: AsyncSession
     # Create base user
     new_user = User(**model_dict, username=generate_username(payload.role.value))
 
-    new_user.hashed_password = hash_password(payload.password)
+    new_user.hashed_password = await hash_password(payload.password)
 
     session.add(new_user)
     await session.flush()  # get new_user.id without committing yet
@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Optional
+from sqlalchemy import and_, delete, func, literal_column, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from src.app.models import Appointment, AppointmentStatus, HospitalDailyStats
+
+"""
+hospital_daily_stats rollup
+Every service that changes an appointment records the move between (hospital, department, practitioner, day, status)
+buckets in the same transaction, so dashboards read a few rollup rows instead of the appointments history.
+"""
+
+COUNTERS = (
+    "total",
+    *(status.value for status in AppointmentStatus),
+    "wait_seconds",
+    "wait_samples",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class AppointmentSnapshot:
+    """What an appointment currently counts towards in the rollup."""
+    hospital_uid: uuid.UUID
+    department_uid: uuid.UUID
+    practitioner_uid: Optional[uuid.UUID]
+    day: date
+    status: AppointmentStatus
+    wait_seconds: Optional[float] = None
+
+
+def utc_day(value: datetime) -> date:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).date()
+
+
+def snapshot(appointment: Appointment) -> AppointmentSnapshot | None:
+    """Take before and after changing an appointment. Unscheduled appointments are not counted."""
+    if appointment.scheduled_time is None:
+        return None
+
+    status = AppointmentStatus(appointment.status)
+    wait_seconds = None
+
+    if status == AppointmentStatus.COMPLETED and appointment.check_in_time and appointment.completed_time:
+        wait_seconds = (appointment.completed_time - appointment.check_in_time).total_seconds()
+
+    return AppointmentSnapshot(
+        hospital_uid=appointment.hospital_uid,
+        department_uid=appointment.department_uid,
+        practitioner_uid=appointment.practitioner_uid,
+        day=utc_day(appointment.scheduled_time),
+        status=status,
+        wait_seconds=wait_seconds,
+    )
+
+
+def _accumulate(deltas: dict, item: AppointmentSnapshot | None, sign: int):
+    if item is None:
+        return
+
+    key = (item.hospital_uid, item.department_uid, item.practitioner_uid, item.day)
+    row = deltas.setdefault(key, dict.fromkeys(COUNTERS, 0))
+
+    row["total"] += sign
+    row[item.status.value] += sign
+
+    if item.wait_seconds is not None:
+        row["wait_seconds"] += sign * item.wait_seconds
+        row["wait_samples"] += sign
+
+
+async def record_changes(session: AsyncSession, changes: Iterable[tuple[AppointmentSnapshot | None, AppointmentSnapshot | None]]):
+    """
+    Apply (before, after) snapshot pairs to the rollup with one upsert.
+    Runs inside the caller's transaction, call it before the commit that saves the appointments.
+    """
+    deltas: dict = {}
+
+    for before, after in changes:
+        if before == after:
+            continue
+        _accumulate(deltas, before, -1)
+        _accumulate(deltas, after, 1)
+
+    rows = [
+        {
+            "hospital_uid": hospital_uid,
+            "department_uid": department_uid,
+            "practitioner_uid": practitioner_uid,
+            "day": day,
+            **counters,
+        }
+        for (hospital_uid, department_uid, practitioner_uid, day), counters in deltas.items()
+        if any(counters.values())
+    ]
+
+    if not rows:
+        return
+
+    # same lock order in every transaction so concurrent upserts can't deadlock
+    rows.sort(key=lambda row: (str(row["hospital_uid"]), str(row["department_uid"]), str(row["practitioner_uid"]), row["day"]))
+
+    table = HospitalDailyStats.__table__ #type: ignore
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_hospital_daily_stats",
+        set_={name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+    )
+
+    await session.execute(stmt)
+
+
+async def record_change(session: AsyncSession, before: AppointmentSnapshot | None, after: AppointmentSnapshot | None):
+    await record_changes(session, [(before, after)])
+
+
+async def backfill_daily_stats(session: AsyncSession, hospital_uid: uuid.UUID | None = None) -> int:
+    """Rebuild the rollup from the appointments table, for every hospital or just one."""
+    table = HospitalDailyStats.__table__ #type: ignore
+
+    # appointment writes wait for the rebuild so none of their deltas land on the old rows
+    await session.execute(text("LOCK TABLE hospital_daily_stats IN EXCLUSIVE MODE"))
+
+    clear = delete(table)
+    if hospital_uid is not None:
+        clear = clear.where(table.c.hospital_uid == hospital_uid)
+    await session.execute(clear)
+
+    waited = and_(
+        Appointment.status == AppointmentStatus.COMPLETED,
+        Appointment.check_in_time.isnot(None), #type: ignore
+        Appointment.completed_time.isnot(None), #type: ignore
+    )
+    day = func.date(func.timezone(literal_column("'UTC'"), Appointment.scheduled_time))
+
+    source = (
+        select(
+            Appointment.hospital_uid,
+            Appointment.department_uid,
+            Appointment.practitioner_uid,
+            day.label("day"),
+            func.count().label("total"),
+            *(func.count().filter(Appointment.status == status).label(status.value) for status in AppointmentStatus),
+            func.coalesce(
+                func.sum(func.extract("epoch", Appointment.completed_time - Appointment.check_in_time)).filter(waited), 0 #type: ignore
+            ).label("wait_seconds"),
+            func.count().filter(waited).label("wait_samples"),
+        )
+        .where(Appointment.scheduled_time.isnot(None)) #type: ignore
+        .group_by(Appointment.hospital_uid, Appointment.department_uid, Appointment.practitioner_uid, day)
+    )
+
+    if hospital_uid is not None:
+        source = source.where(Appointment.hospital_uid == hospital_uid)
+
+    columns = ["hospital_uid", "department_uid", "practitioner_uid", "day", *COUNTERS]
+    result = await session.execute(insert(table).from_select(columns, source, include_defaults=False))
+
+    await session.commit()
+
+    return result.rowcount or 0
+
+
+async def _main():
+    from src.app.database.main import async_session_factory
+
+    parser = argparse.ArgumentParser(description="Rebuild hospital_daily_stats from the appointments table.")
+    parser.add_argument("--hospital", type=uuid.UUID, default=None, help="only rebuild this hospital")
+    args = parser.parse_args()
+
+    async with async_session_factory() as session:
+        rows = await backfill_daily_stats(session, args.hospital)
+
+    print(f"{rows} daily stats rows rebuilt")
+
+
+# python -m src.app.services.daily_stats [--hospital <uid>]
+if __name__ == "__main__":
+    asyncio.run(_main())
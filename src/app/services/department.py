@@ -1,11 +1,11 @@
 import uuid
 from collections.abc import Sequence
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
 from sqlmodel import select
 from typing import Optional
-from src.app.models import Department, Hospital
+from src.app.models import Department
 from src.app.schemas import DepartmentCreate, DepartmentUpdate
+from src.app.core.pagination import Keyset, paginate
 
 """
 create department
@@ -26,25 +26,26 @@ async def create_department(payload: DepartmentCreate, hospital_uid: uuid.UUID,
     return new_department
 
 
-async def list_departments(skip: int, limit: int, search: Optional[str], session: AsyncSession):
-    stmt = select(Department).options(selectinload(Department.hospital).selectinload(Hospital.user))
+DEPARTMENT_KEYSET = Keyset("departments", Department.name, Department.uid)
+
+
+async def list_departments(limit: int, search: Optional[str], session: AsyncSession, cursor: Optional[str] = None, skip: Optional[int] = None) -> dict:
+    stmt = select(Department)
 
     if search:
         stmt = stmt.filter(Department.name.ilike(f"%{search}%")) #type: ignore
  
-    stmt = stmt.order_by(Department.name.asc()).offset(skip).limit(limit) #type: ignore
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    return await paginate(session, stmt, DEPARTMENT_KEYSET, limit, cursor, skip)
 
 
 async def get_department_by_id(department_uid: uuid.UUID, session: AsyncSession) -> Department:
 
-    return (await session.execute(select(Department).where(Department.uid == department_uid).options(selectinload(Department.hospital).selectinload(Hospital.user)))).scalar_one()
+    return (await session.execute(select(Department).where(Department.uid == department_uid))).scalar_one()
 
 
 async def get_hospital_departments(hospital_uid: uuid.UUID, session: AsyncSession) -> Sequence[Department]:
 
-    result = await session.execute(select(Department).where(Department.hospital_uid == hospital_uid).options(selectinload(Department.hospital).selectinload(Hospital.user)))
+    result = await session.execute(select(Department).where(Department.hospital_uid == hospital_uid))
     
     return result.scalars().all()
 
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, literal_column
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from src.app.models import EmailOutbox, EmailStatus
+from src.app.core import celery
+
+"""
+email outbox
+stage_email only adds an outbox row (template name and context, see core/email_templates) to the caller's session,
+so the email is stored by the same commit as the change it announces and a rollback drops it. Nothing talks to the broker inside a request.
+relay_pending_emails runs on the scheduler: it locks a batch of pending rows (SKIP LOCKED, so relays on other workers take the next batch),
+publishes them to Celery over one broker connection, EMAIL_SEND_BATCH emails per task, and marks them published in the same transaction.
+Each row's idempotency_key is claimed by the worker before sending,
+so a row published twice (relay crashed before its commit, broker redelivery) is still sent once.
+"""
+
+logger = logging.getLogger(__name__)
+
+# inlined rather than bound so the planner matches them to the partial indexes on status
+PENDING = literal_column("'pending'")
+PUBLISHED = literal_column("'published'")
+
+
+def stage_email(session: AsyncSession, recipients: list[str], subject: str, template: str, context: dict, idempotency_key: str | None = None) -> EmailOutbox:
+    """
+    Stage an email, it is written by the session's next commit and handed to Celery by the relay after it.
+    Only the template name and its context are stored, the worker renders the HTML.
+    """
+    uid = uuid.uuid4()
+    email = EmailOutbox(
+        uid=uid,
+        idempotency_key=idempotency_key or f"email:{uid}",
+        recipients=recipients,
+        subject=subject,
+        template=template,
+        context=context,
+    )
+    session.add(email)
+
+    return email
+
+
+def has_staged_emails(session: AsyncSession) -> bool:
+    return any(isinstance(obj, EmailOutbox) for obj in session.new)
+
+
+def _publish(batch: list[tuple[uuid.UUID, dict]], send_batch: int) -> dict[uuid.UUID, str]:
+    """Publish a batch to Celery over one broker connection, send_batch emails per task. Returns the error of every row that did not go out."""
+
+    failed = {}
+
+    try:
+        with celery.app.producer_or_acquire() as producer:
+            for start in range(0, len(batch), send_batch):
+                chunk = batch[start:start + send_batch]
+                try:
+                    # the worker sends a whole task over one pooled SMTP session
+                    celery.send_email_batch_task.apply_async(
+                        args=([email for _, email in chunk],),
+                        producer=producer,
+                    )
+                except Exception as e:
+                    failed.update({uid: str(e) for uid, _ in chunk})
+    except Exception as e:
+        # no broker connection, count the whole batch as failed (anything that did go out is deduplicated by its key)
+        return {uid: str(e) for uid, _ in batch}
+
+    return failed
+
+
+async def relay_pending_emails(session: AsyncSession, batch_size: int, max_attempts: int, send_batch: int) -> int:
+    """Publish pending outbox rows to Celery, batch_size rows per transaction. Returns the rows published."""
+
+    published = 0
+
+    while True:
+        stmt = (
+            select(EmailOutbox)
+            .where(EmailOutbox.status == PENDING)
+            .order_by(EmailOutbox.created_at) #type: ignore
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = (await session.execute(stmt)).scalars().all()
+
+        if not rows:
+            await session.commit()
+            return published
+
+        batch = [
+            (row.uid, {
+                "recipients": row.recipients,
+                "subject": row.subject,
+                "template": row.template,
+                "context": row.context,
+                "body": row.body,
+                "idempotency_key": row.idempotency_key,
+            })
+            for row in rows
+        ]
+
+        # kombu is blocking, the whole batch goes out on a thread
+        failed = await asyncio.to_thread(_publish, batch, send_batch)
+
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            if row.uid in failed:
+                row.attempts += 1
+                row.last_error = failed[row.uid]
+                if row.attempts >= max_attempts:
+                    row.status = EmailStatus.FAILED
+                    logger.warning(f"Giving up on email {row.idempotency_key} after {row.attempts} attempts: {row.last_error}")
+            else:
+                row.status = EmailStatus.PUBLISHED
+                row.published_at = now
+
+        await session.commit()
+
+        published += len(rows) - len(failed)
+
+        # a broker outage fails the whole batch, leave the rest for the next pass
+        if failed or len(rows) < batch_size:
+            return published
+
+
+async def prune_published_emails(session: AsyncSession, older_than: timedelta, batch_size: int) -> int:
+    """Delete published outbox rows older than older_than, batch_size rows per transaction. Returns the rows deleted."""
+
+    cutoff = datetime.now(timezone.utc) - older_than
+    deleted = 0
+
+    while True:
+        batch = (
+            select(EmailOutbox.uid)
+            .where(EmailOutbox.status == PUBLISHED, EmailOutbox.published_at < cutoff) #type: ignore
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+
+        result = await session.execute(delete(EmailOutbox).where(EmailOutbox.uid.in_(batch))) #type: ignore
+        await session.commit()
+
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
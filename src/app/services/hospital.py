@@ -3,12 +3,12 @@ import uuid
 from collections.abc import Sequence
 from sqlalchemy import func
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
-from sqlmodel import select, or_
-from src.app.models import Hospital, Patient, Practitioner, Appointment, AppointmentStatus, HospitalStatus, HospitalRating, HospitalPatient
+from sqlmodel import select
+from src.app.models import Hospital, Practitioner, Appointment, AppointmentStatus, HospitalStatus, HospitalRating, HospitalPatient
 from typing import Optional, List
 from src.app.schemas import HospitalProfileUpdate, VerifyHospital, AssignAdminDuty
 from src.app.services import admins as ad_service
+from src.app.core import loaders
 
 
 #updating hospital profile
@@ -30,32 +30,9 @@ async def update_hospital_profile(payload: HospitalProfileUpdate, hospital_uid:
     return hospital_to_update
 
 
-#retrieving all hospitals
-async def get_hospitals(skip: int, limit: int, session: AsyncSession, search: Optional[str] = None, location: Optional[str] = None):
-
-    stmt = select(Hospital).options(selectinload(Hospital.user)).offset(skip).limit(limit)
-
-    if search:
-        stmt = stmt.filter(or_(
-            Hospital.hospital_name.contains(search),#type: ignore
-            Hospital.full_address.contains(search),#type: ignore
-            Hospital.state.contains(search)#type: ignore
-        ))
-
-    if location:
-        stmt = stmt.filter(or_(
-            Hospital.full_address.contains(location), #type: ignore
-            Hospital.state.contains(location) #type: ignore
-        )) 
- 
-    result = await session.execute(stmt)
-
-    return result.scalars().all()
-
-
 async def view_hospital_practitioners(hospital_uid: uuid.UUID, availability: Optional[bool], session: AsyncSession):
 
-    stmt = select(Practitioner).where(Practitioner.hospital_uid == hospital_uid)
+    stmt = select(Practitioner).where(Practitioner.hospital_uid == hospital_uid).options(*loaders.PRACTITIONER_CARD)
 
     if availability is not None:
         stmt = stmt.where(Practitioner.is_available == availability)
@@ -67,7 +44,7 @@ async def view_hospital_practitioners(hospital_uid: uuid.UUID, availability: Opt
 
 async def get_single_hospital(hospital_uid: uuid.UUID, session: AsyncSession):
 
-    stmt = select(Hospital).where(Hospital.uid == hospital_uid).options(selectinload(Hospital.user))
+    stmt = select(Hospital).where(Hospital.uid == hospital_uid).options(*loaders.HOSPITAL_CARD)
 
     result = await session.execute(stmt)
 
@@ -122,7 +99,7 @@ async def rate_hospital(hospital_uid: uuid.UUID, user_uid: uuid.UUID, rating_val
 
 async def view_hospital_appointments(hospital_uid: uuid.UUID, status: Optional[AppointmentStatus], session: AsyncSession) -> Sequence[Appointment]:
 
-    stmt = select(Appointment).where(Appointment.hospital_uid == hospital_uid)
+    stmt = select(Appointment).where(Appointment.hospital_uid == hospital_uid).options(*loaders.APPOINTMENT_LIST)
 
     if status is not None:
         stmt = stmt.where(Appointment.status == status)
@@ -175,66 +152,6 @@ async def assign_duties_to_department_admin(admin_uid: uuid.UUID, payload: Assig
     return admin
 
 
-async def get_hospital_appointment_stats(hospital_uid: uuid.UUID, session: AsyncSession):
-    from datetime import date
-    today = date.today()
-
-    # Total appointments
-    total_stmt = select(func.count(Appointment.uid)).where(Appointment.hospital_uid == hospital_uid)
-    total_result = await session.execute(total_stmt)
-    total_appointments = total_result.scalar_one()
-
-    # Today's appointments
-    todays_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.scheduled_time.isnot(None), #type: ignore
-        func.date(Appointment.scheduled_time) == today
-    )
-    todays_result = await session.execute(todays_stmt)
-    todays_appointments = todays_result.scalar_one()
-
-    # Pending appointments
-    pending_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.PENDING
-    )
-    pending_result = await session.execute(pending_stmt)
-    pending_appointments = pending_result.scalar_one()
-
-    # Completed appointments
-    completed_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.COMPLETED
-    )
-    completed_result = await session.execute(completed_stmt)
-    completed_appointments = completed_result.scalar_one()
-
-    # Canceled appointments
-    canceled_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.CANCELED
-    )
-    canceled_result = await session.execute(canceled_stmt)
-    canceled_appointments = canceled_result.scalar_one()
-
-    # In-progress appointments
-    in_progress_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.IN_PROGRESS
-    )
-    in_progress_result = await session.execute(in_progress_stmt)
-    in_progress_appointments = in_progress_result.scalar_one()
-
-    return {
-        "total_appointments": total_appointments,
-        "todays_appointments": todays_appointments,
-        "pending_appointments": pending_appointments,
-        "completed_appointments": completed_appointments,
-        "canceled_appointments": canceled_appointments,
-        "in_progress_appointments": in_progress_appointments,
-    }
-    
-
 async def get_hospital_patients(hospital_uid: uuid.UUID, session: AsyncSession):
 
     stmt = (
@@ -242,10 +159,7 @@ async def get_hospital_patients(hospital_uid: uuid.UUID, session: AsyncSession):
         .where(
             HospitalPatient.hospital_uid == hospital_uid
         )
-        .options(
-            selectinload(HospitalPatient.hospital).selectinload(Hospital.user),
-            selectinload(HospitalPatient.patient).selectinload(Patient.user),
-        )
+        .options(*loaders.HOSPITAL_PATIENT)
     )
 
     result = await session.execute(stmt)
@@ -260,10 +174,7 @@ async def get_patient_hospitals(patient_uid: uuid.UUID, session: AsyncSession):
         .where(
             HospitalPatient.patient_uid == patient_uid
         )
-        .options(
-            selectinload(HospitalPatient.patient).selectinload(Patient.user),
-            selectinload(HospitalPatient.hospital).selectinload(Hospital.user),
-        )
+        .options(*loaders.HOSPITAL_PATIENT)
     )
 
     result = await session.execute(stmt)
@@ -279,10 +190,6 @@ async def get_hospital_patient(hospital_uid: uuid.UUID, patient_uid: uuid.UUID,
             HospitalPatient.hospital_uid == hospital_uid,
             HospitalPatient.patient_uid == patient_uid,
         )
-        .options(
-            selectinload(HospitalPatient.hospital).selectinload(Hospital.user),
-            selectinload(HospitalPatient.patient).selectinload(Patient.user),
-        )
     )
 
     result = await session.execute(stmt)
@@ -1,12 +1,32 @@
+import logging
 import uuid
-import cloudinary.uploader
 from sqlalchemy import update, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.app.models import HospitalMedia
-from sqlalchemy.orm import selectinload
+from src.app.models import HospitalMedia, HospitalMediaDerivative, MediaStatus
+from src.app.services import upload_service
+from src.app.core import loaders
+from src.app.database.main import async_session_factory
 from collections.abc import Sequence
 
 
+logger = logging.getLogger(__name__)
+
+
+def _derivatives(media_uid: uuid.UUID, derivatives: list[dict]) -> list[HospitalMediaDerivative]:
+    return [
+        HospitalMediaDerivative(
+            media_uid=media_uid,
+            variant=derivative["variant"],
+            file_url=derivative["url"],
+            public_id=derivative["public_id"],
+            width=derivative["width"],
+            height=derivative["height"],
+            file_size=derivative["bytes"],
+        )
+        for derivative in derivatives
+    ]
+
+
 async def create_hospital_media(
     *,
     hospital_uid: uuid.UUID,
@@ -19,12 +39,15 @@ async def create_hospital_media(
     height: int,
     file_size: int,
     session: AsyncSession,
+    status: MediaStatus = MediaStatus.READY,
+    derivatives: list[dict] | None = None,
 ) -> HospitalMedia:
     """
     Create a hospital media record.
+    A pending record is not listed yet, it takes the cover from the current one in finalize_hospital_media.
     """
 
-    if is_cover:
+    if is_cover and status == MediaStatus.READY:
         stmt = (
             update(HospitalMedia)
             .where(HospitalMedia.hospital_uid == hospital_uid) #type: ignore
@@ -41,15 +64,111 @@ async def create_hospital_media(
         is_cover=is_cover,
         width=width,
         height=height,
-        file_size=file_size
+        file_size=file_size,
+        status=status,
     )
 
     session.add(media)
+    session.add_all(_derivatives(media.uid, derivatives or []))
 
     await session.commit()
-    await session.refresh(media)
 
-    return media
+    return await loaders.reload(media, loaders.HOSPITAL_MEDIA_DETAIL, session)
+
+
+async def create_hospital_media_batch(
+    *,
+    hospital_uid: uuid.UUID,
+    uploads: list[dict],
+    caption: str | None,
+    display_order: int,
+    session: AsyncSession,
+) -> list[HospitalMedia]:
+    """
+    Create one record per upload in a single commit, numbered on from display_order.
+    """
+
+    medias = [
+        HospitalMedia(
+            hospital_uid=hospital_uid,
+            file_url=upload["url"],
+            public_id=upload["public_id"],
+            caption=caption,
+            display_order=display_order + position,
+            is_cover=False,
+            width=upload["width"],
+            height=upload["height"],
+            file_size=upload["bytes"],
+        )
+        for position, upload in enumerate(uploads)
+    ]
+
+    session.add_all(medias)
+    for media, upload in zip(medias, uploads):
+        session.add_all(_derivatives(media.uid, upload["derivatives"]))
+
+    await session.commit()
+
+    stmt = (
+        select(HospitalMedia)
+        .where(HospitalMedia.uid.in_([media.uid for media in medias])) #type: ignore
+        .options(*loaders.HOSPITAL_MEDIA_DETAIL)
+        .order_by(HospitalMedia.display_order.asc()) #type: ignore
+        .execution_options(populate_existing=True)
+    )
+
+    result = await session.execute(stmt)
+
+    return list(result.scalars().all())
+
+
+async def finalize_hospital_media(media_uid: uuid.UUID, path: str, folder: str, filename: str | None = None):
+    """
+    Background half of a deferred upload: send the stashed file to storage and mark the record ready,
+    or failed when the upload does not go through.
+    """
+    try:
+        upload = await upload_service.upload_stashed_media(path, folder, filename)
+    except Exception as e:
+        logger.error(f"Deferred upload of media {media_uid} failed: {e}")
+        values: dict = {"status": MediaStatus.FAILED, "is_cover": False}
+        upload = None
+    else:
+        values = {
+            "status": MediaStatus.READY,
+            "file_url": upload["url"],
+            "public_id": upload["public_id"],
+            "width": upload["width"],
+            "height": upload["height"],
+            "file_size": upload["bytes"],
+        }
+
+    async with async_session_factory() as session:
+        result = await session.execute(
+            update(HospitalMedia)
+            .where(HospitalMedia.uid == media_uid, HospitalMedia.status == MediaStatus.PENDING) #type: ignore
+            .values(**values)
+            .returning(HospitalMedia.hospital_uid, HospitalMedia.is_cover)
+            .execution_options(synchronize_session=False)
+        )
+        media = result.one_or_none()
+
+        if upload and media:
+            session.add_all(_derivatives(media_uid, upload["derivatives"]))
+
+            # the current cover stayed listed while this upload was pending
+            if media.is_cover:
+                await session.execute(
+                    update(HospitalMedia)
+                    .where(HospitalMedia.hospital_uid == media.hospital_uid, HospitalMedia.uid != media_uid) #type: ignore
+                    .values(is_cover=False)
+                )
+
+        await session.commit()
+
+    # the record was deleted while the file was uploading
+    if upload and not media:
+        await upload_service.delete_media(*upload_service.media_public_ids(upload))
 
 
 
@@ -60,15 +179,13 @@ async def get_hospital_medias(
     session: AsyncSession,
 ) -> Sequence[HospitalMedia]:
     """
-    Retrieve all media belonging to a hospital.
+    Retrieve all uploaded media belonging to a hospital.
     """
 
     stmt = (
         select(HospitalMedia)
-        .where(HospitalMedia.hospital_uid == hospital_uid)
-        .options(
-            selectinload(HospitalMedia.hospital)
-        )
+        .where(HospitalMedia.hospital_uid == hospital_uid, HospitalMedia.status == MediaStatus.READY) #type: ignore
+        .options(*loaders.HOSPITAL_MEDIA_DETAIL)
         .order_by(
             HospitalMedia.is_cover.desc(),
             HospitalMedia.display_order.asc(),
@@ -83,7 +200,7 @@ async def get_hospital_medias(
 async def get_hospital_media(media_uid: uuid.UUID, hospital_uid: uuid.UUID, session: AsyncSession):
     """Return a media by its ID"""
 
-    stmt = select(HospitalMedia).where(HospitalMedia.uid == media_uid, HospitalMedia.hospital_uid ==hospital_uid)
+    stmt = select(HospitalMedia).where(HospitalMedia.uid == media_uid, HospitalMedia.hospital_uid ==hospital_uid).options(*loaders.HOSPITAL_MEDIA_DETAIL)
 
     result = await session.execute(stmt)
 
@@ -104,16 +221,15 @@ async def delete_hospital_media(
     if not media_to_delete:
         return None
 
-    # Delete from Cloudinary first
-    result = cloudinary.uploader.destroy(
-        media_to_delete.public_id
-    )
-
-    if result.get("result") not in ("ok", "not found"):
-        raise Exception("Failed to delete image from Cloudinary")
+    public_ids = [media_to_delete.public_id, *(derivative.public_id for derivative in media_to_delete.derivatives)]
 
-    # Delete from database
+    # Delete from database first, the derivative rows go with it
     await session.delete(media_to_delete)
     await session.commit()
 
+    # then from storage, a pending upload has nothing stored yet.
+    # A failure here leaves unreferenced files behind, never a row pointing at missing ones
+    if media_to_delete.public_id and not await upload_service.delete_media(*public_ids):
+        logger.error(f"Media {media_uid} was deleted but its stored files were not: {public_ids}")
+
     return True
\ No newline at end of file
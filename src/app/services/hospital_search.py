@@ -0,0 +1,109 @@
+import operator
+import re
+import zlib
+from functools import reduce
+from typing import Any, Optional
+from sqlalchemy import Float, cast, func, literal, literal_column, or_
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from src.app.models import Hospital
+from src.app.core.pagination import Keyset, paginate
+
+"""
+hospital search
+Every hospital list (/hospitals with or without a search, /hospitals/by-location) runs through search_hospitals.
+A term matches a hospital when either
+- each of its words is a prefix of a word in the hospital's search_vector, the generated tsvector of name (weight A),
+  state and address (B) and about (D), over its GIN index. Location terms only look at the B words.
+- or it is close enough to a word run of the name/state/address for pg_trgm (`<%`, word_similarity over 0.6),
+  over the trigram indexes, so "St Nicolas" still finds "St. Nicholas Hospital".
+Matches come back best first: full-text rank plus trigram similarity, with cursors over (rank, uid).
+With no term, hospitals are listed by name. Either way only the columns of a HospitalCard are selected.
+"""
+
+SEARCH_VECTOR = Hospital.__table__.c.search_vector #type: ignore
+
+# everything a HospitalCard reads, no relationship is loaded
+CARD_COLUMNS = (
+    Hospital.uid,
+    Hospital.hospital_name,
+    Hospital.full_address,
+    Hospital.state,
+    Hospital.cover_image,
+    Hospital.ownership_type,
+    Hospital.is_verified,
+    Hospital.average_rating,
+    Hospital.rating_count,
+)
+
+# browsing with nothing to match, the unique hospital_name index serves the ordering
+BROWSE_KEYSET = Keyset("hospitals", Hospital.hospital_name, Hospital.uid)
+
+# columns a misspelt term is compared with
+SEARCH_TRIGRAM_COLUMNS = (Hospital.hospital_name, Hospital.state, Hospital.full_address)
+LOCATION_TRIGRAM_COLUMNS = (Hospital.state, Hospital.full_address)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def prefix_query(text: str, weights: str = "") -> Optional[str]:
+    """
+    'st nich' -> 'st:* & nich:*', a to_tsquery where every word is matched as a prefix, weights limits the words to those weights.
+    Only letters and digits are kept, so no input can break the tsquery syntax. None when nothing is left.
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return None
+    return " & ".join(f"{word}:*{weights}" for word in words)
+
+
+def _term(text: Optional[str], weights: str, trigram_columns: tuple) -> Optional[tuple[Any, Any]]:
+    """(match, rank) of one search term, None when it has nothing to search with."""
+    text = (text or "").strip()
+    tsquery = prefix_query(text, weights)
+    if tsquery is None:
+        return None
+
+    # a literal regconfig, a bound parameter would not resolve to one
+    query = func.to_tsquery(literal_column("'simple'"), tsquery)
+    needle = literal(text)
+
+    match = or_(
+        SEARCH_VECTOR.op("@@")(query),
+        *(needle.op("<%")(column) for column in trigram_columns),
+    )
+    rank = func.ts_rank(SEARCH_VECTOR, query) + func.greatest(
+        *(func.coalesce(func.word_similarity(needle, column), 0) for column in trigram_columns)
+    )
+    return match, rank
+
+
+async def search_hospitals(
+    session: AsyncSession,
+    limit: int,
+    search: Optional[str] = None,
+    location: Optional[str] = None,
+    cursor: Optional[str] = None,
+    skip: Optional[int] = None,
+) -> dict:
+    """One page of HospitalCard rows matching search (anywhere) and location (state/address), best first."""
+
+    terms = [
+        term for term in (
+            _term(search, "", SEARCH_TRIGRAM_COLUMNS),
+            _term(location, "B", LOCATION_TRIGRAM_COLUMNS),
+        ) if term is not None
+    ]
+
+    if not terms:
+        return await paginate(session, select(*CARD_COLUMNS), BROWSE_KEYSET, limit, cursor, skip)
+
+    # double precision, so the rank written into a cursor compares equal to the one the next page recomputes
+    rank = cast(reduce(operator.add, (term_rank for _, term_rank in terms)), Float).label("rank")
+    stmt = select(*CARD_COLUMNS, rank).where(*(match for match, _ in terms))
+
+    # the keyset name carries the terms, a cursor is only good for the search that produced it
+    digest = zlib.crc32(f"{search or ''}\x00{location or ''}".encode())
+    keyset = Keyset(f"hospital_search:{digest:08x}", rank, Hospital.uid, descending=True)
+
+    return await paginate(session, stmt, keyset, limit, cursor, skip)
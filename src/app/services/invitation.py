@@ -1,8 +1,6 @@
 import secrets
 import uuid
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlmodel import select
-from datetime import datetime, timedelta
 from src.app.models import SignupLink, AdminType, PractitionerType
 
 
@@ -25,12 +23,3 @@ async def practitioner_invitation(email: str, notes: str, type: PractitionerType
     await session.commit()
     
     return token
-
-#background task for periodic cleanup
-async def delete_expired_tokens(session: AsyncSession):
-    expired_time = datetime.now() - timedelta(hours=24)
-
-    result = await session.execute(select(SignupLink).where(SignupLink.created_at < expired_time))
-
-    await session.delete(result)
-    await session.commit()
\ No newline at end of file
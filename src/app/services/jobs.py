@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from src.app.models import JobRun
+from src.app.core.pagination import Keyset, paginate
+from src.app.core.scheduler import Job
+from src.app.core.settings import Config
+from src.app.services import appointment as appt_service, notification as notif_service, email_outbox, token_cleanup
+
+"""
+the periodic jobs, run once cluster-wide by core/scheduler.py (in process or from Celery beat)
+each one takes its own session and returns the rows it affected, or a breakdown of them
+"""
+
+# run history, newest first
+JOB_RUN_KEYSET = Keyset("job_runs", JobRun.started_at, JobRun.uid, descending=True)
+
+
+async def purge_expired_tokens(session: AsyncSession) -> dict[str, int]:
+    return await token_cleanup.purge_expired_tokens(session, batch_size=Config.TOKEN_PURGE_BATCH)
+
+
+async def mark_missed_appointments(session: AsyncSession) -> int:
+    return await appt_service.mark_missed_appointments(session=session, batch_size=Config.MISSED_SWEEP_BATCH)
+
+
+async def prune_notifications(session: AsyncSession) -> int:
+    return await notif_service.prune_read_notifications(
+        session,
+        older_than=timedelta(days=Config.NOTIFICATION_RETENTION_DAYS),
+        batch_size=Config.NOTIFICATION_PRUNE_BATCH,
+    )
+
+
+async def relay_emails(session: AsyncSession) -> int:
+    return await email_outbox.relay_pending_emails(
+        session,
+        batch_size=Config.EMAIL_RELAY_BATCH,
+        max_attempts=Config.EMAIL_RELAY_MAX_ATTEMPTS,
+        send_batch=Config.EMAIL_SEND_BATCH,
+    )
+
+
+async def prune_email_outbox(session: AsyncSession) -> int:
+    return await email_outbox.prune_published_emails(
+        session,
+        older_than=timedelta(days=Config.EMAIL_OUTBOX_RETENTION_DAYS),
+        batch_size=Config.NOTIFICATION_PRUNE_BATCH,
+    )
+
+
+async def prune_job_runs(session: AsyncSession) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=Config.JOB_RUN_RETENTION_DAYS)
+
+    result = await session.execute(delete(JobRun).where(JobRun.started_at < cutoff)) #type: ignore
+    await session.commit()
+
+    return result.rowcount
+
+
+JOBS = (
+    # rows deleted per token table are kept in the run's details
+    Job("purge_expired_tokens", purge_expired_tokens, timedelta(hours=1)),
+    Job("prune_notifications", prune_notifications, timedelta(hours=24)),
+    Job("prune_email_outbox", prune_email_outbox, timedelta(hours=24)),
+    Job("prune_job_runs", prune_job_runs, timedelta(hours=24)),
+    # polls every few seconds, only runs that relayed something are kept in job_runs
+    Job("relay_emails", relay_emails, timedelta(seconds=Config.EMAIL_RELAY_INTERVAL), record_idle=False),
+    Job("mark_missed_appointments", mark_missed_appointments, timedelta(minutes=30)),
+)
+
+JOBS_BY_NAME = {job.name: job for job in JOBS}
+
+
+async def get_job_runs(session: AsyncSession, limit: int = 20, cursor: str | None = None, job_name: str | None = None) -> dict:
+
+    stmt = select(JobRun)
+
+    if job_name:
+        stmt = stmt.where(JobRun.job_name == job_name)
+
+    return await paginate(session, stmt, JOB_RUN_KEYSET, limit, cursor)
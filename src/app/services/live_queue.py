@@ -0,0 +1,88 @@
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from src.app.models import QueueEntry, QueueEntryStatus
+from src.app.core import redis
+
+"""
+live queue state
+Redis keeps the waiting and called entries of every queue day as sorted sets scored by queue number,
+so position, patients ahead and now serving are answered without SQL.
+Postgres stays the source of truth: writes land there first, track/untrack follow after the commit,
+and rebuild_live_queues recreates the sets from the table on startup or when a read finds them stale.
+LANES holds the active entry statuses, every other status is final and leaves the live state.
+"""
+
+logger = logging.getLogger(__name__)
+
+LANES = {
+    QueueEntryStatus.WAITING: "waiting",
+    QueueEntryStatus.CALLED: "called",
+    QueueEntryStatus.SERVING: "called",
+}
+
+
+async def _place(entry: QueueEntry, lane: str | None):
+    try:
+        await redis.place_live_queue_entry(
+            str(entry.queue_uid), entry.service_day.isoformat(), str(entry.uid), entry.queue_number, lane
+        )
+    except RedisError as e:
+        # the next read that misses this entry rebuilds its queue day
+        logger.warning(f"Could not update live queue {entry.queue_uid}: {e}")
+
+
+async def track(entry: QueueEntry):
+    """Puts a committed entry in the lane of its status, or takes it out once it is final."""
+    await _place(entry, LANES.get(QueueEntryStatus(entry.status)))
+
+
+async def untrack(entries: Iterable[QueueEntry]):
+    for entry in entries:
+        await _place(entry, None)
+
+
+async def rebuild_live_queues(session: AsyncSession, queue_uid: uuid.UUID | None = None, service_day: date | None = None) -> int:
+    """Recreate the live state from the active queue entries, of every queue day or just one. Returns the entries placed."""
+    statement = select(QueueEntry.queue_uid, QueueEntry.service_day, QueueEntry.uid, QueueEntry.queue_number, QueueEntry.status).where(
+        QueueEntry.status.in_(LANES) # type: ignore
+    )
+
+    if queue_uid is not None:
+        statement = statement.where(QueueEntry.queue_uid == queue_uid)
+    if service_day is not None:
+        statement = statement.where(QueueEntry.service_day == service_day)
+
+    rows = (await session.execute(statement)).all()
+
+    days: dict = defaultdict(lambda: defaultdict(dict))
+    for row in rows:
+        days[(row.queue_uid, row.service_day)][LANES[QueueEntryStatus(row.status)]][str(row.uid)] = row.queue_number
+
+    # a queue day asked for by name is reset even when it has no active entries left
+    if queue_uid is not None and service_day is not None:
+        days.setdefault((queue_uid, service_day), defaultdict(dict))
+
+    for (day_queue_uid, day), lanes in days.items():
+        await redis.replace_live_queue(str(day_queue_uid), day.isoformat(), lanes)
+
+    return len(rows)
+
+
+async def get_position(session: AsyncSession, entry: QueueEntry) -> tuple[int, int | None]:
+    """(patients_ahead, now_serving) of an active entry. Raises RedisError when redis is down."""
+    args = (str(entry.queue_uid), entry.service_day.isoformat(), str(entry.uid), entry.queue_number, LANES[QueueEntryStatus(entry.status)])
+
+    tracked, patients_ahead, now_serving = await redis.get_live_queue_position(*args)
+
+    if not tracked:
+        await rebuild_live_queues(session, entry.queue_uid, entry.service_day)
+        tracked, patients_ahead, now_serving = await redis.get_live_queue_position(*args)
+
+    return patients_ahead, now_serving
+
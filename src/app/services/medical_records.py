@@ -4,9 +4,10 @@ from collections.abc import Sequence
 import uuid
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
-from src.app.models import MedicalRecord, Patient, Practitioner, Hospital, MedicalRecordFile
+from src.app.models import MedicalRecord
 from src.app.schemas import MedicalRecordCreate, MedicalRecordUpdate
+from src.app.core import loaders
+from src.app.core.pagination import Keyset, paginate
 
 
 
@@ -27,41 +28,31 @@ async def create_medical_record(payload: MedicalRecordCreate, session: AsyncSess
     
 async def get_medical_record_by_id(record_id: uuid.UUID, session: AsyncSession) -> Optional[MedicalRecord]:
     """Retrieve a medical record by its unique identifier."""
-    stmt = select(MedicalRecord).where(MedicalRecord.uid == record_id).options(
-        selectinload(MedicalRecord.patient).selectinload(Patient.user),
-        selectinload(MedicalRecord.practitioner).selectinload(Practitioner.user),
-        selectinload(MedicalRecord.hospital).selectinload(Hospital.user)
-    )
+    stmt = select(MedicalRecord).where(MedicalRecord.uid == record_id)
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
 
 
-async def get_medical_record_by_patient(patient_id: uuid.UUID, hospital_id: uuid.UUID | None, offset: int, limit: int, session: AsyncSession) -> Sequence[MedicalRecord]:
-    """Retrieve medical records for a specific patient in a hospital with pagination."""
+# a patient's records are listed newest first
+MEDICAL_RECORD_KEYSET = Keyset("medical_records", MedicalRecord.created_at, MedicalRecord.uid, descending=True)
+
+
+async def get_medical_record_by_patient(patient_id: uuid.UUID, hospital_id: uuid.UUID | None, limit: int, session: AsyncSession, cursor: Optional[str] = None, offset: Optional[int] = None) -> dict:
+    """Retrieve medical records for a specific patient in a hospital, one page at a time."""
     stmt = select(MedicalRecord).where(
         MedicalRecord.patient_uid == patient_id,
-        ).options(
-        selectinload(MedicalRecord.patient).selectinload(Patient.user),
-        selectinload(MedicalRecord.practitioner).selectinload(Practitioner.user),
-        selectinload(MedicalRecord.hospital).selectinload(Hospital.user),
-        selectinload(MedicalRecord.files).selectinload(MedicalRecordFile.medical_record)
-    ).offset(offset).limit(limit)
+        ).options(*loaders.MEDICAL_RECORD_DETAIL)
     
     if hospital_id is not None:
         stmt = stmt.where(MedicalRecord.hospital_uid == hospital_id
     )
 
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    return await paginate(session, stmt, MEDICAL_RECORD_KEYSET, limit, cursor, offset)
 
 
 async def get_all_hospital_medical_records(hospital_id: uuid.UUID, offset: int, limit: int, session: AsyncSession) -> Sequence[MedicalRecord]:
     """Retrieve all medical records for a specific hospital."""
-    stmt = select(MedicalRecord).where(MedicalRecord.hospital_uid == hospital_id).options(
-        selectinload(MedicalRecord.patient).selectinload(Patient.user),
-        selectinload(MedicalRecord.practitioner_uid).selectinload(Practitioner.user),
-        selectinload(MedicalRecord.hospital).selectinload(Hospital.user)
-    ).offset(offset).limit(limit)
+    stmt = select(MedicalRecord).where(MedicalRecord.hospital_uid == hospital_id).offset(offset).limit(limit)
     result = await session.execute(stmt)
     return result.scalars().all()
 
@@ -1,13 +1,83 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import case, delete, func, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 from sqlmodel import select
-from src.app.models import Message, User
+from src.app.models import Conversation, Message
 from src.app.schemas import MessageCreate, MessageUpdate
 from src.app.websocket.connection_manager import manager
 from src.app.services.notification import send_notification
+from src.app.core.principal import Principal
+from src.app.core import loaders
+from src.app.core.pagination import Keyset, paginate
 
 
-async def send_message(payload: MessageCreate, current_user: User, session: AsyncSession):
+# history pages walk back from the newest message, sync walks forward from the last one a client has.
+# both share one name so a cursor from either is accepted by the other
+HISTORY_KEYSET = Keyset("messages", Message.timestamp, Message.uid, descending=True)
+SYNC_KEYSET = Keyset("messages", Message.timestamp, Message.uid)
+
+# the inbox, most recent conversation first
+CONVERSATION_KEYSET = Keyset("conversations", Conversation.last_message_at, Conversation.uid, descending=True)
+
+
+async def _record_in_conversations(session: AsyncSession, message: Message):
+    """Upsert both sides' inbox rows for a new message, the receiver's unread counter goes up by one."""
+    if message.sender_uid == message.receiver_uid:
+        sides = [(message.sender_uid, message.receiver_uid, 0)]
+    else:
+        sides = [(message.sender_uid, message.receiver_uid, 0), (message.receiver_uid, message.sender_uid, 1)]
+
+    # same lock order in every transaction so two people writing to each other can't deadlock
+    sides.sort(key=lambda side: (str(side[0]), str(side[1])))
+
+    table = Conversation.__table__ #type: ignore
+    stmt = insert(table).values([
+        {
+            "uid": uuid.uuid4(),
+            "user_uid": user_uid,
+            "peer_uid": peer_uid,
+            "last_message_uid": message.uid,
+            "last_message_at": message.timestamp,
+            "unread_count": unread,
+        }
+        for user_uid, peer_uid, unread in sides
+    ])
+
+    # messages committed out of order must not move last_message back in time
+    newer = stmt.excluded.last_message_at >= table.c.last_message_at
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_conversation_user_peer",
+        set_={
+            "last_message_uid": case((newer, stmt.excluded.last_message_uid), else_=table.c.last_message_uid),
+            "last_message_at": func.greatest(table.c.last_message_at, stmt.excluded.last_message_at),
+            "unread_count": table.c.unread_count + stmt.excluded.unread_count,
+        },
+    )
+
+    await session.execute(stmt)
+
+
+async def _discount_unread(session: AsyncSession, user_uid: uuid.UUID, peer_uid: uuid.UUID, count: int, read_up_to: datetime | None = None) -> int:
+    """Take count messages off user's unread counter for peer, returns what is left."""
+    values: dict = {"unread_count": func.greatest(Conversation.unread_count - count, 0)}
+    if read_up_to is not None:
+        # greatest() skips NULL, the first read cursor is taken as is
+        values["read_up_to"] = func.greatest(Conversation.read_up_to, read_up_to)
+
+    stmt = (
+        update(Conversation)
+        .where(Conversation.user_uid == user_uid, Conversation.peer_uid == peer_uid) #type: ignore
+        .values(**values)
+        .returning(Conversation.unread_count)
+    )
+
+    return (await session.execute(stmt)).scalar_one_or_none() or 0
+
+
+async def send_message(payload: MessageCreate, current_user: Principal, session: AsyncSession):
 
     """
     Create a new message via REST.
@@ -22,8 +92,18 @@ async def send_message(payload: MessageCreate, current_user: User, session: Asyn
     )
 
     session.add(message)
+    await session.flush()
+    await _record_in_conversations(session, message)
+
+    # written by the commit below
+    await send_notification(session, payload.receiver_uid, {
+        "title": "New Message",
+        "body": f"You have a new message from {current_user.username}",
+        "data": {"message_uid": str(message.uid)}
+    })
+
     await session.commit()
-    await session.refresh(message)
+    message = await loaders.reload(message, loaders.MESSAGE_READ, session)
 
     # Build room_id consistently
     room_id = "_".join(sorted([str(message.sender_uid), str(message.receiver_uid)]))
@@ -42,43 +122,94 @@ async def send_message(payload: MessageCreate, current_user: User, session: Asyn
         }
     )
 
-    await send_notification(session, payload.receiver_uid, {
-        "title": "New Message",
-        "body": f"You have a new message from {current_user.username}",
-        "data": {"message_uid": str(message.uid)}
-    })
-
     return message
 
 
-async def get_chat_history(other_user_id: str, session: AsyncSession, current_user: User,
-):
-   
-    """Fetch chat history between the logged-in user and another user."""
+def _conversation(user_uid: uuid.UUID, other_user_uid: uuid.UUID):
+    """Messages between two users in either direction, in the shape of ix_messages_pair_timestamp_uid."""
+    low, high = sorted((user_uid, other_user_uid)) # python orders UUIDs bytewise like postgres
+
+    return select(Message).where(
+        func.least(Message.sender_uid, Message.receiver_uid) == low,
+        func.greatest(Message.sender_uid, Message.receiver_uid) == high,
+    )
+
+
+async def get_chat_history(other_user_id: uuid.UUID, session: AsyncSession, current_user: Principal, limit: int = 50, before: str | None = None) -> dict:
+
+    """Fetch one page of chat history between the logged-in user and another user, the newest page unless before is given."""
+
+    page = await paginate(session, _conversation(current_user.uid, other_user_id), HISTORY_KEYSET, limit, before)
+    items = page["items"]
+
+    return {
+        "items": items[::-1],
+        "before_cursor": page["next_cursor"],
+        # only the newest page knows where a later sync has to start
+        "since_cursor": SYNC_KEYSET.encode(items[0]) if items and before is None else None,
+        "has_more": False,
+    }
+
+
+async def sync_chat(other_user_id: uuid.UUID, since: str | None, session: AsyncSession, current_user: Principal, limit: int = 100) -> dict:
+
+    """Messages between the logged-in user and another user that came after the since cursor, from the start without one."""
+
+    page = await paginate(session, _conversation(current_user.uid, other_user_id), SYNC_KEYSET, limit, since)
+    items = page["items"]
+
+    return {
+        "items": items,
+        "before_cursor": None,
+        "since_cursor": SYNC_KEYSET.encode(items[-1]) if items else since,
+        "has_more": page["next_cursor"] is not None,
+    }
+
+
+
+async def get_conversations(session: AsyncSession, current_user: Principal, limit: int = 20, cursor: str | None = None) -> dict:
+
+    """The logged-in user's inbox: every peer with the last message and unread count, in one query per page."""
+
+    stmt = (
+        select(Conversation)
+        .where(Conversation.user_uid == current_user.uid)
+        .options(joinedload(Conversation.peer), joinedload(Conversation.last_message)) #type: ignore
+    )
+
+    return await paginate(session, stmt, CONVERSATION_KEYSET, limit, cursor)
+
+
+async def mark_conversation_read(peer_uid: uuid.UUID, up_to: datetime | None, session: AsyncSession, current_user: Principal) -> dict:
+
+    """Mark every message received from peer up to up_to (default now) read, in one UPDATE."""
+
+    up_to = up_to or datetime.now(timezone.utc)
 
     result = await session.execute(
-        select(Message)
-        .options(
-            selectinload(Message.sender),
-            selectinload(Message.receiver)
-        )
+        update(Message)
         .where(
-            ((Message.sender_uid == current_user.uid) & (Message.receiver_uid == other_user_id)) |
-            ((Message.sender_uid == other_user_id) & (Message.receiver_uid == current_user.uid))
+            # the pair conditions keep this on ix_messages_pair_timestamp_uid
+            func.least(Message.sender_uid, Message.receiver_uid) == min(peer_uid, current_user.uid),
+            func.greatest(Message.sender_uid, Message.receiver_uid) == max(peer_uid, current_user.uid),
+            Message.sender_uid == peer_uid,
+            Message.receiver_uid == current_user.uid,
+            Message.timestamp <= up_to, #type: ignore
+            Message.is_read.is_(False), #type: ignore
         )
-        .order_by(Message.timestamp) #type: ignore
+        .values(is_read=True)
     )
+    marked = result.rowcount
 
-    return result.scalars().all()
+    unread = await _discount_unread(session, current_user.uid, peer_uid, marked, read_up_to=up_to)
+    await session.commit()
 
+    return {"marked_read": marked, "unread_count": unread}
 
 
 async def get_message(message_uid: str, session: AsyncSession):
 
-    stmt = select(Message).where(Message.uid == message_uid).options(
-        selectinload(Message.sender),
-        selectinload(Message.receiver)
-    )
+    stmt = select(Message).where(Message.uid == message_uid).options(*loaders.MESSAGE_READ)
 
     result = await session.execute(stmt)
 
@@ -108,7 +239,12 @@ async def delete_message(message_uid: str, session: AsyncSession):
 
     if message is not None:
 
+        if not message.is_read:
+            await _discount_unread(session, message.receiver_uid, message.sender_uid, 1)
+
         await session.delete(message)
+        await session.flush()
+        await _replace_last_message(session, message)
 
         await session.commit()
     
@@ -116,16 +252,45 @@ async def delete_message(message_uid: str, session: AsyncSession):
         return None
 
 
+async def _replace_last_message(session: AsyncSession, deleted: Message):
+    """Point inbox rows that showed a deleted message at the one before it, or drop them once the conversation is empty."""
+    pair = (
+        (Conversation.user_uid == deleted.sender_uid) & (Conversation.peer_uid == deleted.receiver_uid)
+    ) | (
+        (Conversation.user_uid == deleted.receiver_uid) & (Conversation.peer_uid == deleted.sender_uid)
+    )
+
+    previous = (await session.execute(
+        _conversation(deleted.sender_uid, deleted.receiver_uid)
+        .order_by(*HISTORY_KEYSET.order_by())
+        .limit(1)
+    )).scalar_one_or_none()
+
+    # the FK already cleared last_message_uid on the rows that showed it
+    showing = pair & Conversation.last_message_uid.is_(None) #type: ignore
+
+    if previous is None:
+        await session.execute(delete(Conversation).where(pair))
+    else:
+        await session.execute(
+            update(Conversation)
+            .where(showing)
+            .values(last_message_uid=previous.uid, last_message_at=previous.timestamp)
+        )
+
+
 
 async def mark_as_read(message_uid: str, session: AsyncSession):
 
     message = await get_message(message_uid, session)
 
     if message:
-        message.is_read = True
+        if not message.is_read:
+            message.is_read = True
+            await _discount_unread(session, message.receiver_uid, message.sender_uid, 1)
 
         await session.commit()
-        await session.refresh(message)
+        message = await loaders.reload(message, loaders.MESSAGE_READ, session)
         return message
     
     return None
\ No newline at end of file
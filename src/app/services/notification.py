@@ -1,13 +1,42 @@
+import asyncio
+import logging
 import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 
+from sqlalchemy import delete, event, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from src.app.models import Notification
+from sqlalchemy.orm import Session
+from sqlmodel import select
+from src.app.models import Notification, NotificationCounter
+from src.app.core.pagination import Keyset, paginate
 from src.app.websocket.connection_manager import manager
 
+"""
+notification outbox
+send_notification only stages a notification on the caller's session, nothing is written or pushed yet.
+The session's next commit writes everything staged with one multi-row INSERT inside that same transaction,
+and the websocket pushes go out once the commit has succeeded. A rollback drops whatever was staged.
+get_session commits notifications a request staged after its last commit, other sessions write them on their next commit.
+notification_counters holds each user's unread count, moved in the same transaction as the rows it counts.
+"""
+
+logger = logging.getLogger(__name__)
+
+STAGED = "notification_outbox" # session.info key: staged, not written yet
+WRITTEN = "notification_written" # session.info key: written in the commit under way, pushed after it
+
+# pushes running in the background, held so they are not garbage collected mid-flight
+_pushes: set[asyncio.Task] = set()
+
+# the inbox, newest first
+NOTIFICATION_KEYSET = Keyset("notifications", Notification.timestamp, Notification.uid, descending=True)
+
 
 async def send_notification(session: AsyncSession, user_uid: uuid.UUID, payload: dict):
     """
-    Store a notification in DB and broadcast in real-time.
+    Stage a notification, it is stored by the session's next commit and broadcast in real-time after it.
     """
     notif = Notification(
         user_uid=user_uid,
@@ -15,17 +44,162 @@ async def send_notification(session: AsyncSession, user_uid: uuid.UUID, payload:
         body=payload.get("body", ""),
         data=payload.get("data", {})
     )
-    session.add(notif)
+    session.info.setdefault(STAGED, []).append(notif)
+
+    return notif
+
+
+def has_staged_notifications(session: AsyncSession) -> bool:
+    return bool(session.info.get(STAGED))
+
+
+async def _push(notifications: list[Notification]):
+    for notif in notifications:
+        try:
+            # Push via websocket (channel = notifications, room = user_uid)
+            await manager.broadcast("notifications", notif.user_uid, {
+                "uid": notif.uid,
+                "title": notif.title,
+                "body": notif.body,
+                "data": notif.data,
+                "timestamp": notif.timestamp.isoformat()
+            })
+        except Exception as e:
+            # the notification is stored, the client sees it on its next fetch
+            logger.warning(f"Could not push notification {notif.uid}: {e}")
+
+
+@event.listens_for(Session, "before_commit")
+def _write_staged(session: Session):
+    staged = session.info.pop(STAGED, None)
+    if not staged:
+        return
+
+    # runs inside AsyncSession.commit, so this sync execute is carried by the same async connection
+    session.execute(insert(Notification).values([
+        {
+            "uid": notif.uid,
+            "user_uid": notif.user_uid,
+            "title": notif.title,
+            "body": notif.body,
+            "data": notif.data,
+            "is_read": notif.is_read,
+            "timestamp": notif.timestamp,
+        }
+        for notif in staged
+    ]))
+
+    # same lock order in every transaction so concurrent fan-outs can't deadlock on the counters
+    unread = sorted(Counter(notif.user_uid for notif in staged).items(), key=lambda item: str(item[0]))
+    table = NotificationCounter.__table__ #type: ignore
+    stmt = pg_insert(table).values([
+        {"uid": uuid.uuid4(), "user_uid": user_uid, "unread_count": count}
+        for user_uid, count in unread
+    ])
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.user_uid],
+        set_={"unread_count": table.c.unread_count + stmt.excluded.unread_count},
+    ))
+
+    session.info.setdefault(WRITTEN, []).extend(staged)
+
+
+@event.listens_for(Session, "after_commit")
+def _push_committed(session: Session):
+    written = session.info.pop(WRITTEN, None)
+    if not written:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning(f"No event loop to push {len(written)} committed notifications from")
+        return
+
+    task = loop.create_task(_push(written))
+    _pushes.add(task)
+    task.add_done_callback(_pushes.discard)
+
+
+async def wait_for_pushes():
+    """Wait for the pushes in flight, for callers whose event loop is about to close (a Celery task's asyncio.run)."""
+    if _pushes:
+        await asyncio.gather(*_pushes, return_exceptions=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_staged(session: Session):
+    session.info.pop(STAGED, None)
+    session.info.pop(WRITTEN, None)
+
+
+async def get_notifications(user_uid: uuid.UUID, session: AsyncSession, limit: int = 20, cursor: str | None = None, unread_only: bool = False) -> dict:
+
+    stmt = select(Notification).where(Notification.user_uid == user_uid)
+
+    if unread_only:
+        stmt = stmt.where(Notification.is_read.is_(False)) #type: ignore
+
+    return await paginate(session, stmt, NOTIFICATION_KEYSET, limit, cursor)
+
+
+async def get_unread_count(user_uid: uuid.UUID, session: AsyncSession) -> int:
+
+    stmt = select(NotificationCounter.unread_count).where(NotificationCounter.user_uid == user_uid)
+
+    return (await session.execute(stmt)).scalar_one_or_none() or 0
+
+
+async def mark_notifications_read(
+    user_uid: uuid.UUID,
+    session: AsyncSession,
+    uids: list[uuid.UUID] | None = None,
+    up_to: datetime | None = None,
+) -> dict:
+    """Mark the user's unread notifications read in one UPDATE: the ones listed, else everything up to up_to (default now)."""
+
+    stmt = update(Notification).where(
+        Notification.user_uid == user_uid,
+        Notification.is_read.is_(False), #type: ignore
+    )
+
+    if uids:
+        stmt = stmt.where(Notification.uid.in_(uids)) #type: ignore
+    else:
+        stmt = stmt.where(Notification.timestamp <= (up_to or datetime.now(timezone.utc))) #type: ignore
+
+    marked = (await session.execute(stmt.values(is_read=True))).rowcount
+
+    unread = (await session.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_uid == user_uid) #type: ignore
+        .values(unread_count=func.greatest(NotificationCounter.unread_count - marked, 0))
+        .returning(NotificationCounter.unread_count)
+    )).scalar_one_or_none() or 0
+
     await session.commit()
-    await session.refresh(notif)
 
-    # Push via websocket (channel = notifications, room = user_uid)
-    await manager.broadcast("notifications", user_uid, { #type: ignore
-        "uid": notif.uid,
-        "title": notif.title,
-        "body": notif.body,
-        "data": notif.data,
-        "timestamp": notif.timestamp.isoformat()
-    })
+    return {"marked_read": marked, "unread_count": unread}
 
-    return notif
+
+async def prune_read_notifications(session: AsyncSession, older_than: timedelta, batch_size: int) -> int:
+    """Delete read notifications older than older_than, batch_size rows per transaction. Returns the rows deleted."""
+
+    cutoff = datetime.now(timezone.utc) - older_than
+    deleted = 0
+
+    while True:
+        # "is_read = true" is folded to the predicate of the partial ix_notifications_read_timestamp
+        batch = (
+            select(Notification.uid)
+            .where(Notification.is_read == True, Notification.timestamp < cutoff) #type: ignore
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+
+        result = await session.execute(delete(Notification).where(Notification.uid.in_(batch))) #type: ignore
+        await session.commit()
+
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
@@ -1,15 +1,15 @@
 import uuid
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
 from sqlmodel import select, or_
 from src.app.models import Patient
 from typing import Optional
 from src.app.schemas import PatientProfileUpdate
+from src.app.core import loaders
 
 
-async def get_patient(patient_uid: uuid.UUID, session: AsyncSession):
+async def get_patient(patient_uid: uuid.UUID, session: AsyncSession, profile: tuple = loaders.PATIENT_CARD):
     
-    stmt = select(Patient).where(Patient.uid == patient_uid).options(selectinload(Patient.user))
+    stmt = select(Patient).where(Patient.uid == patient_uid).options(*profile)
 
     result = await session.execute(stmt)
 
@@ -37,7 +37,7 @@ async def update_patient(payload: PatientProfileUpdate, patient_uid: uuid.UUID,
             setattr(patient_to_update, k, v)
         
         await session.commit()
-        await session.refresh(patient_to_update)
+        patient_to_update = await loaders.reload(patient_to_update, loaders.PATIENT_CARD, session)
         
         return patient_to_update
     
@@ -48,7 +48,7 @@ async def update_patient(payload: PatientProfileUpdate, patient_uid: uuid.UUID,
 
 async def get_all_patients(skip: int, limit: int, search: Optional[str], session: AsyncSession):
 
-    stmt = select(Patient).offset(skip).limit(limit).options(selectinload(Patient.user))
+    stmt = select(Patient).offset(skip).limit(limit).options(*loaders.PATIENT_CARD)
 
     if search:
         stmt = stmt.filter(or_(Patient.first_name.contains(search), Patient.last_name.contains(search), Patient.hospital_card_id.contains(search))) #type: ignore
@@ -60,7 +60,7 @@ async def get_all_patients(skip: int, limit: int, search: Optional[str], session
 
 async def get_patient_by_card(card_id: str, session: AsyncSession):
 
-    stmt = select(Patient).where(Patient.hospital_card_id == card_id).options(selectinload(Patient.user))
+    stmt = select(Patient).where(Patient.hospital_card_id == card_id).options(*loaders.PATIENT_CARD)
 
     result = await session.execute(stmt)
 
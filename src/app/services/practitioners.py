@@ -2,11 +2,13 @@ from typing import Optional
 import uuid
 from sqlalchemy import func, or_, desc, asc
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import selectinload
 from sqlmodel import select
-from src.app.models import PractitionerStatus, Hospital, PractitionerType, Practitioner
+from src.app.models import PractitionerStatus, PractitionerType, Practitioner
 from src.app.schemas import PractitionerProfileUpdate
 from src.app.services import department as dpt_service
+from src.app.core.principal import invalidate_principal
+from src.app.core import loaders
+from src.app.core.pagination import Keyset, paginate
 
 
 async def search_practitioner(
@@ -21,11 +23,7 @@ async def search_practitioner(
     sort_by: str = "last_name",
     sort_dir: str = "asc",
 ) -> dict:
-    stmt = select(Practitioner).options(
-        selectinload(Practitioner.user),
-        selectinload(Practitioner.hospital).selectinload(Hospital.user),
-        selectinload(Practitioner.department)
-    )
+    stmt = select(Practitioner).options(*loaders.PRACTITIONER_CARD)
 
     if q:
         pattern = f"%{q}%"
@@ -65,30 +63,23 @@ async def search_practitioner(
     }
 
 
-async def get_all_practitioners(skip: int, limit: int, practitioner_type: PractitionerType | None, session: AsyncSession):
+PRACTITIONER_KEYSET = Keyset("practitioners", Practitioner.last_name, Practitioner.uid)
 
-   stmt = select(Practitioner).offset(skip).limit(limit).options(
-       selectinload(Practitioner.user),
-       selectinload(Practitioner.hospital).selectinload(Hospital.user),
-       selectinload(Practitioner.department)
-   )
+
+async def get_all_practitioners(limit: int, practitioner_type: PractitionerType | None, session: AsyncSession, cursor: Optional[str] = None, skip: Optional[int] = None) -> dict:
+
+   stmt = select(Practitioner).options(*loaders.PRACTITIONER_CARD)
 
    if practitioner_type:
-       filtered = stmt.where(Practitioner.practitioner_type == practitioner_type)
-   
-   result = await session.execute(filtered)
+       stmt = stmt.where(Practitioner.practitioner_type == practitioner_type)
 
-   return result.scalars().all()
+   return await paginate(session, stmt, PRACTITIONER_KEYSET, limit, cursor, skip)
 
 
 async def get_pending_practitioners(hospital_id: uuid.UUID, type: PractitionerType | None, skip: int, limit: int, session: AsyncSession):
     
     stmt = select(Practitioner).where(Practitioner.hospital_uid == hospital_id, 
-                                Practitioner.status == PractitionerStatus.UNDER_REVIEW).offset(skip).limit(limit).options(
-       selectinload(Practitioner.user),
-       selectinload(Practitioner.hospital).selectinload(Hospital.user),
-       selectinload(Practitioner.department)
-   )
+                                Practitioner.status == PractitionerStatus.UNDER_REVIEW).offset(skip).limit(limit).options(*loaders.PRACTITIONER_CARD)
     
     if type:
         stmt = stmt.where(Practitioner.practitioner_type == type)
@@ -99,11 +90,7 @@ async def get_pending_practitioners(hospital_id: uuid.UUID, type: PractitionerTy
 
 async def get_practitioner(practitioner_id: uuid.UUID, session: AsyncSession):
 
-   stmt = select(Practitioner).where(Practitioner.uid == practitioner_id).options(
-       selectinload(Practitioner.user),
-       selectinload(Practitioner.hospital).selectinload(Hospital.user),
-       selectinload(Practitioner.department)
-   )
+   stmt = select(Practitioner).where(Practitioner.uid == practitioner_id).options(*loaders.PRACTITIONER_CARD)
    result = await session.execute(stmt)
 
    return result.scalar_one_or_none()
@@ -117,7 +104,7 @@ async def change_practitioner_availability(practitioner_id: uuid.UUID, session:
       practitioner.is_available = not practitioner.is_available
 
       await session.commit()
-      await session.refresh(practitioner)
+      practitioner = await loaders.reload(practitioner, loaders.PRACTITIONER_CARD, session)
    
    return practitioner
    
@@ -130,7 +117,9 @@ async def approve_practitioner(practitioner_id: uuid.UUID, session: AsyncSession
       practitioner_to_approve.status = status
 
       await session.commit()
-      await session.refresh(practitioner_to_approve)
+      practitioner_to_approve = await loaders.reload(practitioner_to_approve, loaders.PRACTITIONER_CARD, session)
+
+      await invalidate_principal(practitioner_to_approve.user_uid)
 
       return practitioner_to_approve
    else:
@@ -148,7 +137,9 @@ async def update_practitioner_info(practitioner_id: uuid.UUID, update_data: Prac
             setattr(practitioner_to_update, k, v)
 
         await session.commit()
-        await session.refresh(practitioner_to_update)
+        practitioner_to_update = await loaders.reload(practitioner_to_update, loaders.PRACTITIONER_CARD, session)
+
+        await invalidate_principal(practitioner_to_update.user_uid)
 
         return practitioner_to_update
     return None
@@ -170,4 +161,6 @@ async def delete_practitioner(practitioner_id: uuid.UUID, session: AsyncSession)
 
     
     await session.delete(practitioner)
-    await session.commit()
\ No newline at end of file
+    await session.commit()
+
+    await invalidate_principal(practitioner.user_uid)
\ No newline at end of file
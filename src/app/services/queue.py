@@ -1,12 +1,31 @@
+import logging
 import uuid
 
-from sqlalchemy import func
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from redis.exceptions import RedisError
 
 from src.app.models import Appointment, QueueEntry, AppointmentStatus, Queue, QueueEntryStatus
+from src.app.core import loaders, redis
+from src.app.services import live_queue
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NUMBER_ATTEMPTS = 3 #Numbers tried before a check-in gives up, a clash only follows a redis outage
+
+ACTIVE_ENTRY_STATUSES = tuple(live_queue.LANES)
+
+# where a queue entry ends up when its appointment reaches a final status
+APPOINTMENT_ENTRY_STATUS = {
+    AppointmentStatus.COMPLETED: QueueEntryStatus.COMPLETED,
+    AppointmentStatus.CANCELED: QueueEntryStatus.LEFT,
+    AppointmentStatus.MISSED: QueueEntryStatus.SKIPPED,
+}
 
 
 async def create_queue_entry(
@@ -48,27 +67,51 @@ async def create_queue_entry(
     if not queue:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No queue found for the hospital.")
 
-    # Generate queue number
-    queue_number = await get_next_queue_number(
-        session=session,
-        queue_uid=queue.uid,
-    )
+    joined_at = datetime.now(timezone.utc)
+    service_day = joined_at.date()
 
-    # Create queue entry
-    queue_entry = QueueEntry(
-        queue_uid=queue.uid,
-        appointment_uid=appointment.uid,
-        patient_uid=appointment.patient_uid,
-        queue_number=queue_number,
-        status=QueueEntryStatus.WAITING,
-        joined_at=datetime.now(timezone.utc),
-    )
+    for attempt in range(QUEUE_NUMBER_ATTEMPTS):
+        # Generate queue number
+        queue_number = await get_next_queue_number(
+            session=session,
+            queue_uid=queue.uid,
+            service_day=service_day,
+            resync=attempt > 0,
+        )
+
+        # Create queue entry
+        queue_entry = QueueEntry(
+            queue_uid=queue.uid,
+            appointment_uid=appointment.uid,
+            patient_uid=appointment.patient_uid,
+            queue_number=queue_number,
+            service_day=service_day,
+            status=QueueEntryStatus.WAITING,
+            joined_at=joined_at,
+        )
+
+        # Save queue entry, a clash only rolls back the savepoint and not the caller's changes
+        try:
+            async with session.begin_nested():
+                session.add(queue_entry)
+        except IntegrityError:
+            existing_entry = await get_queue_by_appointment_uid(
+                session=session,
+                appointment_uid=appointment.uid,
+            )
+            if existing_entry:
+                return existing_entry
+            continue
+
+        break
+    else:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not allocate a queue number, please try again.")
 
-    # Save queue entry
-    session.add(queue_entry)
     await session.commit()
     await session.refresh(queue_entry)
 
+    await live_queue.track(queue_entry)
+
     return {"message": "Queue entered successfully."}
 
 
@@ -92,38 +135,58 @@ async def get_queue(session: AsyncSession, hospital_uid: uuid.UUID) -> Queue | N
     return result.scalar_one_or_none()
 
 
-async def get_next_queue_number(queue_uid: uuid.UUID, session: AsyncSession) -> int:
+async def get_last_queue_number(session: AsyncSession, queue_uid: uuid.UUID, service_day: date) -> int:
+    # one step down the (queue_uid, service_day, queue_number) unique index
     statement = select(func.max(QueueEntry.queue_number)).where(
-        QueueEntry.queue_uid == queue_uid
+        QueueEntry.queue_uid == queue_uid,
+        QueueEntry.service_day == service_day,
     )
 
     result = await session.execute(statement)
 
-    last_queue_number = result.scalar_one_or_none()
+    return result.scalar_one_or_none() or 0
+
+
+async def get_next_queue_number(queue_uid: uuid.UUID, session: AsyncSession, service_day: date, resync: bool = False) -> int:
+    """
+    Next number of a queue for the day from a redis counter, atomic across workers and free of table scans.
+    Without redis it locks the queue row until the caller commits and continues from the day's highest number.
+    """
+    try:
+        queue_number = await redis.next_queue_number(str(queue_uid), service_day.isoformat())
+
+        if queue_number == 1 or resync:
+            # new, expired or lost counter: skip the numbers handed out without it
+            last_queue_number = await get_last_queue_number(session, queue_uid, service_day)
+            if last_queue_number >= queue_number:
+                queue_number = await redis.next_queue_number(str(queue_uid), service_day.isoformat(), floor=last_queue_number)
+
+        return queue_number
+
+    except RedisError as e:
+        logger.warning(f"Queue number counter unavailable, falling back to a row lock: {e}")
+
+    await session.execute(select(Queue.uid).where(Queue.uid == queue_uid).with_for_update())
 
-    return (last_queue_number or 0) + 1
+    return await get_last_queue_number(session, queue_uid, service_day) + 1
 
 async def get_active_queue_entry_by_patient_uid(session: AsyncSession, patient_uid: uuid.UUID) -> QueueEntry | None:
 
     statement = (select(QueueEntry) .where(
         QueueEntry.patient_uid == patient_uid,
-        QueueEntry.status.in_( # type: ignore
-            [
-                QueueEntryStatus.WAITING,
-                QueueEntryStatus.CALLED,
-                QueueEntryStatus.SERVING,
-            ]),
-    ))
+        QueueEntry.status.in_(ACTIVE_ENTRY_STATUSES), # type: ignore
+    ).options(*loaders.QUEUE_ENTRY_DETAIL))
 
     result = await session.execute(statement)
 
     return result.scalar_one_or_none()
 
-async def count_patients_ahead(session: AsyncSession, queue_uid: uuid.UUID, queue_number: int,) -> int:
+async def count_patients_ahead(session: AsyncSession, queue_uid: uuid.UUID, service_day: date, queue_number: int,) -> int:
 
     statement = select(
     func.count(QueueEntry.uid)).where(
     QueueEntry.queue_uid == queue_uid,
+    QueueEntry.service_day == service_day,
     QueueEntry.status == QueueEntryStatus.WAITING,
     QueueEntry.queue_number < queue_number)
 
@@ -132,9 +195,62 @@ async def count_patients_ahead(session: AsyncSession, queue_uid: uuid.UUID, queu
     return result.scalar_one()
 
 
+async def get_queue_position(session: AsyncSession, queue_entry: QueueEntry) -> dict:
+    """Position, patients ahead and now serving of an active entry, from the live queue with a SQL fallback."""
+    try:
+        patients_ahead, now_serving = await live_queue.get_position(session, queue_entry)
+    except RedisError as e:
+        logger.warning(f"Live queue unavailable, counting in the database: {e}")
+        patients_ahead = await count_patients_ahead(session, queue_entry.queue_uid, queue_entry.service_day, queue_entry.queue_number)
+        now_serving = await get_now_serving(session, queue_entry.queue_uid, queue_entry.service_day)
+
+    return {
+        "position": patients_ahead + 1,
+        "patients_ahead": patients_ahead,
+        "now_serving": now_serving,
+    }
+
+
+async def get_now_serving(session: AsyncSession, queue_uid: uuid.UUID, service_day: date) -> int | None:
+
+    statement = select(
+    func.max(QueueEntry.queue_number)).where(
+    QueueEntry.queue_uid == queue_uid,
+    QueueEntry.service_day == service_day,
+    QueueEntry.status.in_([QueueEntryStatus.CALLED, QueueEntryStatus.SERVING])) # type: ignore
+
+    result = await session.execute(statement)
+
+    return result.scalar_one_or_none()
+
+
+async def close_queue_entries(session: AsyncSession, appointment_uids: list[uuid.UUID], new_status: QueueEntryStatus) -> list[QueueEntry]:
+    """
+    Moves the still active queue entries of these appointments to a final status.
+    Runs in the caller's transaction, hand the returned entries to live_queue.untrack after the commit.
+    """
+    if not appointment_uids:
+        return []
+
+    statement = (
+        update(QueueEntry)
+        .where(
+            QueueEntry.appointment_uid.in_(appointment_uids), # type: ignore
+            QueueEntry.status.in_(ACTIVE_ENTRY_STATUSES), # type: ignore
+        )
+        .values(status=new_status, completed_at=datetime.now(timezone.utc))
+        .returning(QueueEntry)
+        .execution_options(synchronize_session="fetch")
+    )
+
+    result = await session.execute(statement)
+
+    return list(result.scalars().all())
+
+
 async def get_queues(session: AsyncSession):
     stmt = select(Queue)
 
     result = await session.execute(stmt)
 
-    return result.scalars()
\ No newline at end of file
+    return result.scalars()
@@ -2,24 +2,25 @@ import uuid
 
 from fastapi import HTTPException, status
 from sqlmodel import select
-from sqlalchemy.orm import selectinload
-from src.app.models import AppointmentStatus, Hospital, Patient, Practitioner, User, Review
+from src.app.models import AppointmentStatus, Review
 from src.app.schemas import ReviewCreate
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from src.app.core import errors
+from src.app.core import errors, loaders
+from src.app.core.pagination import Keyset, paginate
+from src.app.core.principal import Principal
 from src.app.services import appointment as appt_service, hospital as hp_service, practitioners as pract_service
 from src.app.services.review_calculator import calculate_average
 
 async def create_review(
     review_data: ReviewCreate,
-    current_user: User,
+    current_user: Principal,
     session: AsyncSession,
 ):
     """
     Create a review for a completed appointment.
     """
 
-    if not current_user.patient:
+    if current_user.patient_uid is None:
         raise errors.NotAuthorized()
 
     appointment = await appt_service.get_appointment_by_id(
@@ -30,7 +31,7 @@ async def create_review(
     if not appointment:
         raise errors.AppointmentNotFound()
 
-    if appointment.patient_uid != current_user.patient.uid:
+    if appointment.patient_uid != current_user.patient_uid:
         raise errors.NotAuthorized()
 
     if appointment.status != AppointmentStatus.COMPLETED:
@@ -61,7 +62,7 @@ async def create_review(
 
     review = Review(
         appointment_uid=appointment.uid,
-        patient_uid=current_user.patient.uid,
+        patient_uid=current_user.patient_uid,
         hospital_uid=appointment.hospital_uid,
         practitioner_uid=appointment.practitioner_uid,
         hospital_rating=review_data.hospital_rating,
@@ -86,7 +87,7 @@ async def create_review(
     )
 
     await session.commit()
-    await session.refresh(review)
+    review = await loaders.reload(review, loaders.REVIEW_DETAIL, session)
 
     return review
 
@@ -98,68 +99,50 @@ async def get_review_by_appointment(appointment_uid, session:AsyncSession):
 
     return result.scalar_one_or_none()
 
+# reviews are listed newest first
+REVIEW_KEYSET = Keyset("reviews", Review.created_at, Review.uid, descending=True)
+
 async def get_hospital_reviews(
     hospital_uid: uuid.UUID,
-    offset: int,
     limit: int,
     session: AsyncSession,
-):
+    cursor: str | None = None,
+    offset: int | None = None,
+) -> dict:
     stmt = (
         select(Review)
         .where(Review.hospital_uid == hospital_uid)
-        .options(
-            selectinload(Review.patient).selectinload(Patient.user),
-            selectinload(Review.practitioner).selectinload(Practitioner.user),
-        )
-        .order_by(Review.created_at.desc())
-        .offset(offset)
-        .limit(limit)
+        .options(*loaders.REVIEW_DETAIL)
     )
 
-    result = await session.execute(stmt)
-
-    return result.scalars().all()
+    return await paginate(session, stmt, REVIEW_KEYSET, limit, cursor, offset)
 
 async def get_practitioner_reviews(
     practitioner_uid: uuid.UUID,
-    offset: int,
     limit: int,
     session: AsyncSession,
-):
+    cursor: str | None = None,
+    offset: int | None = None,
+) -> dict:
     stmt = (
         select(Review)
         .where(Review.practitioner_uid == practitioner_uid)
-        .options(
-            selectinload(Review.hospital).selectinload(Hospital.user),
-            selectinload(Review.patient).selectinload(Patient.user),
-        )
-        .order_by(Review.created_at.desc())
-        .offset(offset)
-        .limit(limit)
+        .options(*loaders.REVIEW_DETAIL)
     )
 
-    result = await session.execute(stmt)
-
-    return result.scalars().all()
+    return await paginate(session, stmt, REVIEW_KEYSET, limit, cursor, offset)
 
 async def get_patient_reviews(
     patient_uid: uuid.UUID,
-    offset: int,
     limit: int,
     session: AsyncSession,
-):
+    cursor: str | None = None,
+    offset: int | None = None,
+) -> dict:
     stmt = (
         select(Review)
         .where(Review.patient_uid == patient_uid)
-        .options(
-            selectinload(Review.hospital).selectinload(Hospital.user),
-            selectinload(Review.practitioner).selectinload(Practitioner.user),
-        )
-        .order_by(Review.created_at.desc())
-        .offset(offset)
-        .limit(limit)
+        .options(*loaders.REVIEW_DETAIL)
     )
 
-    result = await session.execute(stmt)
-
-    return result.scalars().all()
\ No newline at end of file
+    return await paginate(session, stmt, REVIEW_KEYSET, limit, cursor, offset)
\ No newline at end of file
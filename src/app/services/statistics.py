@@ -1,259 +1,254 @@
-import uuid
-
-from sqlalchemy import func, extract
-from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlmodel import select
-from src.app.models import Appointment, AppointmentStatus, Department, Practitioner
-from typing import List, Dict, Any
-from datetime import date, timedelta
-from src.app.schemas import HospitalAppointmentStats
-
-
-async def get_hospital_appointment_stats(hospital_uid: uuid.UUID, session: AsyncSession) -> HospitalAppointmentStats:
-    """Get core appointment statistics for a hospital"""
-    today = date.today()
-
-    # Total appointments
-    total_stmt = select(func.count(Appointment.uid)).where(Appointment.hospital_uid == hospital_uid)
-    total_result = await session.execute(total_stmt)
-    total_appointments = total_result.scalar_one()
-
-    # Today's appointments
-    todays_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.scheduled_time.is_not(None), #type: ignore
-        func.date(Appointment.scheduled_time) == today
-    )
-    todays_result = await session.execute(todays_stmt)
-    todays_appointments = todays_result.scalar_one()
-
-    # Pending appointments
-    pending_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.PENDING
-    )
-    pending_result = await session.execute(pending_stmt)
-    pending_appointments = pending_result.scalar_one()
-
-    # Completed appointments
-    completed_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.COMPLETED
-    )
-    completed_result = await session.execute(completed_stmt)
-    completed_appointments = completed_result.scalar_one()
-
-    # Canceled appointments
-    canceled_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.CANCELED
-    )
-    canceled_result = await session.execute(canceled_stmt)
-    canceled_appointments = canceled_result.scalar_one()
-
-    # In-progress appointments
-    in_progress_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.IN_PROGRESS
-    )
-    in_progress_result = await session.execute(in_progress_stmt)
-    in_progress_appointments = in_progress_result.scalar_one()
-
-    return HospitalAppointmentStats(
-        total_appointments=total_appointments,
-        todays_appointments=todays_appointments,
-        pending_appointments=pending_appointments,
-        completed_appointments=completed_appointments,
-        canceled_appointments=canceled_appointments,
-        in_progress_appointments=in_progress_appointments,
-    )
-
-
-async def get_hospital_time_based_stats(hospital_uid: uuid.UUID, session: AsyncSession) -> Dict[str, int]:
-    """Get time-based appointment statistics"""
-    today = date.today()
-    week_start = today - timedelta(days=today.weekday())  # Monday
-    week_end = week_start + timedelta(days=6)
-    # month_start = today.replace(day=1)
-    next_week = today + timedelta(days=7)
-
-    # This week's appointments
-    week_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.scheduled_time.isnot(None), #type: ignore
-        func.date(Appointment.scheduled_time).between(week_start, week_end)
-    )
-    week_result = await session.execute(week_stmt)
-    this_week_appointments = week_result.scalar_one()
-
-    # This month's appointments
-    month_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.scheduled_time.isnot(None), #type: ignore
-        extract('year', Appointment.scheduled_time) == today.year, #type: ignore
-        extract('month', Appointment.scheduled_time) == today.month #type: ignore
-    )
-    month_result = await session.execute(month_stmt)
-    this_month_appointments = month_result.scalar_one()
-
-    # Upcoming appointments (next 7 days)
-    upcoming_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.scheduled_time.isnot(None), #type: ignore
-        func.date(Appointment.scheduled_time) > today,
-        func.date(Appointment.scheduled_time) <= next_week
-    )
-    upcoming_result = await session.execute(upcoming_stmt)
-    upcoming_appointments = upcoming_result.scalar_one()
-
-    return {
-        "this_week_appointments": this_week_appointments,
-        "this_month_appointments": this_month_appointments,
-        "upcoming_appointments": upcoming_appointments,
-    }
-
-
-async def get_hospital_average_appointments_per_day(hospital_uid: uuid.UUID, session: AsyncSession) -> float:
-    """Calculate average appointments per day over the last 30 days"""
-    today = date.today()
-    thirty_days_ago = today - timedelta(days=30)
-
-    # Count appointments in last 30 days
-    count_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.scheduled_time.isnot(None), #type: ignore
-        func.date(Appointment.scheduled_time) >= thirty_days_ago
-    )
-    count_result = await session.execute(count_stmt)
-    total_in_period = count_result.scalar_one()
-
-    # Average per day
-    if total_in_period > 0:
-        return round(total_in_period / 30, 2)
-    return 0.0
-
-
-async def get_hospital_rescheduled_appointments(hospital_uid: uuid.UUID, session: AsyncSession) -> int:
-    """Get count of rescheduled appointments"""
-    stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.RESCHEDULED
-    )
-    result = await session.execute(stmt)
-    return result.scalar_one()
-
-
-async def get_hospital_average_wait_time(hospital_uid: uuid.UUID, session: AsyncSession) -> float:
-    """Calculate average wait time in hours for completed appointments"""
-    stmt = select(
-        func.avg(
-            func.extract('epoch', Appointment.completed_time - Appointment.check_in_time) / 3600 #type: ignore
-        )
-    ).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.COMPLETED,
-        Appointment.check_in_time.isnot(None), #type: ignore
-        Appointment.completed_time.isnot(None) #type: ignore
-    )
-    result = await session.execute(stmt)
-    avg_wait = result.scalar_one()
-    return round(avg_wait, 2) if avg_wait else 0.0
-
-
-async def get_hospital_cancellation_rate(hospital_uid: uuid.UUID, session: AsyncSession) -> float:
-    """Calculate cancellation rate as percentage"""
-    total_stmt = select(func.count(Appointment.uid)).where(Appointment.hospital_uid == hospital_uid)
-    total_result = await session.execute(total_stmt)
-    total = total_result.scalar_one()
-
-    if total == 0:
-        return 0.0
-
-    canceled_stmt = select(func.count(Appointment.uid)).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.status == AppointmentStatus.CANCELED
-    )
-    canceled_result = await session.execute(canceled_stmt)
-    canceled = canceled_result.scalar_one()
-
-    return round((canceled / total) * 100, 2)
-
-
-async def get_appointments_by_department(hospital_uid: uuid.UUID, session: AsyncSession) -> List[Dict[str, Any]]:
-    """Get appointment counts grouped by department"""
-    stmt = select(
-        Department.name,
-        func.count(Appointment.uid).label('count')
-    ).join(
-        Appointment, Department.uid == Appointment.department_uid
-    ).where(
-        Appointment.hospital_uid == hospital_uid
-    ).group_by(
-        Department.uid, Department.name
-    ).order_by(
-        func.count(Appointment.uid).desc()
-    )
-
-    result = await session.execute(stmt)
-    return [{"department": row.name, "count": row.count} for row in result]
-
-
-async def get_appointments_by_practitioner(hospital_uid: uuid.UUID, session: AsyncSession) -> List[Dict[str, Any]]:
-    """Get appointment counts grouped by practitioners"""
-    stmt = select(
-        Practitioner.last_name,
-        func.count(Appointment.uid).label('count')
-    ).join(
-        Appointment, Practitioner.uid == Appointment.practitioner_uid
-    ).where(
-        Appointment.hospital_uid == hospital_uid,
-        Appointment.practitioner_uid.isnot(None) #type: ignore
-    ).group_by(
-        Practitioner.uid, Practitioner.last_name
-    ).order_by(
-        func.count(Appointment.uid).desc()
-    )
-
-    result = await session.execute(stmt)
-    return [{"Practitioner": row.full_name, "count": row.count} for row in result]
-
-
-async def get_top_departments_by_appointments(hospital_uid: uuid.UUID, session: AsyncSession, limit: int = 5) -> List[Dict[str, Any]]:
-    """Get top departments by appointment volume"""
-    data = await get_appointments_by_department(hospital_uid, session)
-    return data[:limit]
-
-
-async def get_top_practitioners_by_appointments(hospital_uid: uuid.UUID, session: AsyncSession, limit: int = 5) -> List[Dict[str, Any]]:
-    """Get top practitioners by appointment volume"""
-    data = await get_appointments_by_practitioner(hospital_uid, session)
-    return data[:limit]
-
-
-async def get_patient_total_appointments(patient_uid: str, session: AsyncSession) -> int:
-    """Get total appointments for a patient"""
-    stmt = select(func.count(Appointment.uid)).where(Appointment.patient_uid == patient_uid)
-    result = await session.execute(stmt)
-    return result.scalar_one()
-
-
-async def get_patient_upcoming_appointments(patient_uid: str, session: AsyncSession) -> int:
-    """Get upcoming appointments for a patient"""
-    today = date.today()
-    stmt = select(func.count(Appointment.uid)).where(
-        Appointment.patient_uid == patient_uid,
-        Appointment.scheduled_time.isnot(None), #type: ignore
-        func.date(Appointment.scheduled_time) >= today
-    )
-    result = await session.execute(stmt)
-    return result.scalar_one()
-
-
-async def get_patient_completed_appointments(patient_uid: str, session: AsyncSession) -> int:
-    """Get completed appointments for a patient"""
-    stmt = select(func.count(Appointment.uid)).where(
-        Appointment.patient_uid == patient_uid,
-        Appointment.status == AppointmentStatus.COMPLETED
-    )
-    result = await session.execute(stmt)
+import calendar
+import uuid
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from src.app.models import Appointment, AppointmentStatus, Department, HospitalDailyStats, Practitioner
+from typing import List, Dict, Any
+from datetime import date, datetime, timedelta, timezone
+from src.app.schemas import HospitalAppointmentStats, HospitalDashboard
+
+
+def _appointment_counters(hospital_uid: uuid.UUID):
+    """
+    All-time appointment counters, as conditional aggregates.
+    Postgres answers it with one pass over the hospital's rows (ix_appointments_hospital_status_scheduled).
+    """
+    wait_hours = func.extract('epoch', Appointment.completed_time - Appointment.check_in_time) / 3600 #type: ignore
+
+    return select(
+        func.count().label("total_appointments"),
+        func.count().filter(Appointment.status == AppointmentStatus.PENDING).label("pending_appointments"),
+        func.count().filter(Appointment.status == AppointmentStatus.COMPLETED).label("completed_appointments"),
+        func.count().filter(Appointment.status == AppointmentStatus.CANCELED).label("canceled_appointments"),
+        func.count().filter(Appointment.status == AppointmentStatus.IN_PROGRESS).label("in_progress_appointments"),
+        func.count().filter(Appointment.status == AppointmentStatus.RESCHEDULED).label("rescheduled_appointments"),
+        func.avg(wait_hours).filter(
+            Appointment.status == AppointmentStatus.COMPLETED,
+            Appointment.check_in_time.isnot(None), #type: ignore
+            Appointment.completed_time.isnot(None) #type: ignore
+        ).label("average_wait_time_hours"),
+    ).where(Appointment.hospital_uid == hospital_uid)
+
+
+def _window_counters(hospital_uid: uuid.UUID):
+    """
+    Day, week, month, upcoming and 30-day counters from the hospital_daily_stats rollup.
+    Only the rows inside the widest window are read, whatever the size of the appointments table.
+    """
+    today = datetime.now(timezone.utc).date()
+    week_start = today - timedelta(days=today.weekday())  # Monday
+    week_end = week_start + timedelta(days=6)
+    month_start = today.replace(day=1)
+    month_end = month_start.replace(day=calendar.monthrange(today.year, today.month)[1])
+    next_week = today + timedelta(days=7)
+    thirty_days_ago = today - timedelta(days=30)
+
+    day = HospitalDailyStats.day
+    total = HospitalDailyStats.total
+
+    def window(*criteria):
+        return func.coalesce(func.sum(total).filter(*criteria), 0)
+
+    return select(
+        window(day == today).label("todays_appointments"),
+        window(day.between(week_start, week_end)).label("this_week_appointments"), #type: ignore
+        window(day.between(month_start, month_end)).label("this_month_appointments"), #type: ignore
+        window(day > today, day <= next_week).label("upcoming_appointments"),
+        window(day.between(thirty_days_ago, today)).label("last_30_days_appointments"), #type: ignore
+    ).where(
+        HospitalDailyStats.hospital_uid == hospital_uid,
+        day.between(min(week_start, month_start, thirty_days_ago), max(week_end, month_end, next_week)), #type: ignore
+    )
+
+
+async def get_hospital_window_counters(hospital_uid: uuid.UUID, session: AsyncSession) -> Dict[str, Any]:
+    """Run the time window counters for a hospital against the daily rollup"""
+    result = await session.execute(_window_counters(hospital_uid))
+    counters = dict(result.one()._mapping)
+
+    counters["average_appointments_per_day"] = round(counters.pop("last_30_days_appointments") / 30, 2)
+
+    return counters
+
+
+async def get_hospital_appointment_counters(hospital_uid: uuid.UUID, session: AsyncSession) -> Dict[str, Any]:
+    """Run the dashboard counters for a hospital: one aggregate over appointments, one over the daily rollup"""
+    result = await session.execute(_appointment_counters(hospital_uid))
+    counters = dict(result.one()._mapping)
+
+    total = counters["total_appointments"]
+    avg_wait = counters["average_wait_time_hours"]
+
+    counters["average_wait_time_hours"] = round(float(avg_wait), 2) if avg_wait else 0.0
+    counters["cancellation_rate_percent"] = round((counters["canceled_appointments"] / total) * 100, 2) if total else 0.0
+    counters.update(await get_hospital_window_counters(hospital_uid, session))
+
+    return counters
+
+
+async def get_hospital_appointment_stats(hospital_uid: uuid.UUID, session: AsyncSession) -> HospitalAppointmentStats:
+    """Get core appointment statistics for a hospital"""
+    counters = await get_hospital_appointment_counters(hospital_uid, session)
+    return HospitalAppointmentStats.model_validate(counters)
+
+
+async def get_hospital_time_based_stats(hospital_uid: uuid.UUID, session: AsyncSession) -> Dict[str, int]:
+    """Get time-based appointment statistics"""
+    counters = await get_hospital_window_counters(hospital_uid, session)
+
+    return {
+        "this_week_appointments": counters["this_week_appointments"],
+        "this_month_appointments": counters["this_month_appointments"],
+        "upcoming_appointments": counters["upcoming_appointments"],
+    }
+
+
+async def get_hospital_average_appointments_per_day(hospital_uid: uuid.UUID, session: AsyncSession) -> float:
+    """Calculate average appointments per day over the last 30 days"""
+    counters = await get_hospital_window_counters(hospital_uid, session)
+    return counters["average_appointments_per_day"]
+
+
+async def get_hospital_rescheduled_appointments(hospital_uid: uuid.UUID, session: AsyncSession) -> int:
+    """Get count of rescheduled appointments"""
+    counters = await get_hospital_appointment_counters(hospital_uid, session)
+    return counters["rescheduled_appointments"]
+
+
+async def get_hospital_average_wait_time(hospital_uid: uuid.UUID, session: AsyncSession) -> float:
+    """Calculate average wait time in hours for completed appointments"""
+    counters = await get_hospital_appointment_counters(hospital_uid, session)
+    return counters["average_wait_time_hours"]
+
+
+async def get_hospital_cancellation_rate(hospital_uid: uuid.UUID, session: AsyncSession) -> float:
+    """Calculate cancellation rate as percentage"""
+    counters = await get_hospital_appointment_counters(hospital_uid, session)
+    return counters["cancellation_rate_percent"]
+
+
+async def get_hospital_dashboard(hospital_uid: uuid.UUID, session: AsyncSession, limit: int = 5) -> HospitalDashboard:
+    """Everything the hospital dashboard shows: the counters plus the top departments and practitioners"""
+    counters = await get_hospital_appointment_counters(hospital_uid, session)
+
+    return HospitalDashboard(
+        **counters,
+        top_departments=await get_top_departments_by_appointments(hospital_uid, session, limit),
+        top_practitioners=await get_top_practitioners_by_appointments(hospital_uid, session, limit),
+    )
+
+
+async def get_appointments_by_department(hospital_uid: uuid.UUID, session: AsyncSession) -> List[Dict[str, Any]]:
+    """Get appointment counts grouped by department"""
+    stmt = select(
+        Department.name,
+        func.count(Appointment.uid).label('count')
+    ).join(
+        Appointment, Department.uid == Appointment.department_uid
+    ).where(
+        Appointment.hospital_uid == hospital_uid
+    ).group_by(
+        Department.uid, Department.name
+    ).order_by(
+        func.count(Appointment.uid).desc()
+    )
+
+    result = await session.execute(stmt)
+    return [{"department": row.name, "count": row.count} for row in result]
+
+
+async def get_appointments_by_practitioner(hospital_uid: uuid.UUID, session: AsyncSession) -> List[Dict[str, Any]]:
+    """Get appointment counts grouped by practitioners"""
+    stmt = select(
+        Practitioner.last_name,
+        func.count(Appointment.uid).label('count')
+    ).join(
+        Appointment, Practitioner.uid == Appointment.practitioner_uid
+    ).where(
+        Appointment.hospital_uid == hospital_uid,
+        Appointment.practitioner_uid.isnot(None) #type: ignore
+    ).group_by(
+        Practitioner.uid, Practitioner.last_name
+    ).order_by(
+        func.count(Appointment.uid).desc()
+    )
+
+    result = await session.execute(stmt)
+    return [{"Practitioner": row.last_name, "count": row.count} for row in result]
+
+
+async def get_top_departments_by_appointments(hospital_uid: uuid.UUID, session: AsyncSession, limit: int = 5) -> List[Dict[str, Any]]:
+    """Get top departments by appointment volume, ranked in SQL from the daily rollup"""
+    count = func.sum(HospitalDailyStats.total)
+
+    stmt = select(
+        Department.name,
+        count.label('count')
+    ).join(
+        HospitalDailyStats, Department.uid == HospitalDailyStats.department_uid
+    ).where(
+        HospitalDailyStats.hospital_uid == hospital_uid
+    ).group_by(
+        Department.uid, Department.name
+    ).having(
+        count > 0
+    ).order_by(
+        count.desc()
+    ).limit(limit)
+
+    result = await session.execute(stmt)
+    return [{"department": row.name, "count": row.count} for row in result]
+
+
+async def get_top_practitioners_by_appointments(hospital_uid: uuid.UUID, session: AsyncSession, limit: int = 5) -> List[Dict[str, Any]]:
+    """Get top practitioners by appointment volume, ranked in SQL from the daily rollup"""
+    count = func.sum(HospitalDailyStats.total)
+
+    stmt = select(
+        Practitioner.last_name,
+        count.label('count')
+    ).join(
+        HospitalDailyStats, Practitioner.uid == HospitalDailyStats.practitioner_uid
+    ).where(
+        HospitalDailyStats.hospital_uid == hospital_uid
+    ).group_by(
+        Practitioner.uid, Practitioner.last_name
+    ).having(
+        count > 0
+    ).order_by(
+        count.desc()
+    ).limit(limit)
+
+    result = await session.execute(stmt)
+    return [{"Practitioner": row.last_name, "count": row.count} for row in result]
+
+
+async def get_patient_total_appointments(patient_uid: str, session: AsyncSession) -> int:
+    """Get total appointments for a patient"""
+    stmt = select(func.count(Appointment.uid)).where(Appointment.patient_uid == patient_uid)
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
+async def get_patient_upcoming_appointments(patient_uid: str, session: AsyncSession) -> int:
+    """Get upcoming appointments for a patient"""
+    today = date.today()
+    stmt = select(func.count(Appointment.uid)).where(
+        Appointment.patient_uid == patient_uid,
+        Appointment.scheduled_time.isnot(None), #type: ignore
+        func.date(Appointment.scheduled_time) >= today
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one()
+
+
+async def get_patient_completed_appointments(patient_uid: str, session: AsyncSession) -> int:
+    """Get completed appointments for a patient"""
+    stmt = select(func.count(Appointment.uid)).where(
+        Appointment.patient_uid == patient_uid,
+        Appointment.status == AppointmentStatus.COMPLETED
+    )
+    result = await session.execute(stmt)
     return result.scalar_one()
\ No newline at end of file
@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from src.app.models import BlacklistedToken, PasswordResetToken, RefreshToken, SignupLink
+
+"""
+expired token cleanup
+Every table of short-lived tokens is purged on a schedule so it stays small enough for the token/jti lookups to stay in cache.
+Rows go in chunked DELETEs over the index on their expiry column, one transaction per chunk, so no purge holds many locks for long.
+"""
+
+
+@dataclass(frozen=True)
+class ExpiringTable:
+    """A token table, rows are purged once `column` is more than `lifetime` in the past."""
+    name: str
+    model: Any
+    column: Any
+    lifetime: timedelta = timedelta(0)
+
+
+EXPIRING_TABLES = (
+    # signup links are valid for 24 hours from when they were sent
+    ExpiringTable("signup_links", SignupLink, SignupLink.created_at, timedelta(hours=24)),
+    ExpiringTable("password_reset_tokens", PasswordResetToken, PasswordResetToken.expires_at),
+    ExpiringTable("refreshtokens", RefreshToken, RefreshToken.expires_at),
+    # past expires_at the token itself is refused, its blacklist entry has nothing left to guard
+    ExpiringTable("blacklistedtokens", BlacklistedToken, BlacklistedToken.expires_at),
+)
+
+
+async def purge_expired(session: AsyncSession, table: ExpiringTable, batch_size: int) -> int:
+    """Delete the expired rows of one table, batch_size rows per transaction. Returns the rows deleted."""
+
+    cutoff = datetime.now(timezone.utc) - table.lifetime
+    deleted = 0
+
+    while True:
+        batch = (
+            select(table.model.uid)
+            .where(table.column < cutoff)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+
+        result = await session.execute(delete(table.model).where(table.model.uid.in_(batch)))
+        await session.commit()
+
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+async def purge_expired_tokens(session: AsyncSession, batch_size: int) -> dict[str, int]:
+    """Purge every token table. Returns the rows deleted per table."""
+
+    return {table.name: await purge_expired(session, table, batch_size) for table in EXPIRING_TABLES}
@@ -1,57 +1,139 @@
-import cloudinary.uploader
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
 
 from fastapi import UploadFile
 
-import cloudinary
+from src.app.core.storage import CHUNK_SIZE, StoredFile, get_storage
 
-from src.app.core.settings import Config
 
-cloudinary.config(
-    cloud_name=Config.CLOUDINARY_CLOUD_NAME,
-    api_key=Config.CLOUDINARY_API_KEY,
-    api_secret=Config.CLOUDINARY_API_SECRET,
-    secure=True,
-)
+logger = logging.getLogger(__name__)
 
 
-# print("Cloud Name:", Config.CLOUDINARY_CLOUD_NAME)
-# print("API Key:", Config.CLOUDINARY_API_KEY)
-# print("API Secret:", "***" if Config.CLOUDINARY_API_SECRET else None)
+def _media(stored: StoredFile) -> dict:
+    return {
+        "url": stored.url,
+        "public_id": stored.public_id,
+        "width": stored.width,
+        "height": stored.height,
+        "bytes": stored.bytes,
+        "derivatives": [
+            {
+                "variant": derivative.variant,
+                "url": derivative.url,
+                "public_id": derivative.public_id,
+                "width": derivative.width,
+                "height": derivative.height,
+                "bytes": derivative.bytes,
+            }
+            for derivative in stored.derivatives
+        ],
+    }
+
+
+def media_public_ids(upload: dict) -> list[str]:
+    """Every stored file behind an upload, the original and its derivatives."""
+    return [upload["public_id"], *(derivative["public_id"] for derivative in upload["derivatives"])]
 
 
 async def upload_profile_picture(
     file: UploadFile,
 ):
-    result = cloudinary.uploader.upload(
+    stored = await get_storage().save(
         file.file,
         folder="queuemedix/profile_pictures",
+        filename=file.filename,
     )
 
-    return result["secure_url"]
+    return stored.url
 
 
 async def upload_cover_image(
     file: UploadFile,
 ):
-    result = cloudinary.uploader.upload(
+    stored = await get_storage().save(
         file.file,
         folder="queuemedix/hospital_cover-images",
+        filename=file.filename,
     )
 
-    return result["secure_url"]
+    return stored.url
 
 
 async def upload_hospital_media(file: UploadFile, folder: str):
 
-    result = cloudinary.uploader.upload(
-        file.file,
-        folder=folder
+    stored = await get_storage().save(file.file, folder=folder, filename=file.filename, derivatives=True)
+
+    return _media(stored)
+
+
+async def upload_hospital_medias(files: list[UploadFile], folder: str) -> list[dict]:
+    """Upload several files at once, all or none: when one fails the others are removed again."""
+
+    results = await asyncio.gather(
+        *(upload_hospital_media(file, folder) for file in files),
+        return_exceptions=True,
     )
 
-    return {
-        "url": result["secure_url"],
-        "public_id": result["public_id"],
-        "width": result["width"],
-        "height": result["height"],
-        "bytes": result["bytes"]
-    }
\ No newline at end of file
+    failed = [result for result in results if isinstance(result, BaseException)]
+
+    if failed:
+        await discard_uploads([result for result in results if not isinstance(result, BaseException)]) #type: ignore
+        raise failed[0]
+
+    return results #type: ignore
+
+
+async def discard_uploads(uploads: list[dict]):
+    """
+    Remove the stored files of uploads no record points to, after a failed batch or a failed insert.
+    Only logs what could not be removed, the caller is already handling the error that got it here.
+    """
+    results = await asyncio.gather(
+        *(delete_media(*media_public_ids(upload)) for upload in uploads),
+        return_exceptions=True,
+    )
+
+    for upload, result in zip(uploads, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Could not remove orphaned upload {upload['public_id']}: {result}")
+
+
+async def delete_media(*public_ids: str) -> bool:
+    """Delete stored files, ids shared by several files (cloudinary derivatives) are deleted once."""
+    storage = get_storage()
+    deleted = await asyncio.gather(*(storage.delete(public_id) for public_id in dict.fromkeys(public_ids)))
+    return all(deleted)
+
+
+def _copy_to_temp(file: UploadFile) -> str:
+    with tempfile.NamedTemporaryFile(prefix="upload-", delete=False) as out:
+        shutil.copyfileobj(file.file, out, CHUNK_SIZE)
+        return out.name
+
+
+async def stash_upload(file: UploadFile) -> str:
+    """
+    Copy an upload to a temp file that outlives the request, for uploads finished in the background.
+    The caller owns the file, hand it to upload_stashed_media which removes it.
+    """
+    return await asyncio.to_thread(_copy_to_temp, file)
+
+
+async def upload_stashed_media(path: str, folder: str, filename: str | None = None) -> dict:
+    try:
+        with open(path, "rb") as stream:
+            stored = await get_storage().save(stream, folder=folder, filename=filename, derivatives=True)
+    finally:
+        discard_stash(path)
+
+    return _media(stored)
+
+
+def discard_stash(path: str):
+    try:
+        os.unlink(path)
+    except OSError as e:
+        logger.warning(f"Could not remove stashed upload {path}: {e}")
@@ -1,10 +1,12 @@
 import uuid
 
 from sqlalchemy import exists
-from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from src.app.models import User, Hospital, Practitioner
+from src.app.models import User
+from src.app.core.principal import invalidate_principal
+from src.app.core import loaders
+from src.app.core.pagination import Keyset, paginate
 
 
 async def get_username(username: str, session: AsyncSession):
@@ -20,14 +22,7 @@ async def get_user_email(email: str, session: AsyncSession):
     stmt = (
         select(User)
         .where(User.email == email)
-        .options(
-            selectinload(User.admin),
-            selectinload(User.patient),
-            selectinload(User.hospital).selectinload(Hospital.admin),
-            selectinload(User.hospital).selectinload(Hospital.department),
-            selectinload(User.practitioner).selectinload(Practitioner.department),
-            selectinload(User.practitioner).selectinload(Practitioner.hospital),
-        )
+        .options(*loaders.USER_ME)
     )
     result = await session.execute(stmt)
 
@@ -53,15 +48,18 @@ async def update_user_info(user: User, user_data: dict, session: AsyncSession):
 
     await session.commit()
 
+    await invalidate_principal(user.uid)
+
     return user
 
 
-async def get_all_users(skip: int, limit: int, session: AsyncSession):
+# users are listed oldest first
+USER_KEYSET = Keyset("users", User.created_at, User.uid)
 
-    stmt = select(User).offset(skip).limit(limit)
-    result = await session.execute(stmt)
 
-    return result.scalars().all()
+async def get_all_users(limit: int, session: AsyncSession, cursor: str | None = None, skip: int | None = None) -> dict:
+
+    return await paginate(session, select(User), USER_KEYSET, limit, cursor, skip)
 
 
 async def get_user_by_id(user_id: uuid.UUID, session: AsyncSession):
@@ -82,6 +80,8 @@ async def delete_user(user_uid: uuid.UUID, session: AsyncSession):
 
         await session.commit()
 
+        await invalidate_principal(user_uid)
+
         return {}
 
     else:
@@ -1,18 +1,72 @@
+import json
 import uuid
+from datetime import datetime, time, timedelta, timezone
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, asc
-from sqlalchemy.orm import selectinload
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from sqlalchemy import select, asc, or_, and_
 from src.app.websocket.connection_manager import manager
-from src.app.models import Appointment
-from src.app.core.dependencies import get_session
+from src.app.models import Appointment, AppointmentStatus
+from src.app.database.main import async_session_factory
 from src.app.core.utils import remaining_time
+from src.app.core import loaders, redis
 
 router = APIRouter(prefix="/ws", tags=["Appointments", "Websockets"])
 
+"""
+Queue board protocol
+on connect the server sends {"type": "snapshot", "seq": n, "data": [...]} with the hospital's active window,
+then {"type": "added" | "updated" | "removed", "seq": n, "data": {...}} for every change.
+"updated" data replaces (or inserts) the row with the same id, "removed" data only carries the id.
+A client that sees a seq other than last_seq + 1 sends {"type": "resync"} and gets a fresh snapshot.
+"""
+
+# statuses that still need the hospital's attention, terminal ones only show on the day they were scheduled
+ACTIVE_STATUSES = (AppointmentStatus.PENDING, AppointmentStatus.IN_PROGRESS, AppointmentStatus.RESCHEDULED)
+
+
+def _today_bounds() -> tuple[datetime, datetime]:
+    start = datetime.combine(datetime.now(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def in_active_window(appointment: Appointment) -> bool:
+    """Whether the appointment belongs on the queue board right now"""
+    if appointment.status in ACTIVE_STATUSES:
+        return True
+
+    if appointment.scheduled_time is None:
+        return False
+
+    start, end = _today_bounds()
+    return start <= appointment.scheduled_time < end
+
+
+def queue_row(uid: uuid.UUID, first_name: str, last_name: str, patient_uid: uuid.UUID, scheduled_time: datetime, status: AppointmentStatus) -> dict:
+    """A queue board row from its columns, for bulk updates that hold no loaded appointment"""
+    return {
+        "id": uid,
+        "patient": f"{first_name} {last_name}",
+        "patient_id": patient_uid,
+        "time": scheduled_time.isoformat(),
+        "status": status.value,
+        "appointment_due": remaining_time(scheduled_time),
+    }
+
+
+def queue_item(appointment: Appointment) -> dict:
+    """The queue board row of an appointment, needs the patient loaded"""
+    return queue_row(
+        appointment.uid,
+        appointment.patient.first_name,
+        appointment.patient.last_name,
+        appointment.patient_uid,
+        appointment.scheduled_time, #type: ignore
+        appointment.status,
+    )
+
+
 @router.websocket("/appointments/{hospital_uid}")
-async def appointments_ws(websocket: WebSocket, hospital_uid: uuid.UUID, session: AsyncSession = Depends(get_session)):
+async def appointments_ws(websocket: WebSocket, hospital_uid: uuid.UUID):
     """
     WebSocket endpoint that streams appointment queue updates filtered by hospital.
     """
@@ -20,70 +74,79 @@ async def appointments_ws(websocket: WebSocket, hospital_uid: uuid.UUID, session
 
     try:
         # Send initial queue data when a client connects
-        await send_initial_queue(websocket, session, hospital_uid)
+        await send_snapshot(websocket, hospital_uid)
 
         while True:
-            await websocket.receive_text()  # keep alive
+            text = await websocket.receive_text()  # keep alive, or a resync request
+
+            try:
+                request = json.loads(text)
+            except ValueError:
+                continue
+
+            if isinstance(request, dict) and request.get("type") == "resync":
+                await send_snapshot(websocket, hospital_uid)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, "appointments", str(hospital_uid))
+        await manager.disconnect(websocket, "appointments", str(hospital_uid))
 
 
-async def notify_queue_update(session: AsyncSession, hospital_uid: uuid.UUID):
+async def send_snapshot(websocket: WebSocket, hospital_uid: uuid.UUID):
     """
-    Sends updated queue only to clients connected to the specific hospital.
+    Sends the hospital's active window to one client, tagged with the sequence number it reflects.
+    Opens its own short session so an idle socket never holds a database connection.
     """
-    queue = (
-    await session.execute(
-        select(Appointment)
-        .options(selectinload(Appointment.patient))
-        .where(Appointment.hospital_uid == hospital_uid)
-        .order_by(asc(Appointment.scheduled_time)) #type: ignore
-    )
-).scalars().all()
-
-    queue_data = [
-        {
-            "id": appt.uid,
-            "patient": f"{appt.patient.first_name} {appt.patient.last_name}",
-            "patient_id": appt.patient_uid,
-            "time": appt.scheduled_time.isoformat(), #type: ignore
-            "status": appt.status.value,
-            "appointment_due": remaining_time(appt.scheduled_time), #type: ignore
-        }
-        for appt in queue
-    ]
-
-    await manager.broadcast("appointments", str(hospital_uid), {
-        "type": "queue_update",
-        "data": queue_data
+    # read seq before the rows: a change landing in between is sent again as a delta, which clients apply idempotently
+    seq = await redis.get_queue_seq(str(hospital_uid))
+    start, end = _today_bounds()
+
+    async with async_session_factory() as session:
+        queue = (
+            await session.execute(
+                select(Appointment)
+                .options(*loaders.APPOINTMENT_QUEUE)
+                .where(
+                    Appointment.hospital_uid == hospital_uid,
+                    or_(
+                        Appointment.status.in_(ACTIVE_STATUSES), #type: ignore
+                        and_(Appointment.scheduled_time >= start, Appointment.scheduled_time < end), #type: ignore
+                    ),
+                )
+                .order_by(asc(Appointment.scheduled_time)) #type: ignore
+            )
+        ).scalars().all()
+
+        data = [queue_item(appt) for appt in queue]
+
+    await manager.send(websocket, "appointments", str(hospital_uid), {
+        "type": "snapshot",
+        "seq": seq,
+        "data": data,
     })
 
 
-async def send_initial_queue(websocket: WebSocket, session: AsyncSession, hospital_uid: uuid.UUID):
+async def publish_queue_events(hospital_uid: uuid.UUID, events: list[tuple[str, dict]]):
+    """Number (kind, data) events for a hospital and broadcast them, call after the change is committed"""
+    if not events:
+        return
+
+    last = await redis.next_queue_seq(str(hospital_uid), len(events))
+
+    for seq, (kind, data) in enumerate(events, start=last - len(events) + 1):
+        await manager.broadcast("appointments", str(hospital_uid), {
+            "type": kind,
+            "seq": seq,
+            "data": data,
+        })
+
+
+async def notify_queue_change(appointment: Appointment, created: bool = False, deleted: bool = False):
     """
-    Sends the current queue to a newly connected WebSocket client for a specific hospital.
+    Sends the one-row delta for a changed appointment to clients of its hospital.
+    Appointments that leave the active window are sent as removed.
     """
-    queue = (
-        await session.execute(
-            select(Appointment)
-            .where(Appointment.hospital_uid == hospital_uid)
-            .order_by(asc(Appointment.scheduled_time)) #type: ignore
-        )
-    ).scalars().all()
-
-    queue_data = [
-        {
-            "id": appt.uid,
-            "patient": f"{appt.patient.first_name} {appt.patient.last_name}",
-            "patient_id": appt.patient_uid,
-            "time": appt.scheduled_time.isoformat(), #type: ignore
-            "status": appt.status.value,
-            "appointment_due": remaining_time(appt.scheduled_time), #type: ignore
-        }
-        for appt in queue
-    ]
-
-    await websocket.send_json({
-        "type": "queue_update",
-        "data": queue_data
-    })
+    if deleted or not in_active_window(appointment):
+        event = ("removed", {"id": appointment.uid})
+    else:
+        event = ("added" if created else "updated", queue_item(appointment))
+
+    await publish_queue_events(appointment.hospital_uid, [event])
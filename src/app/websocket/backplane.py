@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from redis.exceptions import RedisError
+from src.app.core import redis
+from src.app.core.settings import Config
+
+
+logger = logging.getLogger(__name__)
+
+LISTENER_RETRY_DELAY = 5 #Time in secs before the listener reconnects to redis
+POLL_TIMEOUT = 1.0 #Time in secs the listener waits for a message before checking again
+
+# deliver(channel, room_id, payload) hands a published message to this worker's sockets
+Deliver = Callable[[str, str, str], Awaitable[None]]
+
+
+class InMemoryBackplane:
+    """
+    Single process backplane: a broadcast only reaches sockets held by this worker.
+    Used for tests and single worker runs.
+    """
+
+    def __init__(self):
+        self._deliver: Deliver | None = None
+
+    def bind(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def subscribe(self, channel: str, room_id: str):
+        pass
+
+    async def unsubscribe(self, channel: str, room_id: str):
+        pass
+
+    async def publish(self, channel: str, room_id: str, payload: str):
+        if self._deliver is not None:
+            await self._deliver(channel, room_id, payload)
+
+
+class RedisBackplane:
+    """
+    Fans broadcasts out to every worker through redis pub/sub.
+    Each (channel, room) is its own redis channel and a worker only subscribes to the rooms it holds sockets for.
+    """
+
+    def __init__(self):
+        self._deliver: Deliver | None = None
+        self._pubsub = None
+        self._task: asyncio.Task | None = None
+
+    def bind(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def start(self):
+        if self._task is not None:
+            return
+
+        self._pubsub = redis.verify_client.pubsub(ignore_subscribe_messages=True)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def _listen(self):
+        while True:
+            try:
+                # redis-py resubscribes every room we hold when this reconnects
+                await self._pubsub.connect() #type: ignore
+
+                while True:
+                    message = await self._pubsub.get_message(timeout=POLL_TIMEOUT) #type: ignore
+                    if message is None or message["type"] != "message":
+                        continue
+
+                    channel, room_id = redis.parse_ws_channel(message["channel"])
+                    await self._deliver(channel, room_id, message["data"].decode()) #type: ignore
+
+            except asyncio.CancelledError:
+                raise
+            except RedisError as e:
+                logger.warning(f"Websocket backplane lost redis: {e}")
+
+            await asyncio.sleep(LISTENER_RETRY_DELAY)
+
+    async def subscribe(self, channel: str, room_id: str):
+        if self._pubsub is None:
+            return
+
+        try:
+            await self._pubsub.subscribe(redis.ws_channel(channel, room_id))
+        except RedisError as e:
+            logger.warning(f"Could not subscribe to {channel}:{room_id}: {e}")
+
+    async def unsubscribe(self, channel: str, room_id: str):
+        if self._pubsub is None:
+            return
+
+        try:
+            await self._pubsub.unsubscribe(redis.ws_channel(channel, room_id))
+        except RedisError as e:
+            logger.warning(f"Could not unsubscribe from {channel}:{room_id}: {e}")
+
+    async def publish(self, channel: str, room_id: str, payload: str):
+        try:
+            await redis.publish_ws_message(channel, room_id, payload)
+        except RedisError as e:
+            # redis is down: at least reach the sockets this worker holds
+            logger.warning(f"Websocket backplane publish failed, delivering locally: {e}")
+            if self._deliver is not None:
+                await self._deliver(channel, room_id, payload)
+
+
+def get_backplane() -> InMemoryBackplane | RedisBackplane:
+    if Config.WEBSOCKET_BACKPLANE == "memory":
+        return InMemoryBackplane()
+    return RedisBackplane()
@@ -1,40 +1,165 @@
-from typing import Dict, List
+import asyncio
+import json
+import logging
+import time
+from typing import Dict
 import uuid
-from fastapi import WebSocket
+from fastapi import WebSocket, status
+from src.app.websocket.backplane import get_backplane
+
+
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = 64 #Messages a socket may have queued before it counts as falling behind
+SEND_QUEUE_LIMIT = 1024 #Messages queued at which a socket is treated as a slow consumer straight away
+SLOW_CONSUMER_GRACE = 5 #Time in secs a socket may stay behind before it is treated as a slow consumer
+SEND_TIMEOUT = 10 #Time in secs a single send may take before the socket is treated as dead
+
+
+class Connection:
+    """
+    One websocket with its own bounded outbound queue, drained by its own writer task.
+    A slow or dead client only ever blocks its own writer.
+    """
+
+    def __init__(self, websocket: WebSocket, channel: str, room_id: str, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.channel = channel
+        self.room_id = room_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=SEND_QUEUE_LIMIT)
+        # when the queue last went past SEND_QUEUE_SIZE, None while the writer keeps up
+        self.behind_since: float | None = None
+        self.writer = asyncio.create_task(self._write(manager))
+
+    def offer(self, payload: str) -> bool:
+        """
+        Queue a message without waiting, False when the client is too far behind:
+        SEND_QUEUE_LIMIT messages queued, or past SEND_QUEUE_SIZE for longer than SLOW_CONSUMER_GRACE.
+        A burst is delivered without yielding to the writer, so one healthy client works through is not "behind".
+        """
+        if self.queue.qsize() >= SEND_QUEUE_SIZE:
+            now = time.monotonic()
+            if self.behind_since is None:
+                self.behind_since = now
+            elif now - self.behind_since > SLOW_CONSUMER_GRACE:
+                return False
+
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _write(self, manager: "ConnectionManager"):
+        while True:
+            payload = await self.queue.get()
+
+            if self.queue.qsize() < SEND_QUEUE_SIZE:
+                self.behind_since = None
+
+            try:
+                await asyncio.wait_for(self.websocket.send_text(payload), SEND_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"Dropping websocket in {self.channel}:{self.room_id} after failed send: {e!r}")
+                await manager.drop(self, code=status.WS_1011_INTERNAL_ERROR)
+                return
+
 
 class ConnectionManager:
-    def __init__(self):
-        # { channel: { room_id: [websockets...] } }
-        self.active_connections: Dict[uuid.UUID, Dict[uuid.UUID, List[WebSocket]]] = {}
+    def __init__(self, backplane=None):
+        # { channel: { room_id: { websocket: connection } } } for sockets held by this worker
+        self.active_connections: Dict[str, Dict[str, Dict[WebSocket, Connection]]] = {}
+        # carries broadcasts to every worker that holds sockets in the room
+        self.backplane = backplane or get_backplane()
+        self.backplane.bind(self._deliver)
+        # slow consumers being closed in the background
+        self._closing: set[asyncio.Task] = set()
+
+    async def start(self):
+        await self.backplane.start()
+
+    async def stop(self):
+        await self.backplane.stop()
 
-    async def connect(self, websocket: WebSocket, channel: uuid.UUID, room_id: uuid.UUID):
+    async def connect(self, websocket: WebSocket, channel: str | uuid.UUID, room_id: str | uuid.UUID):
         """Accept connection and register it under channel + room"""
         await websocket.accept()
 
+        channel, room_id = str(channel), str(room_id)
+
         if channel not in self.active_connections:
             self.active_connections[channel] = {}
 
         if room_id not in self.active_connections[channel]:
-            self.active_connections[channel][room_id] = []
+            self.active_connections[channel][room_id] = {}
+            # first local socket in the room
+            await self.backplane.subscribe(channel, room_id)
+
+        self.active_connections[channel][room_id][websocket] = Connection(websocket, channel, room_id, self)
+
+    async def _remove(self, websocket: WebSocket, channel: str, room_id: str) -> Connection | None:
+        room = self.active_connections.get(channel, {}).get(room_id)
+        if room is None:
+            return None
+
+        connection = room.pop(websocket, None)
 
-        self.active_connections[channel][room_id].append(websocket)
+        if not room:
+            del self.active_connections[channel][room_id]
+            # last local socket left the room
+            await self.backplane.unsubscribe(channel, room_id)
 
-    def disconnect(self, websocket: WebSocket, channel: uuid.UUID, room_id: uuid.UUID):
+        if not self.active_connections[channel]:
+            del self.active_connections[channel]
+
+        return connection
+
+    async def disconnect(self, websocket: WebSocket, channel: str | uuid.UUID, room_id: str | uuid.UUID):
         """Remove connection from channel + room"""
-        if channel in self.active_connections and room_id in self.active_connections[channel]:
-            self.active_connections[channel][room_id].remove(websocket)
+        connection = await self._remove(websocket, str(channel), str(room_id))
+
+        if connection is not None:
+            connection.writer.cancel()
+
+    async def drop(self, connection: Connection, code: int):
+        """Unregister a connection the server gave up on and close its socket"""
+        await self._remove(connection.websocket, connection.channel, connection.room_id)
+
+        if asyncio.current_task() is not connection.writer:
+            connection.writer.cancel()
+
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            pass # already gone
+
+    async def broadcast(self, channel: str | uuid.UUID, room_id: str | uuid.UUID, message: dict):
+        """Send a message to all clients in channel + room, on every worker"""
+        payload = json.dumps(message, default=str)
+        await self.backplane.publish(str(channel), str(room_id), payload)
+
+    async def send(self, websocket: WebSocket, channel: str | uuid.UUID, room_id: str | uuid.UUID, message: dict):
+        """Queue a message for one local socket, behind anything already queued for it"""
+        connection = self.active_connections.get(str(channel), {}).get(str(room_id), {}).get(websocket)
+
+        if connection is not None and not connection.offer(json.dumps(message, default=str)):
+            await self.drop(connection, code=status.WS_1013_TRY_AGAIN_LATER)
 
-            if not self.active_connections[channel][room_id]:
-                del self.active_connections[channel][room_id]
+    async def _deliver(self, channel: str, room_id: str, payload: str):
+        """Queue a published message on the sockets this worker holds in channel + room, never waiting on a client"""
+        connections = self.active_connections.get(channel, {}).get(room_id, {})
 
-            if not self.active_connections[channel]:
-                del self.active_connections[channel]
+        for connection in list(connections.values()):
+            if connection.offer(payload):
+                continue
 
-    async def broadcast(self, channel: uuid.UUID, room_id: uuid.UUID, message: dict):
-        """Send a message to all clients in channel + room"""
-        if channel in self.active_connections and room_id in self.active_connections[channel]:
-            for connection in self.active_connections[channel][room_id]:
-                await connection.send_json(message)
+            # slow consumer: close it, the client reconnects and is sent fresh state
+            logger.info(f"Closing slow websocket consumer in {channel}:{room_id}")
+            task = asyncio.create_task(self.drop(connection, code=status.WS_1013_TRY_AGAIN_LATER))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
 
 
 # Global manager instance
@@ -14,6 +14,6 @@ async def notifications_ws(websocket: WebSocket, user_uid: str):
         while True:
             await websocket.receive_text()  # keep alive
     except WebSocketDisconnect:
-        manager.disconnect(websocket, "notifications", user_uid)
+        await manager.disconnect(websocket, "notifications", user_uid)
 
 
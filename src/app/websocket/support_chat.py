@@ -24,4 +24,4 @@ async def support_chat(websocket: WebSocket, session_id: str):
             await manager.broadcast("support", session_id, data)
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, "support", session_id)
+        await manager.disconnect(websocket, "support", session_id)
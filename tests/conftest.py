@@ -0,0 +1,73 @@
+import asyncio
+import os
+import pytest
+
+"""
+Tests that take the db fixtures run the app against a real database and redis, the rest need neither.
+Point TEST_DATABASE_URL at a scratch postgres (with pg_trgm available), every test drops and recreates its schema.
+REDIS_URL and the rest of the settings come from the environment / .env.local as usual.
+"""
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+if TEST_DATABASE_URL:
+    # before src is imported, the engine is built from the settings at import time
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def reset_db():
+    from sqlmodel import SQLModel
+    from src.app.database.main import async_engine, init_db
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+    await init_db()
+
+
+@pytest.fixture
+async def db():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from src.app.core import redis
+    from src.app.database.main import async_engine, async_session_factory
+
+    await reset_db()
+
+    yield async_session_factory
+
+    # both pools are bound to this test's loop
+    await async_engine.dispose()
+    await redis.verify_client.connection_pool.disconnect()
+
+
+@pytest.fixture
+def loopless_db():
+    """db for a sync test that runs its own event loops with asyncio.run, the way a Celery task does."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from src.app.database.main import async_engine, async_session_factory
+
+    async def reset():
+        await reset_db()
+        await async_engine.dispose()
+
+    asyncio.run(reset())
+
+    return async_session_factory
+
+
+@pytest.fixture
+async def client(db):
+    import httpx
+    from src import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        yield client
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+from src.app.core.utils import create_access_token
+from src.app.models import Appointment, Department, EmailOutbox, Hospital, Notification, Patient, User, UserRoles
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed_booking(session_factory) -> dict:
+    """An active patient and a hospital with one department."""
+    async with session_factory() as session:
+        hospital_user = User(username="general", email="general@example.com", hashed_password="x", role=UserRoles.HOSPITAL, is_active=True)
+        patient_user = User(username="ada", email="ada@example.com", hashed_password="x", role=UserRoles.PATIENT, is_active=True)
+        session.add_all([hospital_user, patient_user])
+        await session.flush()
+
+        hospital = Hospital(
+            hospital_name="General Hospital", full_address="1 Marina Road", state="Lagos", user_uid=hospital_user.uid,
+            license_number="LIC-1", phone_number="0800", registration_number="REG-1", hospital_ceo="Dr Obi", cover_image="cover.png",
+        )
+        session.add(hospital)
+        await session.flush()
+
+        patient = Patient(
+            first_name="Ada", last_name="Obi", hospital_card_id="CARD-1", phone_number="0801", date_of_birth=date(1990, 1, 1),
+            gender="female", country="Nigeria", state_of_residence="Lagos", home_address="2 Marina Road", blood_type="O+",
+            emergency_contact_full_name="Chidi Obi", emergency_contact_phone_number="0802", user_uid=patient_user.uid,
+        )
+        department = Department(name="General Medicine", description="walk-ins", hospital_uid=hospital.uid)
+        session.add_all([patient, department])
+        await session.commit()
+
+        token = create_access_token({"email": patient_user.email, "user_uid": str(patient_user.uid), "role": patient_user.role.value})
+
+        return {"hospital": hospital, "department": department, "patient": patient, "token": token}
+
+
+async def test_book_appointment(client, db):
+    booking = await seed_booking(db)
+
+    response = await client.post(
+        "/api/v1/appointments/new_appointment",
+        headers={"Authorization": f"Bearer {booking['token']}"},
+        json={
+            "hospital_uid": str(booking["hospital"].uid),
+            "department_uid": str(booking["department"].uid),
+            "appointment_note": "Check-up",
+            "scheduled_time": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+        },
+    )
+
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert body["patient"]["user"]["uid"] == str(booking["patient"].user_uid)
+    assert body["hospital"]["hospital_name"] == "General Hospital"
+
+    async with db() as session:
+        assert await session.scalar(select(func.count()).select_from(Appointment)) == 1
+        # both confirmation emails and both notifications are written with the appointment
+        templates = (await session.execute(select(EmailOutbox.template))).scalars().all()
+        assert sorted(templates) == ["appointment_notification_hospital.html", "appointment_success.html"]
+        assert await session.scalar(select(func.count()).select_from(Notification)) == 2
@@ -0,0 +1,124 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql
+from src.app.core import errors
+from src.app.core.pagination import Keyset
+
+# a table of its own, the keysets are only compiled, never run
+things = Table(
+    "things",
+    MetaData(),
+    Column("uid", postgresql.UUID(as_uuid=True), primary_key=True),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("closed_at", DateTime(timezone=True), nullable=True),
+    Column("rank", Integer, nullable=False),
+)
+
+CREATED = Keyset("things", things.c.created_at, things.c.uid)
+CLOSED = Keyset("things_closed", things.c.closed_at, things.c.uid)
+
+
+def cursor_of(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def sql(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.parametrize("value", [
+    datetime(2025, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+    datetime(2025, 3, 1, 9, 30, tzinfo=timezone(timedelta(hours=1))),
+])
+def test_cursor_round_trip_keeps_tz_aware_datetimes(value):
+    uid = uuid.uuid4()
+
+    decoded_value, decoded_uid = CREATED.decode(CREATED.encode(SimpleNamespace(created_at=value, uid=uid)))
+
+    assert decoded_value == value
+    assert decoded_value.utcoffset() == value.utcoffset()
+    assert decoded_uid == uid
+
+
+def test_cursor_round_trip_keeps_the_uid_tie_break():
+    # two rows on the same sort value, each cursor continues after its own row
+    created_at = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    first, second = sorted([uuid.uuid4(), uuid.uuid4()])
+
+    cursors = [CREATED.encode(SimpleNamespace(created_at=created_at, uid=uid)) for uid in (first, second)]
+
+    assert cursors[0] != cursors[1]
+    assert [CREATED.decode(cursor) for cursor in cursors] == [(created_at, first), (created_at, second)]
+
+
+def test_cursor_round_trip_of_a_null_sort_value():
+    uid = uuid.uuid4()
+
+    assert CLOSED.decode(CLOSED.encode(SimpleNamespace(closed_at=None, uid=uid))) == (None, uid)
+
+
+def test_cursor_round_trip_of_other_column_types():
+    ranked = Keyset("things_rank", things.c.rank, things.c.uid, descending=True)
+    uid = uuid.uuid4()
+
+    assert ranked.decode(ranked.encode(SimpleNamespace(rank=7, uid=uid))) == (7, uid)
+
+
+def test_cursor_is_urlsafe_without_padding():
+    cursor = CREATED.encode(SimpleNamespace(created_at=datetime.now(timezone.utc), uid=uuid.uuid4()))
+
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+def test_cursor_from_another_keyset_is_refused():
+    cursor = CLOSED.encode(SimpleNamespace(closed_at=datetime.now(timezone.utc), uid=uuid.uuid4()))
+
+    with pytest.raises(errors.InvalidCursor):
+        CREATED.decode(cursor)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "!!!",
+    "not-base64-at-all",
+    base64.urlsafe_b64encode(b"\xff\xfe\xfd").decode(),
+    cursor_of([1, 2]),
+    cursor_of({"v": ["2025-03-01T00:00:00+00:00", str(uuid.uuid4())]}),
+    cursor_of({"k": "things", "v": ["2025-03-01T00:00:00+00:00"]}),
+    cursor_of({"k": "things", "v": ["yesterday", str(uuid.uuid4())]}),
+    cursor_of({"k": "things", "v": [5, str(uuid.uuid4())]}),
+    cursor_of({"k": "things", "v": ["2025-03-01T00:00:00+00:00", "not-a-uid"]}),
+])
+def test_malformed_cursor_is_invalid_cursor(cursor):
+    with pytest.raises(errors.InvalidCursor):
+        CREATED.decode(cursor)
+
+
+def test_order_by_follows_the_direction():
+    assert [sql(clause) for clause in CREATED.order_by()] == ["things.created_at ASC", "things.uid ASC"]
+
+    newest = Keyset("things_newest", things.c.created_at, things.c.uid, descending=True)
+    assert [sql(clause) for clause in newest.order_by()] == ["things.created_at DESC", "things.uid DESC"]
+
+
+@pytest.mark.parametrize("column, descending, value, expected", [
+    # ascending, NULLs sort last
+    ("created_at", False, "set", "(things.created_at, things.uid) > (%(param_1)s, %(param_2)s::UUID)"),
+    ("closed_at", False, "set", "(things.closed_at, things.uid) > (%(param_1)s, %(param_2)s::UUID) OR things.closed_at IS NULL"),
+    ("closed_at", False, None, "things.closed_at IS NULL AND things.uid > %(uid_1)s::UUID"),
+    # descending, NULLs sort first
+    ("created_at", True, "set", "(things.created_at, things.uid) < (%(param_1)s, %(param_2)s::UUID)"),
+    ("closed_at", True, "set", "(things.closed_at, things.uid) < (%(param_1)s, %(param_2)s::UUID)"),
+    ("closed_at", True, None, "things.closed_at IS NOT NULL OR things.closed_at IS NULL AND things.uid < %(uid_1)s::UUID"),
+])
+def test_after(column, descending, value, expected):
+    keyset = Keyset("things", things.c[column], things.c.uid, descending=descending)
+    value = datetime(2025, 3, 1, tzinfo=timezone.utc) if value == "set" else value
+
+    assert sql(keyset.after(value, uuid.uuid4())) == expected
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select
+from src.app.core.scheduler import run_job_standalone
+from src.app.core.settings import Config
+from src.app.database.main import async_engine
+from src.app.models import Appointment, AppointmentStatus, JobRun, JobRunStatus
+from src.app.services.jobs import JOBS_BY_NAME
+from src.app.websocket.connection_manager import manager
+from test_appointments import seed_booking
+
+
+def run(coro):
+    """asyncio.run, leaving the app engine's pool empty for the next loop."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+async def book_overdue(session_factory, booking: dict, count: int):
+    async with session_factory() as session:
+        session.add_all([
+            Appointment(
+                patient_uid=booking["patient"].uid,
+                hospital_uid=booking["hospital"].uid,
+                department_uid=booking["department"].uid,
+                appointment_note="Check-up",
+                scheduled_time=datetime.now(timezone.utc) - timedelta(hours=2, minutes=i),
+            )
+            for i in range(count)
+        ])
+        await session.commit()
+
+
+def test_standalone_job_runs_twice(loopless_db, monkeypatch):
+    # a Celery worker runs every beat task in a fresh asyncio.run, redis must not be left bound to the last loop
+    monkeypatch.setattr(Config, "MISSED_SWEEP_BATCH", 1)
+
+    pushed = []
+    broadcast = manager.broadcast
+
+    async def recording_broadcast(channel, room_id, payload):
+        await broadcast(channel, room_id, payload)
+        pushed.append(channel)
+
+    monkeypatch.setattr(manager, "broadcast", recording_broadcast)
+
+    job = JOBS_BY_NAME["mark_missed_appointments"]
+    booking = run(seed_booking(loopless_db))
+
+    for _ in range(2):
+        run(book_overdue(loopless_db, booking, 2))
+        pushed.clear()
+
+        assert asyncio.run(run_job_standalone(job)) == 2
+        # one notification per missed appointment, pushed before the loop closed, and the queue board update
+        assert pushed.count("notifications") == 2
+        assert len(pushed) > 2
+
+    async def check():
+        async with loopless_db() as session:
+            runs = (await session.execute(select(JobRun.status))).scalars().all()
+            statuses = (await session.execute(select(Appointment.status))).scalars().all()
+        return runs, statuses
+
+    runs, statuses = run(check())
+    assert runs == [JobRunStatus.SUCCEEDED, JobRunStatus.SUCCEEDED]
+    assert statuses == [AppointmentStatus.MISSED] * 4